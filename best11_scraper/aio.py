@@ -0,0 +1,178 @@
+"""
+    Asynchronous requests.
+
+    AsyncSession follows the same request(method, suburl, ...) contract as Session,
+    but runs on asyncio (through httpx) with a cap on the number of requests in flight.
+    It shares the headers and cookie jar of the (logged in) sync Session,
+    as well as its response cache and in-flight requests. So that either session can be handed
+    the other's responses, httpx responses and errors are converted to their requests equivalents.
+
+    It is used by the bulk loader, PlayerRepository (see repository.py).
+"""
+
+import asyncio
+import time
+import httpx
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Local imports
+from metrics import METRICS
+from session import make_tree
+import transport
+
+
+def to_requests_response(response):
+    """ Converts an httpx response into a requests.Response (as built by requests' own adapter). r-type: requests.Response """
+    converted = requests.Response()
+    converted.status_code = response.status_code
+    converted.url = str(response.url)
+    converted.headers = CaseInsensitiveDict(response.headers.multi_items())
+    converted.encoding = get_encoding_from_headers(converted.headers)
+    converted.reason = response.reason_phrase
+    converted.elapsed = response.elapsed
+    converted._content = response.content
+    return converted
+
+
+def to_requests_error(error):
+    """ Returns the requests equivalent of an httpx error. r-type: requests.RequestException """
+    if isinstance(error, httpx.TimeoutException):
+        return requests.Timeout(str(error))
+    if isinstance(error, httpx.TransportError):
+        return requests.ConnectionError(str(error))
+    return requests.RequestException(str(error))
+
+
+class AsyncSession():
+    """ Makes concurrent requests to Best11 on behalf of a logged in Session. """
+
+    # Maximum number of requests in flight at once
+    max_concurrency = transport.MAX_CONCURRENCY
+
+    def __init__(self, session, max_concurrency=None):
+        """
+        Parameters:
+            session (Session) - logged in session whose headers/cookies are used
+            max_concurrency (int) - overrides the class default
+        """
+        self.session = session
+
+        if max_concurrency is not None:
+            self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        # Passing the requests cookie jar means cookies set by either session are shared.
+        # The transport retries failed connections; 5xx responses are retried in __send
+        self.client = httpx.AsyncClient(
+            headers=dict(session.headers),
+            cookies=session.cookies,
+            follow_redirects=True,
+            transport=httpx.AsyncHTTPTransport(
+                retries=transport.RETRIES,
+                limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+            )
+        )
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} (user: {self.session.username}, max_concurrency: {self.max_concurrency})"
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        """ Closes the client and lets the sync session know about any new cookies. """
+        await self.client.aclose()
+        self.session.store.track()
+
+    async def request(self, method, suburl='', priority=None, cache=True, tree=False, **kwargs):
+        """
+        Async equivalent of Session.request.
+        Defaults to the main Best11 url and raises for error statuses.
+        Goes through the same rate limiter, response cache and
+        in-flight deduplication as the sync session.
+        Returns a requests.Response and raises requests exceptions, like Session.request.
+
+        With tree=True, the body is parsed into an lxml tree (in a worker thread, off the event loop)
+        and the tree is attached to the response (see make_tree).
+        httpx has no incremental parser hook, so unlike Session.request the body isn't parsed while streaming.
+        """
+        params = kwargs.get('params')
+        shareable = cache and method.upper() == 'GET' and not kwargs.get('data')
+
+        if not shareable:
+            response = await self.__send(method, suburl, priority, False, **kwargs)
+        elif (cached := self.session.cache.get(method, suburl, params)) is not None:
+            METRICS.record_cached(method, suburl)
+            response = cached
+        else:
+            key = self.session.cache.make_key(method, suburl, params)
+            response = await self.session.flights.do_async(key, lambda: self.__send(method, suburl, priority, True, **kwargs))
+
+        if tree and getattr(response, 'tree', None) is None:
+            response.tree = await asyncio.get_running_loop().run_in_executor(None, make_tree, response)
+        return response
+
+    async def __send(self, method, suburl, priority, shareable, **kwargs):
+        """ Makes the request over the network (after waiting for the rate limiter). """
+        cassette = self.session.cassette
+        if cassette and cassette.replaying:
+            start = time.perf_counter()
+            response = await cassette.play_async(method, suburl, kwargs.get('params'), kwargs.get('data'))
+            METRICS.record_request(method, suburl, response.status_code, len(response.content), time.perf_counter() - start)
+            response.metric_key = (method, suburl)
+            response.raise_for_status()
+            self.session.after_response(method, suburl, kwargs.get('params'), response, shareable)
+            return response
+
+        # Keep the requests keyword working
+        if 'allow_redirects' in kwargs:
+            kwargs['follow_redirects'] = kwargs.pop('allow_redirects')
+
+        # Idempotent GETs are retried with backoff on a 5xx or 429, action pages never are.
+        # After a 429, the rate limiter holds them back instead
+        retries = transport.RETRIES if transport.is_retryable(method, suburl) else 0
+        for attempt in range(retries + 1):
+            if attempt and response.status_code != transport.TOO_MANY_REQUESTS:
+                await asyncio.sleep(transport.backoff(attempt - 1))
+            async with self.semaphore:
+                start = time.perf_counter()
+                await self.session.rate_limiter.wait_async(self.session.urlData.netloc, priority, suburl)
+                wait_time = time.perf_counter() - start
+                try:
+                    response = to_requests_response(await self.client.request(
+                        method,
+                        url=f"{self.session.MAIN_URL}{suburl}",
+                        **kwargs
+                    ))
+                except httpx.HTTPError as e:
+                    METRICS.record_request(method, suburl, None, 0, time.perf_counter() - start - wait_time, wait_time)
+                    raise to_requests_error(e) from e
+                METRICS.record_request(method, suburl, response.status_code, len(response.content), time.perf_counter() - start - wait_time, wait_time)
+                response.metric_key = (method, suburl)
+            if response.status_code == transport.TOO_MANY_REQUESTS:
+                self.session.rate_limiter.penalise(self.session.urlData.netloc, transport.retry_after(response, attempt))
+            if response.status_code not in transport.RETRY_STATUSES:
+                break
+
+        if cassette:
+            cassette.record(method, suburl, kwargs.get('params'), kwargs.get('data'), response)
+        response.raise_for_status()
+
+        self.session.after_response(method, suburl, kwargs.get('params'), response, shareable)
+        return response
+
+    async def gather(self, method, suburl, params_list, return_exceptions=False, **kwargs):
+        """
+        Makes the same request once for each set of params, concurrently.
+        With return_exceptions=True, a failed request is returned as its exception rather than raised.
+        r-type: list of responses (in the same order as params_list)
+        """
+        return await asyncio.gather(
+            *[self.request(method, suburl, params=params, **kwargs) for params in params_list],
+            return_exceptions=return_exceptions
+        )
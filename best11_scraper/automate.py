@@ -5,14 +5,11 @@
 # Imports
 import re
 import random
-from time import sleep
 
 # Local imports
 from spider import Best11
-from session import make_soup
-from club import Club
-
-USER_CLUB = Club(manager='user')
+from session import make_soup, make_tree
+import schemas
 
 class Auto(Best11):
     
@@ -26,8 +23,8 @@ class Auto(Best11):
     suburl_sponsor = 'sponsor.php?'
     suburl_dailybonus = 'bonus_zilnic.php?' 
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, context=None):
+        super().__init__(context)
 
     """
     *** --- Dailies --- ***
@@ -104,7 +101,7 @@ class Auto(Best11):
         amount_earned = self.get_value_from_string(table.find_all('font')[2].text)
         print(f"Collect Club Sales\nAmount earned: {amount_earned}")
 
-    def get_bonus_from_partners(self, club_id=USER_CLUB.club_id):
+    def get_bonus_from_partners(self, club_id=None):
         """
         Collects the Bonus from Partners
 
@@ -114,13 +111,15 @@ class Auto(Best11):
         
         r-type: None
         """
+        if club_id is None:
+            club_id = self.context.user_club.club_id
+
         ## Check bonus hasn't been collected already
         response = self.session.request(
             "GET",
             suburl=self.suburl_clubpage
         )
-        credits_balance_table = make_soup(response).find_all('table')[20]
-        if not credits_balance_table.find('img', attrs={'src': re.compile(r"\/bonus.gif")}):
+        if not schemas.USER_CLUB.get(make_tree(response), 'bonus_available'):
             print("Bonus from Partners already collected today")
             return False
 
@@ -205,13 +204,12 @@ class Auto(Best11):
             "GET",
             suburl=self.suburl_facilities
         )
-        soup = make_soup(response)
-        table_data = soup.find_all('table')[2].find_all('tr')[1].find('td')     
+        training_forms = schemas.FACILITIES.get(make_tree(response), 'training_forms')
         slots_to_train = [only_slot] if only_slot else [1,2]
         requestable_slots = []
         for i in slots_to_train:
             pattern = fr"antrenor\.php\?pag=antrenament[w&;]slot={i}"
-            if table_data.find('form', action=re.compile(pattern)):
+            if any(re.search(pattern, action) for action in training_forms):
                 requestable_slots.append(i)
 
         if not requestable_slots:
@@ -241,11 +239,10 @@ class Auto(Best11):
             "GET",
             suburl=self.suburl_clubpage
         )
-        credits_balance_text = make_soup(response).find_all('table')[20].find_all('td')[1].text
         try:
-            return self.get_value_from_string(credits_balance_text)
-        except:
-            raise Exception(f"Could not find credits balance in text:\n{credits_balance_text}")
+            return schemas.USER_CLUB.get(make_tree(response), 'credits')
+        except Exception as e:
+            raise Exception(f"Could not find credits balance:\n{e}")
 
     @property
     def tp_balance(self):
@@ -258,11 +255,10 @@ class Auto(Best11):
             "GET",
             suburl=self.suburl_clubpage
         )
-        tp_balance_text = make_soup(response).find_all('table')[22].find_all('td')[1].text
         try:
-            return self.get_value_from_string(tp_balance_text)
-        except:
-            raise Exception(f"Could not find credits balance in text:\n{tp_balance_text}")
+            return schemas.USER_CLUB.get(make_tree(response), 'tp')
+        except Exception as e:
+            raise Exception(f"Could not find TP balance:\n{e}")
     
     """
     *** --- Youth Coaches --- ***
@@ -279,24 +275,18 @@ class Auto(Best11):
         r-type: dict
         """
         response = self.session.request("GET", self.suburl_facilities)
-        soup = make_soup(response)
-        youth_coach_box = soup.find_all('table')[3].find_all('tr')[1]
-
-        hire_coach_button = youth_coach_box.find('input', attrs={'value': 'Hire coach'})
+        fields = schemas.FACILITIES(make_tree(response), 'youth_coach_hirable', 'youth_coach_name', 'youth_coach_stats', 'youth_coach_stars')
 
         # Button for hiring a new coach. Hence there is no current coach. So return False
-        if hire_coach_button:
+        if fields['youth_coach_hirable']:
             return False
 
-        name = youth_coach_box.find('b').text
-        link = youth_coach_box.find('a', attrs={'onmouseover': True})
+        name = fields['youth_coach_name']
         pattern = r"Salary: (\d{1}\.?\d{0,3}) C"
-        salary = int(re.findall(pattern, link['onmouseover'])[0])
+        salary = int(re.findall(pattern, fields['youth_coach_stats'])[0])
 
         pattern = r"stele/(\d{1,2})"
-        star_ratings = tuple([int(re.findall(pattern, i['src'])[0])//2 for i in 
-            soup.find_all('table')[4].find_all('tr')[1].find_all('img', attrs={'src': re.compile(r"imagini/stele/")})
-            ])
+        star_ratings = tuple([int(re.findall(pattern, i)[0])//2 for i in fields['youth_coach_stars']])
 
         return {'name': name, 'salary': salary, 'ratings': star_ratings}
 
@@ -426,22 +416,22 @@ class Auto(Best11):
 
         ## Go to the facilities page
         response = self.session.request("GET", suburl=self.suburl_facilities)
-        techstaff_box = make_soup(response).find_all('table')[2].find_all('tr')[1]
+        fields = schemas.FACILITIES(make_tree(response), 'techstaff_slots', 'techstaff_stats', 'techstaff_names')
 
         ## Get the slot numbers for which you have a coach
-        occupied_slots = [int(x.get('href')[-1]) for x in techstaff_box.find_all('a', attrs={'href': re.compile(r"antrenor.php\?pag=concediaza&slot=\d$")})]
+        occupied_slots = list(fields['techstaff_slots'])
         
         ## Coach Stats
         # Get the onmouseover containing coach level and salary. (Yes, this is the only way to get it...)
         pattern = r"Level: (\d{1,2})\/10 <br> Salary: (\d{1,3}\.?\d{0,3} C)"
-        coach_stats_strings = [i.get('onmouseover') for i in techstaff_box.find_all('a', attrs={'onmouseover': re.compile(pattern)})]
+        coach_stats_strings = [i for i in fields['techstaff_stats'] if re.search(pattern, i)]
         if len(occupied_slots) != len(coach_stats_strings):
             raise Exception(f"Uneven number of coaches and coach stats program could scrape\n{occupied_slots}\n{coach_stats_strings}")
         # Use function within method to convert onmouseovers to readable format
         coach_stats = [coach_stat_string_to_values(s) for s in coach_stats_strings]
 
         ## Coach Names
-        coach_names = [x.text for x in techstaff_box.find_all('b')]
+        coach_names = list(fields['techstaff_names'])
         
         techstaff = {}
         while occupied_slots:
@@ -535,19 +525,16 @@ class Auto(Best11):
             "GET",
             suburl=self.suburl_facilities
         )
-        soup = make_soup(response)
-
-        psych_box = soup.find_all('table')[9].find_all('tr')[1]
+        fields = schemas.FACILITIES(make_tree(response), 'psych_hirable', 'psych_name', 'psych_stats')
 
-        if psych_box.find_all('input', attrs={'value': 'Hire psychologist'}):
+        if fields['psych_hirable']:
             # No psychologist is hired at the moment
             return False
 
-        name = psych_box.find('b').text
+        name = fields['psych_name']
         
-        link = psych_box.find('a', attrs={'onmouseover': True})
         pattern = r"Level: (\d{1})/5 <br> Consultation: (\d{0,3}?\.?\d{1,3}) C"
-        level, consultation = re.findall(pattern, link['onmouseover'])[0]
+        level, consultation = re.findall(pattern, fields['psych_stats'])[0]
 
         level = int(level)
         consultation = self.get_value_from_string(consultation)
@@ -701,6 +688,7 @@ class Auto(Best11):
             contract = {'payment': payment, 'victory': victory, 'draw': draw}
             return contract
 
+        # NOTE: no need to sleep between attempts; requests are throttled by the session's rate limiter
         attempts = 0
         while True:
             attempts += 1
@@ -708,9 +696,6 @@ class Auto(Best11):
                 print(f"Succeeded in {attempts} attempts")
                 return sponsor_contract
 
-            if attempts % 10 == 0:
-                sleep(2)
-
     @property
     def sponsors_options_list(self):
         sponsors = self.sponsors
@@ -742,11 +727,7 @@ class Auto(Best11):
         r-type: int
         """
         response = self.session.request("GET", suburl=self.suburl_facilities)
-        soup = make_soup(response)
-        medical_box = soup.find_all('table')[8]
-
-        selected = medical_box.find('option', attrs={'selected':True})
-        return int(selected.get('value'))
+        return schemas.FACILITIES.get(make_tree(response), 'medical_allowance')
 
     @medical_allowance.setter
     def medical_allowance(self, level=1):
@@ -0,0 +1,171 @@
+"""
+    Benchmarks for the scraper.
+
+    Runs against the local stand-in server by default (see stub_server.py),
+    or against best11.org with --live (in which case the rate limiter applies as usual).
+
+    Usage:
+        python benchmark.py transfer --repeat 5
+        python benchmark.py parse --live --player-ids 234841 302424
+"""
+
+import argparse
+import re
+import statistics
+import time
+
+import lxml.html
+
+# Local imports
+from session import Session, make_soup, make_tree
+from spider import Best11
+from player import PlayerSnapshot
+from ratelimit import RateLimiter
+import transport
+
+
+# The heaviest pages this project requests: (name, method, suburl, kwargs)
+HEAVY_PAGES = (
+    ('manager listing', "POST", "useri.php?", {'params': {'pag': 'cauta'}, 'data': {'cautare': 2, 'manager': ''}}),
+    ('player search', "POST", "lista_jucatori.php", {'data': {
+        'tara': None, 'varsta': 0, 'pozitie': 3, 'A1': 10, 'A2': 10, 'A3': 10,
+        'EXP': 0, 'AMB': 1, 'INT': 1, 'REZ': 1, 'AGR': 5, 'VUL': 5
+    }}),
+)
+
+
+def timed(func, repeat):
+    """ Calls func <repeat> times. r-type: tuple (median seconds, last result) """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+# --- Transfer ---
+
+def fetch_page(session, method, suburl, kwargs, compressed, streamed):
+    """
+    Fetches and parses a page.
+    r-type: tuple (bytes on the wire, bytes of html)
+    """
+    headers = {'Accept-Encoding': transport.ACCEPT_ENCODING if compressed else 'identity'}
+    response = session.request(method, suburl, tree=streamed, headers=headers, **kwargs)
+    if streamed:
+        make_tree(response)
+    else:
+        make_soup(response)
+    # Bytes read from the socket, before decompression (not available for replayed responses)
+    wire = response.raw.tell() if response.raw is not None else len(response.content)
+    return wire, len(response.content)
+
+def bench_transfer(session, args):
+    """ Compares downloading and parsing the heavy pages whole and uncompressed with compressed and streamed. """
+    scenarios = (
+        ('identity, whole + soup', False, False),
+        ('compressed, whole + soup', True, False),
+        ('compressed, streamed + lxml', True, True),
+    )
+    print(f"{'Page':<18}{'Scenario':<30}{'Wire KB':>10}{'HTML KB':>10}{'Time (s)':>10}")
+    for name, method, suburl, kwargs in HEAVY_PAGES:
+        baseline = None
+        for label, compressed, streamed in scenarios:
+            elapsed, (wire, size) = timed(lambda: fetch_page(session, method, suburl, kwargs, compressed, streamed), args.repeat)
+            print(f"{name:<18}{label:<30}{wire / 1024:>10.1f}{size / 1024:>10.1f}{elapsed:>10.3f}")
+            if baseline is None:
+                baseline = wire, elapsed
+        print(f"{'':<18}{'saved':<30}{100 * (1 - wire / baseline[0]):>9.1f}%{'':>10}{100 * (1 - elapsed / baseline[1]):>9.1f}%\n")
+
+
+# --- Parse ---
+
+def soup_player_fields(soup):
+    """ Extracts the player fields by walking the soup, the way Player used to. r-type: dict """
+    tables = soup.find_all('table')
+    row_text = lambda i: tables[i].find_all('tr')[1].find('td').text
+    row_img = lambda i: tables[i].find_all('tr')[1].find('td').find('img').get('src')
+    return {
+        'player_name': tables[2].find_all('td')[1].text.split('[')[0].strip(),
+        'club': tables[2].find_all('td')[2].find('a').text,
+        'club_id': tables[2].find_all('td')[2].find('a').get('href'),
+        'picture': tuple(i.get('src') for i in tables[4].find_all('img')),
+        'position': tables[5].find('b').text,
+        'age': int(tables[6].find('b').text),
+        'salary': Best11.get_value_from_string(row_text(7)),
+        'value': Best11.get_value_from_string(row_text(8).strip()),
+        'exp': int(row_text(9).strip()[0:3].split('/')[0]),
+        'nat': re.findall(r"([A-Z]{3,}).[a-z]+", row_img(11))[0],
+        'boots': re.findall(r"([A-Z]{3,}).[a-z]+", row_img(12))[0].title(),
+        'goals': tuple(int(i.text) for i in tables[14].find_all('tr')[1].find('td').find_all('b')),
+        'mom': tuple(int(i.text) for i in tables[14].find_all('tr')[1].find_all('td')[1].find_all('b')),
+        'skill': tuple(float(i) for i in re.findall(r"([\d\.]+)", str([row_text(i) for i in range(16, 19)]))),
+        'energy': int(row_text(19).strip()[:-1]),
+        'morale': int(re.findall(r"_(\d).gif", row_img(20))[0]),
+        'fixed': tuple(int(re.findall(r"_(\d).gif", row_img(i))[0]) for i in range(23, 28))
+    }
+
+def bench_parse(session, args):
+    """ Compares parsing and extracting every field of player pages with BeautifulSoup and with lxml XPath. """
+    player_ids = args.player_ids
+    if not player_ids:
+        from stub_server import GameData
+        player_ids = GameData().squad(2)
+    responses = [session.request("GET", "vizualizare_jucator.php?", params={'id': i}) for i in player_ids]
+
+    def with_soup():
+        for r in responses:
+            soup_player_fields(make_soup(r))
+
+    def with_lxml():
+        for r in responses:
+            # Bypass the tree attached to the response, so that parsing is timed too
+            PlayerSnapshot.from_tree(None, lxml.html.document_fromstring(r.content))
+
+    print(f"{'Approach':<28}{'Per page (ms)':>15}")
+    results = {}
+    for label, func in (('make_soup + find_all', with_soup), ('lxml + snapshot', with_lxml)):
+        elapsed, _ = timed(func, args.repeat)
+        results[label] = elapsed
+        print(f"{label:<28}{1000 * elapsed / len(responses):>15.2f}")
+    soup_time, lxml_time = results.values()
+    print(f"{'speed up':<28}{soup_time / lxml_time:>14.1f}x  ({len(responses)} pages)")
+
+
+BENCHMARKS = {
+    'transfer': bench_transfer,
+    'parse': bench_parse,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the scraper's benchmarks")
+    parser.add_argument('benchmarks', nargs='*', choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--live', action='store_true', help="run against best11.org instead of the stand-in server")
+    parser.add_argument('--latency', type=float, default=0, help="latency of the stand-in server")
+    parser.add_argument('--player-ids', type=int, nargs='*', help="players whose pages are parsed (needed with --live)")
+    args = parser.parse_args()
+
+    server = None
+    if not args.live:
+        from stub_server import StubServer
+        server = StubServer(port=0, latency=args.latency)
+        Session.set_main_url(server.start())
+        # The stand-in server doesn't need protecting
+        Session.rate_limiter = RateLimiter(rate=10**6, burst=10**6, jitter=0)
+
+    session = Session.load_session()
+    try:
+        for name in args.benchmarks:
+            print(f"\n-- {name} --")
+            BENCHMARKS[name](session, args)
+    finally:
+        session.close()
+        if server:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,24 +7,24 @@
 # Imports
 from time import sleep
 import random
+import numpy as np
 import pendulum
 
 # Local Imports
-from club import Club
 from player import Player
 from spider import Best11
-from session import make_soup
+from session import make_soup, make_tree
+import schemas
 import util
+from repository import PlayerRepository
+from frame import PlayerFrame
 from util import TimeZones as tz
 
 
-USER_CLUB = Club(manager="user")
-
-
 class ListedPlayer(Player):
     
-    def __init__(self, player_id):
-        super().__init__(player_id)
+    def __init__(self, player_id, context=None, response=None):
+        super().__init__(player_id, context, response)
         if not self.listed:
             raise Exception("Player not listed")
 
@@ -34,18 +34,9 @@ class ListedPlayer(Player):
             print("Cannot get bidding info for unlisted player!")
             return False
 
-        request = self.session.request("GET", suburl="vizualizare_jucator.php?", params=self.params)
-        table = make_soup(request).find_all('table')[5]
-
-        current_offer = self.get_value_from_string(table.find('td').text) # TODO if bid won, cannot get value from str. need to fix
-        current_bidder = table.find('a').text
-        deadline = table.find_all('td')[2].find('b').text
-
-        return {
-            'current_offer': current_offer,
-            'current_bidder': current_bidder,
-            'deadline': deadline
-        }
+        request = self.session.request("GET", suburl="vizualizare_jucator.php?", params=self.params, priority='bidding', cache=False)
+        # TODO if bid won, cannot get value from str. need to fix
+        return schemas.TRANSFER_INFO(make_tree(request))
 
     @property
     def deadline(self):
@@ -87,7 +78,7 @@ class ListedPlayer(Player):
             Time between checks in seconds, min and max
         """
 
-        user_club_name = USER_CLUB.club_name
+        user_club_name = self.context.user_club.club_name
 
         try:
             max_bid = self.get_value_from_string(max_bid)
@@ -130,10 +121,31 @@ class ListedPlayer(Player):
             sleep(delay)
 
 class TransferList(Best11):
-    def __init__(self):
-        super().__init__()
-        player_ids = util.flat_list([self.request_listed_players(i) for i in range(1,5)])
-        self.tl_players = [Player(i) for i in player_ids]
+
+    # The fields used to filter the listed players (see __call__)
+    fields = ('position', 'age', 'salary', 'skill')
+
+    def __init__(self, context=None, load_players=True):
+        """
+        Parameters:
+            load_players (bool) - if False, players are not loaded here,
+                so that they can be loaded concurrently with load_players_async()
+        """
+        super().__init__(context)
+        self.player_ids = util.flat_list([self.request_listed_players(i) for i in range(1,5)])
+        # Listed players' pages are requested concurrently
+        self.tl_players = self.__load(PlayerRepository(self.context).load_many(self.player_ids, fields=self.fields)) if load_players else []
+
+    async def load_players_async(self, max_concurrency=None):
+        """ Async variant for loading the listed players. """
+        self.tl_players = self.__load(await PlayerRepository(self.context, max_concurrency).load_many_async(self.player_ids, fields=self.fields))
+        return self.tl_players
+
+    @staticmethod
+    def __load(batch):
+        """ Returns the players of a batch, reporting any which couldn't be loaded (e.g. sold in the meantime). """
+        batch.report_errors()
+        return batch.players
 
     def request_listed_players(self, position):
         request = self.session.request(
@@ -158,8 +170,15 @@ class TransferList(Best11):
         return player_ids
 
     def __call__(self, min_talent=1, max_age=17, min_skill=10*3, peer_advantage=-200):
-        tl_players = self.tl_players
-        return [i for i in tl_players if i.talent >= min_talent and i.age <= max_age and i.skill_total >= min_skill and (not i.peer_advantage or i.peer_advantage >= peer_advantage)]
+        frame = PlayerFrame.from_players(self.tl_players, self.context)
+        advantage = frame.peer_advantage
+        return frame.players_where(
+            (frame.talent >= min_talent)
+            & (frame['age'] <= max_age)
+            & (frame.skill_total >= min_skill)
+            # Players whose peer advantage is unknown aren't rejected for it
+            & (np.isnan(advantage) | (advantage >= peer_advantage))
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,153 @@
+"""
+    In-memory cache of responses, used by Session.request.
+
+    GET responses are cached according to TTL rules set per suburl pattern
+    (e.g. the league page for hours, a player's profile for seconds).
+    Each rule belongs to an area of the game. Any POST, or any GET to a page that
+    isn't cached (i.e. an action, such as collecting a bonus), invalidates the
+    cached entries of the areas it could have changed.
+"""
+
+import re
+import threading
+import time
+
+
+# Pages which change the state of the game, even when requested with a GET,
+# and the areas of the cache each may change. None changes everything.
+# Also used by the transports, which never send these twice (see transport.py)
+ACTION_AREAS = (
+    (('bonus_zilnic.php', 'get_bonus.php', 'magazinul_clubului.php'), ('user_club', 'finances')),
+    (('antrenor.php', 'antrenor_nou.php', 'confirma_antrenor.php', 'antrenor_juniori.php'), ('facilities', 'user_club', 'finances')),
+    (('psiholog.php', 'psiholog_nou.php', 'confirma_psiholog.php', 'investitie_cm.php'), ('facilities', 'finances')),
+    (('sponsor.php',), ('finances',)),
+    (('licitatie.php',), ('player', 'user_club')),
+    (('antrenament.php', 'extra_practice.php', 'interactiune.php', 'schimba_nume.php'), ('player', 'squad')),
+    (('schimba_motto.php', 'schimba_obiectiv.php'), ('club',)),
+    (('login.php',), None),
+)
+ACTION_PAGES = frozenset(page for pages, _ in ACTION_AREAS for page in pages)
+
+
+def compile_rules(rules):
+    """ Compiles the regex patterns of a collection of (pattern, *values) rules. """
+    return tuple((re.compile(pattern), *values) for pattern, *values in rules)
+
+
+class ResponseCache():
+    """ Caches responses by method, suburl and params. """
+
+    # (suburl pattern, ttl in seconds, area)
+    rules = compile_rules((
+        (r"^campionat\.php", 6*60*60, 'league'),
+        (r"^meciuri\.php", 60*60, 'schedule'),
+        (r"^wealth\.php", 30*60, 'wealth'),
+        (r"^cauta_jucatori\.php", 24*60*60, 'search'),
+        (r"^vizualizare_club\.php", 10*60, 'club'),
+        (r"^vizualizare_jucatori\.php", 10*60, 'squad'),
+        (r"^vizualizare_jucator\.php", 60, 'player'),
+        (r"^profil\.php", 10, 'player'),
+        (r"^club\.php", 60, 'user_club'),
+        (r"^facilitati\.php", 60, 'facilities'),
+        (r"^finante\.php", 60, 'finances'),
+    ))
+
+    # (action suburl pattern, areas invalidated). None invalidates everything.
+    invalidation_rules = compile_rules(
+        (rf"^({'|'.join(map(re.escape, pages))})(\?|$)", areas) for pages, areas in ACTION_AREAS
+    )
+
+    # POSTs to these suburls are only searches, so don't invalidate anything
+    read_only = re.compile(r"^(lista_jucatori|lista_transferuri|useri|cauta_jucatori)\.php")
+
+    def __init__(self, rules=None):
+        """
+        Parameters:
+            rules (iterable) - (suburl pattern, ttl, area) to use instead of the defaults
+        """
+        if rules is not None:
+            self.rules = compile_rules(rules)
+
+        # {key: (expires, area, response)}
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} (entries: {len(self.entries)})"
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def make_key(method, suburl, params=None):
+        """ Returns the key for a request. r-type: tuple """
+        params = tuple(sorted((str(k), str(v)) for k, v in params.items())) if params else ()
+        return (method.upper(), suburl.rstrip('?'), params)
+
+    def rule_for(self, suburl):
+        """ Returns (ttl, area) for a suburl, or None if its responses aren't cached. """
+        for pattern, ttl, area in self.rules:
+            if pattern.match(suburl):
+                return ttl, area
+        return None
+
+    def get(self, method, suburl, params=None):
+        """ Returns the cached response for a request, or None. """
+        key = self.make_key(method, suburl, params)
+        with self.lock:
+            if not (entry := self.entries.get(key)):
+                return None
+            expires, _, response = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+        return response
+
+    def put(self, method, suburl, params, response):
+        """ Caches a response if there is a rule for its suburl. r-type: bool """
+        if method.upper() != 'GET' or not (rule := self.rule_for(suburl)):
+            return False
+        ttl, area = rule
+        with self.lock:
+            self.entries[self.make_key(method, suburl, params)] = (time.monotonic() + ttl, area, response)
+        return True
+
+    def is_action(self, method, suburl):
+        """ Returns True if a request could change the state of the game. """
+        if method.upper() == 'GET':
+            return self.rule_for(suburl) is None
+        return not self.read_only.match(suburl)
+
+    def changes_state(self, method, suburl):
+        """
+        Returns True if a request is a known action (or a POST which isn't a search),
+        i.e. pages fetched before it may no longer be current.
+        Unlike is_action, GETs of pages which just aren't cached are not included.
+        """
+        if method.upper() != 'GET':
+            return not self.read_only.match(suburl)
+        return any(pattern.match(suburl) for pattern, _ in self.invalidation_rules)
+
+    def invalidate_for(self, method, suburl):
+        """
+        Invalidates the areas that a request may have changed.
+        Unknown POSTs invalidate everything, to be safe.
+        """
+        if not self.is_action(method, suburl):
+            return
+
+        for pattern, areas in self.invalidation_rules:
+            if pattern.match(suburl):
+                self.invalidate(areas)
+                return
+
+        if method.upper() != 'GET':
+            self.invalidate()
+
+    def invalidate(self, areas=None):
+        """ Removes the entries of the given areas (or every entry if areas is None). """
+        with self.lock:
+            if areas is None:
+                self.entries.clear()
+                return
+            self.entries = {k: v for k, v in self.entries.items() if v[1] not in areas}
@@ -0,0 +1,207 @@
+"""
+    Record/replay of requests ("cassettes").
+
+    In record mode, every request/response pair made by the session is appended
+    to a gzip-compressed file of JSON lines, including the final (redirected) URL,
+    which the login check depends on. Form data and cookies aren't kept,
+    so that cassettes can be shared.
+    In replay mode, no requests are made: responses are served from the cassette,
+    in the order they were recorded, with an optional simulated latency.
+    This allows the daily routine to be run offline, at full speed, and timed reproducibly.
+
+    Usage:
+        python cassette.py record session_files/daily.jsonl.gz
+        python cassette.py replay session_files/daily.jsonl.gz --latency 0.05
+"""
+
+import argparse
+import asyncio
+import atexit
+import gzip
+import hashlib
+import json
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+class CassetteMiss(Exception):
+    """ Raises if a request is made in replay mode that was never recorded. """
+    def __init__(self, msg):
+        super().__init__(msg)
+
+
+class Cassette():
+    """ Records request/response pairs to file and replays them deterministically. """
+
+    modes = ('record', 'replay')
+
+    # Response headers which aren't recorded, so that session cookies don't end up in the file
+    private_headers = frozenset({'set-cookie'})
+
+    def __init__(self, file_name, mode='replay', latency=0):
+        """
+        Parameters:
+            file_name (str) - path to the (gzip) cassette file
+            mode (str) - 'record' or 'replay'
+            latency (float) - seconds to wait before each replayed response
+        """
+        if mode not in self.modes:
+            raise ValueError(f"Unknown mode: {mode}\nMust be in {self.modes}")
+
+        self.file_name = file_name
+        self.mode = mode
+        self.latency = latency
+
+        # {key: [interaction, ...]} in the order they were recorded
+        self.interactions = {}
+        # {key: number of times played}
+        self.plays = {}
+        self.lock = threading.Lock()
+
+        # Open file handle while recording
+        self.file = None
+
+        if mode == 'replay':
+            self.load()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} (file: {self.file_name}, mode: {self.mode}, requests: {len(self)})"
+
+    def __len__(self):
+        return sum(len(i) for i in self.interactions.values())
+
+    @property
+    def replaying(self):
+        return self.mode == 'replay'
+
+    @property
+    def recording(self):
+        return self.mode == 'record'
+
+    @staticmethod
+    def make_key(method, suburl, params=None, data=None):
+        """
+        Returns the key used to match a request with a recorded response.
+        Form data is only kept as a digest, so that passwords don't end up in the file.
+        r-type: str
+        """
+        params = sorted((str(k), str(v)) for k, v in params.items()) if params else []
+        data = sorted((str(k), str(v)) for k, v in data.items()) if isinstance(data, dict) else data
+        digest = hashlib.sha1(json.dumps(data).encode()).hexdigest() if data else ''
+        return json.dumps([method.upper(), suburl.rstrip('?'), params, digest])
+
+    # --- Recording ---
+
+    def record(self, method, suburl, params, data, response):
+        """
+        Appends a request/response pair to the cassette file.
+        Works for both requests and httpx responses.
+        """
+        interaction = {
+            'key': self.make_key(method, suburl, params, data),
+            'status': response.status_code,
+            'url': str(response.url),
+            'headers': {k: v for k, v in response.headers.items() if k.lower() not in self.private_headers},
+            'encoding': response.encoding,
+            # latin-1 maps every byte to a character, so the body round trips exactly
+            'body': response.content.decode('latin-1')
+        }
+        with self.lock:
+            self.interactions.setdefault(interaction['key'], []).append(interaction)
+            if self.file is None:
+                self.file = gzip.open(self.file_name, 'wt')
+                atexit.register(self.close)
+            self.file.write(json.dumps(interaction) + '\n')
+            # Sync flush, so that the recording is readable even if the program stops
+            self.file.flush()
+
+    def close(self):
+        """ Closes the cassette file (if recording). """
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    # --- Replaying ---
+
+    def load(self):
+        """ Loads the recorded interactions from the cassette file. """
+        self.interactions = {}
+        self.plays = {}
+        with gzip.open(self.file_name, 'rt') as gf:
+            for line in gf:
+                interaction = json.loads(line)
+                self.interactions.setdefault(interaction['key'], []).append(interaction)
+
+    def __next_interaction(self, method, suburl, params, data):
+        """
+        Returns the next recorded interaction for a request.
+        Once every recording of a request has been played, the last one is repeated.
+        """
+        key = self.make_key(method, suburl, params, data)
+        with self.lock:
+            if not (recorded := self.interactions.get(key)):
+                raise CassetteMiss(f"No recorded response for {method} {suburl} (params: {params})")
+            index = self.plays.get(key, 0)
+            self.plays[key] = index + 1
+        return recorded[min(index, len(recorded) - 1)]
+
+    @staticmethod
+    def to_response(interaction):
+        """ Converts a recorded interaction back into a requests.Response. """
+        response = requests.Response()
+        response.status_code = interaction['status']
+        response.url = interaction['url']
+        response.headers = CaseInsensitiveDict(interaction['headers'])
+        response.encoding = interaction['encoding']
+        response._content = interaction['body'].encode('latin-1')
+        response.reason = 'OK' if response.ok else 'Replayed error'
+        return response
+
+    def play(self, method, suburl, params=None, data=None):
+        """ Returns the recorded response for a request. r-type: requests.Response """
+        interaction = self.__next_interaction(method, suburl, params, data)
+        if self.latency:
+            time.sleep(self.latency)
+        return self.to_response(interaction)
+
+    async def play_async(self, method, suburl, params=None, data=None):
+        """ Async equivalent of play(). """
+        interaction = self.__next_interaction(method, suburl, params, data)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.to_response(interaction)
+
+
+def run_with_cassette(func, file_name, mode='replay', latency=0):
+    """
+    Runs func with every session using the given cassette.
+    Prints and returns the time taken.
+    r-type: float (seconds)
+    """
+    from session import Session
+    Session.cassette = Cassette(file_name, mode, latency)
+
+    start = time.perf_counter()
+    try:
+        func()
+    finally:
+        Session.cassette.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{mode.title()}ed {len(Session.cassette)} requests in {elapsed:.2f}s")
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record or replay the daily routine (main.main)")
+    parser.add_argument('mode', choices=Cassette.modes)
+    parser.add_argument('file_name')
+    parser.add_argument('--latency', type=float, default=0)
+    args = parser.parse_args()
+
+    from main import main
+    run_with_cassette(main, args.file_name, args.mode, args.latency)
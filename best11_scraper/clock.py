@@ -0,0 +1,132 @@
+"""
+    The game clock: the current season and week, and the time of the user's next match.
+
+    These only change at known times, so rather than fetching campionat.php and meciuri.php
+    every time they're needed, they're fetched once and kept (in memory and on file) until then:
+        - season and week: until the next match slot (17:45 server time) or the start of the next week,
+          whichever comes first
+        - next match: until it kicks off
+    The next match is the logged in user's, so the file is kept along with their username
+    (as configured, so that checking it doesn't need a session), and is stale for anyone else.
+"""
+
+import json
+import os
+import tempfile
+
+import pendulum
+
+# Local imports
+from util import TimeZones as tz
+import session
+
+
+class GameClock():
+    """ Caches the season, week and next match until their next rollover. """
+
+    # Files
+    fn_clock = "session_files/game_clock.json"
+
+    # Matches are played daily at this time (server time)
+    match_slot = {'hour': 17, 'minute': 45}
+
+    def __init__(self, context, file_name=None):
+        """
+        Parameters:
+            context (AppContext) - used to make the requests when the cached values have expired
+        """
+        self.context = context
+        self.file_name = file_name if file_name else self.fn_clock
+        self.state = self.__load()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} (season_week: {self.state.get('season_week')}, next_match: {self.state.get('next_match')})"
+
+    def __load(self):
+        """ Returns the values cached by previous runs (which may have expired). r-type: dict """
+        try:
+            with open(self.file_name) as jf:
+                return json.load(jf)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def __save(self):
+        """
+        Writes the state atomically:
+        dumps to a temp file in the same directory, then renames it over the clock file.
+        """
+        directory = os.path.dirname(os.path.abspath(self.file_name))
+        fd, temp_name = tempfile.mkstemp(dir=directory, prefix='.game_clock_', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as jf:
+                json.dump(self.state, jf)
+            os.replace(temp_name, self.file_name)
+        except:
+            os.remove(temp_name)
+            raise
+
+    @staticmethod
+    def username():
+        """ The configured user, read from the settings rather than the session (which may have to log in). """
+        return session.USER_SETTINGS.get('user_details', 'username', fallback=None)
+
+    def __check_user(self):
+        """ Drops the cached values if they were cached for another user. """
+        username = self.username()
+        if self.state.get('username') != username:
+            self.state = {'username': username}
+
+    @staticmethod
+    def now():
+        return pendulum.now(tz=tz.server)
+
+    def next_rollover(self, now=None):
+        """ Returns the next time the season or week may change. r-type: pendulum.DateTime """
+        now = now if now is not None else self.now()
+        slot = now.set(**self.match_slot, second=0, microsecond=0)
+        if slot <= now:
+            slot = slot.add(days=1)
+        next_week = now.start_of('week').add(weeks=1)
+        return min(slot, next_week)
+
+    def __fresh(self, key):
+        """ Returns True if a value is cached (for the current user) and hasn't expired. """
+        self.__check_user()
+        if not (expires := self.state.get(f'{key}_expires')):
+            return False
+        return pendulum.parse(expires) > self.now()
+
+    def __spider(self):
+        # Imported here since spider depends on this module (via context)
+        from spider import Best11
+        return Best11(self.context)
+
+    @property
+    def season_week(self):
+        """
+        Returns the current season and week of play
+        r-type: tuple
+        r-format: (season, week); (int, int)
+        """
+        if not self.__fresh('season_week'):
+            season, week = self.__spider().fetch_season_week()
+            self.state['season_week'] = [season, week]
+            self.state['season_week_expires'] = self.next_rollover().isoformat()
+            self.__save()
+        return tuple(self.state['season_week'])
+
+    @property
+    def next_match(self):
+        """ Returns the datetime of the user's next match. r-type: pendulum.DateTime """
+        if not self.__fresh('next_match'):
+            next_match = self.__spider().fetch_next_match()
+            self.state['next_match'] = next_match.isoformat()
+            # Once it kicks off, the next match is the one after it
+            self.state['next_match_expires'] = next_match.isoformat()
+            self.__save()
+        return pendulum.parse(self.state['next_match']).in_timezone(tz.server)
+
+    def invalidate(self):
+        """ Forgets the cached values, so that they're fetched again on next use. """
+        self.state = {'username': self.username()}
+        self.__save()
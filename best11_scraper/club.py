@@ -10,11 +10,12 @@ import pendulum
 from collections import Counter
 
 # Local Imports
-from session import make_soup
+from session import make_soup, make_tree
 from spider import Best11
+import schemas
 import util
 
-from player import Player, UserPlayer
+from repository import PlayerRepository
 
 # TODO move all suburls to parent class Spider?
 
@@ -24,12 +25,12 @@ class Club(Best11):
     (e.g. Noworry About MJ), given its id.
     """
     
-    def __init__(self, club_id=None, club=None, manager=None):
+    def __init__(self, club_id=None, club=None, manager=None, context=None):
         """
         Parameters:
             club_id (int > str)
         """
-        super().__init__()
+        super().__init__(context)
 
         if not any((club_id, club, manager)):
             raise Exception("You must provide either club_id, club or manager")
@@ -54,7 +55,7 @@ class Club(Best11):
 
         self.club_id = club_id
         self.params = {'id': self.club_id}
-        self.soup_dict = self.__get_soup_dict()
+        self.fields = self.__get_fields()
 
     def __repr__(self):
         # TODO
@@ -64,24 +65,12 @@ class Club(Best11):
         # TODO
         pass
 
-    # --- Soup ---
+    # --- Page ---
 
-    def __get_soup_dict(self):
-        """ Returns a dict of multi-use soup elements.
-        e.g. the club_info_table is called by multiple properties. """
+    def __get_fields(self):
+        """ Returns every field of the club's page, extracted in a single pass. r-type: dict """
         request = self.session.request("GET", "vizualizare_club.php?", params=self.params)
-        soup = make_soup(request)
-
-        # Set instance var for full soup
-        self.soup = soup
-
-        # Common soup elements
-        club_info = soup.find_all('table')[3].find_all('tr')[1]
-        return {
-            'club_info': club_info,
-            'club_info_links': club_info.find_all('a'),
-            'equipment': soup.find_all('table')[5]
-        }
+        return schemas.CLUB(make_tree(request))
     
     # --- Avatar ---
 
@@ -89,11 +78,8 @@ class Club(Best11):
     def avatar(self):
         """ Returns the link to a club's avatar.
         r-type: str """
-        request = self.session.request("GET", "vizualizare_club.php?", params=self.params)
-        soup = make_soup(request)
-
-        # Grab avatar link from soup and replace spaces to make working link
-        avatar = soup.find_all('table')[1].find_all('tr')[2].find('img').get('src').replace(' ', '%20')
+        # Grab avatar link and replace spaces to make working link
+        avatar = self.fields['avatar'].replace(' ', '%20')
 
         # If avatar is the defualt img
         if '/standard.jpg' in avatar:
@@ -122,13 +108,13 @@ class Club(Best11):
         placed slightly differently. So it is useful to know for getting information
         from the page. 
         r-type: str """
-        return True if len(self.soup_dict['club_info_links']) == 3 else False
+        return True if len(self.fields['info_links']) == 3 else False
 
     @property
     def manager(self):
         """ Returns a club's manager. 
         r-type: str """
-        manager = self.soup_dict['club_info_links'][0].text
+        manager = self.fields['info_links'][0][0]
         if not manager:
             raise Exception("Could not get manager.")
         return manager
@@ -148,14 +134,14 @@ class Club(Best11):
         """ Returns a club's name e.g. Noworry About MJ.
         r-type: str """
         i = 0 if self.status == "bot" else 1 # location of element changes depending on club status
-        return self.soup_dict['club_info'].find_all('font')[i].text
+        return self.fields['info_fonts'][i]
 
     @property
     def country(self):
         """ Returns the manager's (and therefore club's) nationality.
         r-type: str """
         i = 1 if self.status in ('bot', 'user', 'corrupt') else 3
-        return self.soup_dict['club_info_links'][i].text
+        return self.fields['info_links'][i][0]
 
     @property
     def league_id(self):
@@ -163,9 +149,9 @@ class Club(Best11):
         r-type: int """
         i = 2 if self.status in ('bot', 'user', 'corrupt') else 4
         # Get link that goes to club's current league
-        link = self.soup_dict['club_info_links'][i]
+        _, href = self.fields['info_links'][i]
         # Get league_id from this link
-        league_id = util.get_id_from_href(link.get('href'))
+        league_id = util.get_id_from_href(href)
         return league_id
 
     @property
@@ -173,7 +159,7 @@ class Club(Best11):
         """ Returns a club's fame.
         r-type: int """
         if self.status == "bot": return False
-        fame = self.soup_dict['club_info'].find('b').text[:-1]
+        fame = self.fields['fame'][:-1]
         return int(fame)
 
     @property
@@ -201,29 +187,26 @@ class Club(Best11):
         """ Returns a club's stadium capacity if > DEFAULT, which is 10,000
         If it is default, return False. 
         r-type: int (or False if == 10,000)"""
-        element = self.soup.find_all('table')[8].find('tr').find_all('td')[1].find('b').text
-        capacity = int(element.replace('.', ''))
+        capacity = self.fields['stadium_capacity']
         return 'DEFAULT' if capacity == 10000 else capacity 
 
     @property
     def team_kit(self):
         """ Returns the images used to make up the club's team kit.
         r-type: tuple """
-        soup = self.soup_dict['equipment']
-        results = soup.find_all('img', attrs={'src': re.compile("echipament")})
+        results = self.fields['team_kit']
         if len(results) != 2: 
             raise Exception(f"Invalid number for kit: {len(results)}. Should be 2")
-        return tuple(i.get('src') for i in results)
+        return results
 
     @property
     def sponsors(self):
         """ Returns the names of the club's sponsors 
         r-type: tuple"""
-        soup = self.soup_dict['equipment']
-        results = soup.find_all('img', attrs={'src': re.compile("sponsori")})
+        results = self.fields['sponsors']
 
         pattern_to_split_sponsor_link = r"(\w+).gif$"
-        sponsors = tuple([x.title() for x in [re.findall(pattern_to_split_sponsor_link, i.get('src')).pop() for i in results]])
+        sponsors = tuple([x.title() for x in [re.findall(pattern_to_split_sponsor_link, i).pop() for i in results]])
         if len(results) != 2:
             raise Exception(f"Invalid number of sponsors: {len(results)}. Should be 2")
         return sponsors
@@ -235,7 +218,7 @@ class Club(Best11):
         """ Returns a club's motto if it has one.
         If the motto is '...', or nothing, return False.
         Note that bot clubs still have a motto so BOT clubs won't break this code. """
-        motto = self.soup.find('table').find_all('tr')[1].find('i').text
+        motto = self.fields['motto']
         if motto == "..." or not motto: 
             return False
         return motto
@@ -272,7 +255,7 @@ class Club(Best11):
     @property
     def objective(self):
         """ Returns the club's objective. """
-        return self.soup.find_all('table')[12].find_all('tr')[1].find('td').text.strip()
+        return self.fields['objective']
 
     @objective.setter
     def objective(self, value):
@@ -306,10 +289,7 @@ class Club(Best11):
         Returns the club's position within the wealth_100
         r-type: int (or False if outside wealth_100)
         """
-        for rank, club_id in self.wealth_100.items():
-            if self.club_id == club_id:
-                return int(rank)
-        return False
+        return self.wealth_ranks.get(self.club_id, False)
 
     # --- Properties Dict ---
 
@@ -392,10 +372,9 @@ class Club(Best11):
             this is the only way to grab this information, without navigating to the create message page,
             iterating through the ids to send to and breaking at the name of the user (you can
             send a message to yourself using your own id), which obviously takes much longer. """
-            input_tag = self.soup.find('input', attrs={'name': 'user'})
-            msg_id = int(input_tag.get('value'))
+            msg_id = self.fields['user_msg_id']
         else:
-            msg_href = self.soup_dict['club_info'].find_all('a')[1].get('href')
+            _, msg_href = self.fields['info_links'][1]
             msg_id = int(re.findall(r"catre=(\d{1,8})", msg_href)[0])
         return msg_id
 
@@ -527,91 +506,98 @@ class Club(Best11):
         """
         player_ids = self.get_home_player_ids(recent)
 
-        try:
-            result = dict(sorted(Counter([f"{Player(i).talent}*" for i in player_ids]).items()))
-        except:
-            # Occasional error whereby one or more player_ids cannot be found.
-            # In this case, the player is skipped in a standard for loop, since the info can't be retrieved.
-            player_talents = []
-            for player_id in player_ids:
-                try:
-                    player = Player(player_id)
-                    player_talents.append(f"{player.talent}*")
-                except:
-                    pass
-            result = dict(sorted(Counter(player_talents).items()))
-        finally:
-            return result
+        # Occasionally one or more player_ids cannot be found.
+        # These players are skipped, since the info can't be retrieved.
+        players = PlayerRepository(self.context).load_many(player_ids, fields=('salary', 'skill'))
+        return dict(sorted(Counter([f"{i.talent}*" for i in players]).items()))
             
     # --- Objects ---
     @property  
     def player_objects(self):
-        """ Returns a player object for each player owned by the club. """
-        pass
-        return [Player(p) for p in self.player_ids]
+        """ Returns a player object for each player owned by the club. Players' pages are requested concurrently. """
+        batch = PlayerRepository(self.context).load_many(self.player_ids)
+        batch.report_errors()
+        return batch.players
+
+    async def load_player_objects(self, max_concurrency=None):
+        """ Async variant of player_objects. """
+        batch = await PlayerRepository(self.context, max_concurrency).load_many_async(self.player_ids)
+        batch.report_errors()
+        return batch.players
 
 
 class UserClub(Club):
 
-    def __init__(self):
+    def __init__(self, context=None):
         
         # Get the user's club_id
-        club_id = Best11().get_user_club_id()
+        club_id = Best11(context).get_user_club_id()
 
         # Initialise a Club object with user's club_id
-        super().__init__(club_id)
+        super().__init__(club_id, context=context)
                 
     @property
-    def tables(self):
+    def club_page(self):
         """
-        Returns the soup for the club.php which contains
+        Returns the fields of club.php, which contains
         extra info about the user's club.
 
         NOTE: I turned this from method used in __init__ to property
         so that it remains constantly updated
         """
         response = self.session.request("GET", "club.php?")
-        tables = make_soup(response).find_all('table')
-        return tables
+        return schemas.USER_CLUB(make_tree(response))
 
     @property
     def cash_balance(self):
         """ Returns the user's cash_balance. r-type: int. """
-        value = self.tables[20].find_all('td')[1].text
-        return self.get_value_from_string(value)
+        return self.club_page['credits']
 
     @property
     def tp_balance(self):
         """ Returns the user's tp_balance. r-type: int. """
-        value = self.tables[22].find_all('td')[1].text
-        return self.get_value_from_string(value)
+        return self.club_page['tp']
 
     @property
     def fans(self):
         """ Returns the number of fans you have. r-type: int """
-        value = self.tables[10].find('b').text
-        return int(value)
+        return self.club_page['fans']
 
     @property
     def fans_mood(self):
         """ Returns the mood of your ciub's fans. r-type: int. """
-        text = self.tables[10].find('a').get('onmouseover')
-        value = re.findall(r"\d{1,3}%", text)[0][:-1] # [:-1] gets rid of the %
-        return int(value)
+        return self.club_page['fans_mood']
         
     @property
     def pitch_quality(self):
         """ Returns the condition of your pitch out of 100. r-type: int. """
-        value = self.tables[8].find_all('b')[-1].text[:-1]
-        return int(value)
+        return self.club_page['pitch_quality']
 
     @property
     def player_objs(self):
         """ 
         Returns a player object for each player owned by the club. r-type: list
+        Players' pages (and profile pages) are requested concurrently.
         NOTE: overrides parent method.
         """
-        return [UserPlayer(p) for p in self.player_ids]
+        return self.get_player_objs()
+
+    def get_player_objs(self, fields=None):
+        """
+        Returns a player object for each player owned by the club. r-type: list
+        Parameters:
+            fields (iterable) - the fields which will be used (default: every field, which are only fresh for an hour).
+                Only the pages whose stored fields are stale are requested (see PlayerRepository.load_many)
+        """
+        batch = PlayerRepository(self.context).load_many(self.player_ids, user=True, fields=fields)
+        batch.report_errors()
+        return batch.players
+
+    async def load_player_objs(self, max_concurrency=None, fields=None):
+        """ Async variant of get_player_objs. """
+        batch = await PlayerRepository(self.context, max_concurrency).load_many_async(self.player_ids, user=True, fields=fields)
+        batch.report_errors()
+        return batch.players
 
 
 if __name__ == "__main__":
@@ -97,7 +97,7 @@ class UserSettings(ConfigParser):
             self['user_details']['password'] = password_input
 
         # Finally, delete the session file if one exists
-        for filename in glob.glob("session_files/www.best11*.bat"):
+        for filename in glob.glob("session_files/www.best11*_session.json"):
             os.remove(filename) 
         return True
 
@@ -0,0 +1,107 @@
+"""
+    The application context.
+    Holds the objects shared by the whole program (session, user club, game clock, player store and history)
+    and only creates them when they are first used. This way, starting the program
+    or importing a module does not make any requests.
+
+    It also owns the reference datasets (active managers, wealth 100, peer averages),
+    so that their files are checked for freshness once per run and only decoded
+    again when they change (see reference.py), rather than every time a Player or Club is created.
+"""
+
+from functools import cached_property
+import time
+
+import pendulum
+
+# Local imports
+from session import Session
+from reference import ReferenceData
+from clock import GameClock
+import util
+
+
+class AppContext():
+    """ Lazily creates and holds the objects shared across the program. """
+
+    def __init__(self, session=None):
+        # A session may be given (e.g. for testing). Otherwise it is loaded on first use
+        if session is not None:
+            self.session = session
+
+        # When each file checked this run is next due a check {file_name: time.monotonic()}
+        self.checked_files = {}
+
+        # The reference datasets {file_name: ReferenceData}
+        self.datasets = {}
+
+    def __repr__(self):
+        loaded = [k for k in ('session', 'user_club', 'clock', 'player_store', 'player_history') if k in self.__dict__]
+        return f"{self.__class__.__name__} (loaded: {loaded})"
+
+    @cached_property
+    def session(self):
+        """ The logged in Session. Loaded from file or logged in on first use. """
+        return Session.load_session()
+
+    @cached_property
+    def user_club(self):
+        """ The user's club. r-type: UserClub """
+        # Imported here since club depends on this module (via spider)
+        from club import UserClub
+        return UserClub(context=self)
+
+    @cached_property
+    def clock(self):
+        """ The season, week and next match, cached until they next change. r-type: GameClock """
+        return GameClock(self)
+
+    @property
+    def next_match(self):
+        """ The datetime of the user's next match. r-type: pendulum.DateTime """
+        return self.clock.next_match
+
+    @cached_property
+    def player_store(self):
+        """ The players fetched in previous runs. r-type: PlayerStore """
+        # Imported here since store depends on this module (via player)
+        from store import PlayerStore
+        return PlayerStore()
+
+    @cached_property
+    def player_history(self):
+        """ The history of the players fetched. r-type: PlayerHistory """
+        from history import PlayerHistory
+        return PlayerHistory()
+
+    # --- Reference datasets ---
+
+    def ensure_updated(self, file_name, func, **time_ago):
+        """
+        Updates a json file via util.apply_update_timeago,
+        but only checks each file again once it could have gone stale
+        (i.e. once per run, unless the run outlives the file's time_ago, as a long bidding loop can).
+        r-type: bool - True if the file was checked
+        """
+        if time.monotonic() < self.checked_files.get(file_name, 0):
+            return False
+
+        # If the file is rewritten, its dataset notices the new modification time
+        util.apply_update_timeago(file_name, func, **time_ago)
+        remaining = pendulum.duration(**time_ago).total_seconds() - util.get_modified_ago(file_name).total_seconds()
+        self.checked_files[file_name] = time.monotonic() + max(remaining, 0)
+        return True
+
+    def dataset(self, file_name):
+        """ Returns the dataset of a json file. r-type: ReferenceData """
+        if file_name not in self.datasets:
+            self.datasets[file_name] = ReferenceData(file_name)
+        return self.datasets[file_name]
+
+    def load_dataset(self, file_name):
+        """ Returns the content of a json file, which is only decoded again if the file changes. """
+        return self.dataset(file_name).content
+
+
+# The context used by default across the program
+CONTEXT = AppContext()
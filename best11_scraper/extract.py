@@ -0,0 +1,166 @@
+"""
+    Extraction of fields from pages with precompiled lxml XPath expressions.
+
+    Rather than building a BeautifulSoup tree and walking it in Python for every field,
+    a page is parsed once with lxml (see session.make_tree), and each field is pulled out
+    by an XPath expression compiled once per program, and converted to a plain Python value.
+    The page types themselves are declared as Schemas in schemas.py.
+
+    e.g.
+        PAGE = Extractor(
+            age=Field("string((//table)[7]/descendant::b[1])", integer),
+            skills=Field("(//table)[17]/descendant::tr[2]/descendant::td[1]/text()", decimal, many=True)
+        )
+        PAGE(make_tree(response)) -> {'age': 21, 'skills': (80.5,)}
+"""
+
+import copy
+import re
+
+from lxml import etree
+
+
+# --- Converters ---
+
+def strip(value):
+    """ Returns the text of a node (or string), stripped. r-type: str """
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        value = value.text_content()
+    return value.strip()
+
+def integer(value):
+    return int(strip(value))
+
+def decimal(value):
+    return float(strip(value))
+
+def optional(convert):
+    """
+    Returns a converter which returns None for an empty value (e.g. a missing cell),
+    rather than letting convert raise and fail every other field of the page.
+    """
+    return lambda value: convert(value) if strip(value) else None
+
+def regex(pattern, cast=str, findall=False):
+    """
+    Returns a converter which applies a regex to a string.
+    Returns the first group of the first match (None if there's no match), or of every match if findall.
+    """
+    compiled = re.compile(pattern)
+    if findall:
+        return lambda value: tuple(cast(i) for i in compiled.findall(strip(value)))
+    def convert(value):
+        matches = compiled.findall(strip(value))
+        return cast(matches[0]) if matches else None
+    return convert
+
+def each(convert):
+    """ Returns a converter which applies convert to each of many results. r-type: tuple """
+    return lambda values: tuple(convert(i) for i in values)
+
+
+# --- Fields ---
+
+class Field():
+    """ A single value on a page, found with a precompiled XPath expression. """
+
+    def __init__(self, path, convert=strip, many=False, table=None):
+        """
+        Parameters:
+            path (str) - XPath expression (relative to the node the field is extracted from)
+            convert (callable) - converts the result to a Python value (None to return it as is)
+            many (bool) - if False, only the first result of a node-set is converted
+            table (int or tuple) - for fields of a Schema, the index of the table (or tables)
+                on the page which the path is relative to. None for the whole page.
+        """
+        self.path = path
+        self.xpath = etree.XPath(path, smart_strings=False)
+        self.convert = convert
+        self.many = many
+        self.table = table
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} ({self.path}, table: {self.table})"
+
+    def __call__(self, *nodes):
+        """ Extracts the field from a node. The results from several nodes are concatenated. """
+        if len(nodes) == 1:
+            result = self.xpath(nodes[0])
+        else:
+            result = [i for node in nodes for i in self.xpath(node)]
+        if isinstance(result, list) and not self.many:
+            result = result[0] if result else None
+        return self.convert(result) if self.convert else result
+
+    def shifted(self, shift):
+        """ Returns a copy of the field, <shift> tables further down the page. """
+        field = copy.copy(self)
+        if isinstance(self.table, int):
+            field.table = self.table + shift
+        elif self.table is not None:
+            field.table = tuple(i + shift for i in self.table)
+        return field
+
+
+class Extractor():
+    """ A set of named fields, which are pulled out of a page together. """
+
+    def __init__(self, **fields):
+        self.fields = fields
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} (fields: {list(self.fields)})"
+
+    def __call__(self, node, *names):
+        """ Returns {name: value} for the given fields (default: every field). r-type: dict """
+        return {name: self.fields[name](node) for name in (names or self.fields)}
+
+    def get(self, node, name):
+        """ Returns the value of a single field. """
+        return self.fields[name](node)
+
+
+class Schema(Extractor):
+    """
+    A type of page, declared as a set of named fields, most of which are relative to a table.
+    The tables of a page are found in a single pass over the document; each field is then
+    only a short XPath from its table, rather than a walk from the top of the document.
+    """
+
+    # Every table on the page, in document order (the same as soup.find_all('table'))
+    find_tables = etree.XPath('//table')
+
+    def __init__(self, name, **fields):
+        super().__init__(**fields)
+        self.name = name
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} ({self.name}, fields: {list(self.fields)})"
+
+    def __call__(self, tree, *names):
+        """ Returns {name: value} for the given fields (default: every field). r-type: dict """
+        fields = {name: self.fields[name] for name in (names or self.fields)}
+        # The tables are only found if one of the fields needs them
+        tables = self.find_tables(tree) if any(i.table is not None for i in fields.values()) else None
+        return {name: self.__extract(field, tree, tables) for name, field in fields.items()}
+
+    def get(self, tree, name):
+        """ Returns the value of a single field, without extracting the others. """
+        return self(tree, name)[name]
+
+    @staticmethod
+    def __extract(field, tree, tables):
+        if field.table is None:
+            return field(tree)
+        if isinstance(field.table, int):
+            return field(tables[field.table])
+        return field(*[tables[i] for i in field.table])
+
+    def shifted(self, name, shift, keep=()):
+        """
+        Returns a copy of the schema for a layout in which the tables are <shift> further down the page
+        (except those of the fields in keep).
+        """
+        return Schema(name, **{k: (v if k in keep else v.shifted(shift)) for k, v in self.fields.items()})
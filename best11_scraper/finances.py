@@ -8,15 +8,16 @@ import re
 
 # Local imports
 from spider import Best11
-from session import make_soup
+from session import make_tree
+import schemas
 
 class Finances(Best11):
 
     finance_subpage = 'finante.php'
     entries_per_page = 15
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, context=None):
+        super().__init__(context)
         
         self.total_pages, self.entries_on_last_page = self.__get_last_page_info()
 
@@ -60,13 +61,13 @@ class Finances(Best11):
         
         r-type: dict
         """
-        # Get the £ amount of each entry
-        amount = entry.find_all('td')[0].text 
-        # Convert to valid number
+        amount, area = entry
+
+        # Convert the £ amount of each entry to valid number
         amount = self.get_value_from_string(amount)
 
         # What is the type of entry? (e.g. club sales)
-        area = entry.find_all('td')[1].get_text().strip()[:-1]
+        area = area[:-1]
 
         # Print data whilst iterating through
         print(f'{amount:16.3f} ({area}) [ID: {entry_id}]')
@@ -93,8 +94,7 @@ class Finances(Best11):
             suburl=self.finance_subpage,
             params={'nr_pag': str(page_num)} # Arbitrary big number. Because we just want to go the last page
         )
-        soup = make_soup(request)
-        finance_table = soup.find_all('table', attrs={'width':300})[1].find_all('tr')[:-1]
+        finance_table = list(schemas.FINANCES.get(make_tree(request), 'entries'))
 
         page_entries = [self.__get_entry(entry=finance_table.pop(), entry_id=entry_id+i) for i in range(0, entries_num)]
         
@@ -107,15 +107,13 @@ class Finances(Best11):
             suburl=self.finance_subpage,
             params={'nr_pag': str(10**5)} # Arbitrary big number. Because we just want to go the last page
         )
-        soup = make_soup(request)
-        finance_table = soup.find_all('table', attrs={'width':300})[1]
+        fields = schemas.FINANCES(make_tree(request), 'page_back', 'rows')
         
         # Get page num
-        page_back = finance_table.find('a', attrs={'href': re.compile(r"finante.php\?nr_pag=(\d+)$")}).get('href')
-        page_num = int(re.findall(r"\d+$", page_back)[0]) + 1
+        page_num = int(re.findall(r"\d+$", fields['page_back'])[0]) + 1
 
         # Get num entries on last page
-        last_page_entries = len(finance_table.find_all('tr'))-1
+        last_page_entries = fields['rows']-1
 
         return page_num, last_page_entries
 
@@ -0,0 +1,166 @@
+"""
+    A table of players, stored column-wise in NumPy arrays.
+
+    Filtering a list of player objects calls a property per player per condition.
+    A PlayerFrame copies the fields of each player's snapshot into one array per column once,
+    so that filters, sorts and derived columns (e.g. talent, peer advantage)
+    are vectorised across every player at once.
+
+    e.g.
+        frame = PlayerFrame.from_players(players)
+        frame = frame[(frame['age'] <= 17) & (frame.talent >= 4)].sort('skill_total', reverse=True)
+        frame.players -> [Player, Player, ...]
+"""
+
+import numpy as np
+
+# Local imports
+from context import CONTEXT
+from player import Player, UserPlayer
+from spider import Best11
+
+
+def peer_average_table(peer_averages):
+    """
+    Returns the peer averages as a look up table of position x age (NaN if unknown).
+    Searches can only be made for ages 17 to 35.
+    """
+    table = np.full((len(Best11.player_positions), 36), np.nan)
+    for i, position in enumerate(Best11.player_positions):
+        for age, average in peer_averages.get(position, {}).items():
+            if average:
+                table[i, int(age)] = average
+    return table
+
+
+class PlayerFrame():
+    """ Players, one row each, with one array per column. """
+
+    # Columns with one value per player: (name, dtype)
+    scalar_columns = (
+        ('player_id', np.int64),
+        ('position', np.int8),     # Index of Best11.player_positions
+        ('age', np.int16),
+        ('energy', np.int16),
+        ('morale', np.int8),
+        ('salary', np.float64),
+        ('value', np.float64),
+        ('exp', np.int16),
+        ('listed', np.bool_),
+    )
+
+    # Columns with several values per player: (name, width)
+    vector_columns = (
+        ('skill', 3),
+        ('potential', 3),   # NaN unless the player is the user's
+        ('fixed', 5),
+    )
+
+    def __init__(self, columns, players, context=None):
+        """
+        Parameters:
+            columns (dict) - {name: array}, every array with one row per player
+            players (list) - the player objects, in the same order as the rows
+        """
+        self.columns = columns
+        self.players = list(players)
+        self.context = context if context else CONTEXT
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} (rows: {len(self)})"
+
+    def __len__(self):
+        return len(self.players)
+
+    def __getitem__(self, key):
+        """
+        frame['age'] -> the age column
+        frame[mask] (or indices) -> a new frame of the selected rows
+        """
+        if isinstance(key, str):
+            if key in self.columns:
+                return self.columns[key]
+            # Derived columns
+            return getattr(self, key)
+        indices = np.flatnonzero(key) if np.asarray(key).dtype == np.bool_ else np.asarray(key, dtype=np.intp)
+        return PlayerFrame(
+            {name: column[indices] for name, column in self.columns.items()},
+            [self.players[i] for i in indices],
+            self.context
+        )
+
+    @classmethod
+    def from_players(cls, players, context=None):
+        """ Builds a frame from player objects, reading each player's snapshot once. r-type: PlayerFrame """
+        players = list(players)
+        n = len(players)
+        columns = {name: np.zeros(n, dtype=dtype) for name, dtype in cls.scalar_columns}
+        columns.update({name: np.zeros((n, width), dtype=np.float64) for name, width in cls.vector_columns})
+        columns['potential'][:] = np.nan
+
+        for row, player in enumerate(players):
+            snapshot = player.snapshot
+            columns['player_id'][row] = snapshot.player_id
+            columns['position'][row] = Best11.player_positions.index(snapshot.position)
+            for name in ('age', 'energy', 'morale', 'salary', 'value', 'exp', 'listed'):
+                columns[name][row] = getattr(snapshot, name)
+            columns['skill'][row] = snapshot.skill
+            columns['fixed'][row] = snapshot.fixed
+            if isinstance(player, UserPlayer):
+                columns['potential'][row] = player.potential
+
+        return cls(columns, players, context)
+
+    # --- Derived columns ---
+
+    @property
+    def skill_total(self):
+        """ e.g. 80-75-72 -> 227 """
+        return self.columns['skill'].sum(axis=1)
+
+    @property
+    def potential_total(self):
+        return self.columns['potential'].sum(axis=1)
+
+    @property
+    def trainable(self):
+        """ Whether each skill can be trained (i.e. is below its potential). One row of 3 per player """
+        return self.columns['skill'] != self.columns['potential']
+
+    @property
+    def talent(self):
+        """ The talent (1 to 5) of each player, by the same rough formula as Player.talent """
+        bands = np.asarray(Player.talent_bands)
+        determiner = self.columns['salary'] / self.skill_total
+        return np.abs(determiner[:, None] - bands).argmin(axis=1) + 1
+
+    @property
+    def peer_average(self):
+        """ The peer average skill total for each player's position and age (NaN if unknown) """
+        table = self.context.dataset(Player.fn_peer_averages).view(peer_average_table)
+
+        ages = self.columns['age']
+        valid = (ages >= 17) & (ages <= 35)
+        averages = np.full(len(self), np.nan)
+        averages[valid] = table[self.columns['position'][valid], ages[valid]]
+        return averages
+
+    @property
+    def peer_advantage(self):
+        """ Each player's skill total relative to their peer average (NaN if unknown) """
+        return self.skill_total - self.peer_average
+
+    # --- Operations ---
+
+    def filter(self, mask):
+        """ Returns a new frame of the rows where mask is True. r-type: PlayerFrame """
+        return self[np.asarray(mask, dtype=np.bool_)]
+
+    def sort(self, column, reverse=False):
+        """ Returns a new frame sorted by a column (which may be derived). r-type: PlayerFrame """
+        order = np.argsort(self[column], kind='stable')
+        return self[order[::-1] if reverse else order]
+
+    def players_where(self, mask):
+        """ Returns the player objects of the rows where mask is True. r-type: list """
+        return [self.players[i] for i in np.flatnonzero(mask)]
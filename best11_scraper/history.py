@@ -0,0 +1,252 @@
+"""
+    Append-only history of players' skill, energy, morale, exp and value.
+
+    Every time a player's page is fetched, a record is appended to a binary log,
+    unless nothing tracked has changed since their last one.
+    Records are fixed width, so the log can be memory mapped and read as a NumPy array without parsing.
+    To keep them small, each record holds the change since the same player's previous record,
+    except keyframes, which hold the absolute values: a player's first record and every KEYFRAME_INTERVAL-th after it.
+    Reading the log turns the changes back into absolute values with one cumulative sum per column,
+    restarted at each keyframe, so a bad record (e.g. from a crash, or another writer) only spoils the values up to the next keyframe.
+    Records are selected by player on the memory map before anything is decoded.
+
+    e.g.
+        history = PlayerHistory()
+        history.append(snapshots, season=31)
+        rows = history.query(player_ids=squad_ids, seasons=range(29, 32))
+        rows['skill'] -> array of (skill 1, skill 2, skill 3) for each record, as it was at rows['time']
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+
+# Skills have one decimal place and values three (see Best11.get_value_from_string),
+# so are stored as integers of tenths and thousandths
+SCALE = {'skill': 10, 'value': 1000}
+
+# A record of the log
+RECORD = np.dtype([
+    ('player_id', '<u4'),
+    ('time', '<u4'),        # Unix time of the fetch
+    ('season', '<u2'),
+    ('flags', 'u1'),
+    ('morale', 'i1'),
+    ('skill', '<i2', (3,)), # In tenths
+    ('energy', '<i2'),
+    ('exp', '<i2'),
+    ('value', '<i4'),       # In thousandths
+])
+
+# Flags
+KEYFRAME = 1    # The record holds absolute values, rather than the change since the player's previous record
+
+# A player's records are written as a keyframe at least this often
+KEYFRAME_INTERVAL = 32
+
+# The tracked columns, which are delta encoded
+TRACKED = ('skill', 'energy', 'morale', 'exp', 'value')
+
+# The log starts with a header: its magic string and the size of a record
+MAGIC = b'B11HIST1'
+HEADER = np.dtype([('magic', 'S8'), ('record_size', '<u8')])
+
+
+def encode(snapshot):
+    """ Returns the tracked values of a snapshot, as they are stored. r-type: dict """
+    return {
+        'skill': np.rint(np.asarray(snapshot.skill, dtype=np.float64) * SCALE['skill']).astype(np.int64),
+        'energy': int(snapshot.energy),
+        'morale': int(snapshot.morale),
+        'exp': int(snapshot.exp),
+        'value': int(round(snapshot.value * SCALE['value'])),
+    }
+
+
+def as_ids(player_ids):
+    """ r-type: np.ndarray of int64 """
+    return np.fromiter((int(i) for i in player_ids), dtype=np.int64)
+
+
+def decode(records):
+    """
+    Turns records back into absolute values, ordered by player then time.
+    Each keyframe (or a player's first record) restarts the cumulative sums.
+    r-type: structured array, with the same fields as RECORD except flags (skill and value as floats)
+    """
+    order = np.argsort(records['player_id'], kind='stable')
+    records = records[order]
+
+    new_player = np.diff(records['player_id'].astype(np.int64), prepend=-1) != 0
+    starts = np.flatnonzero(new_player | (records['flags'] & KEYFRAME != 0))
+    lengths = np.diff(np.r_[starts, len(records)])
+
+    dtype = [(name, np.float64 if name in SCALE else RECORD[name].base, RECORD[name].shape) for name in RECORD.names if name != 'flags']
+    result = np.zeros(len(records), dtype=dtype)
+    for name in ('player_id', 'time', 'season'):
+        result[name] = records[name]
+
+    for name in TRACKED:
+        # Cumulative sum of the changes, restarted at each keyframe
+        totals = np.cumsum(records[name].astype(np.int64), axis=0)
+        before = np.zeros((len(starts), *totals.shape[1:]), dtype=np.int64)
+        before[1:] = totals[starts[1:] - 1]
+        values = totals - np.repeat(before, lengths, axis=0)
+        result[name] = values / SCALE[name] if name in SCALE else values
+    return result
+
+
+class PlayerHistory():
+    """ The append-only history log, with a memory mapped reader. """
+
+    # Files
+    fn_history = "session_files/player_history.bin"
+
+    def __init__(self, file_name=None):
+        self.file_name = file_name if file_name else self.fn_history
+        self.lock = threading.Lock()
+
+        if not os.path.exists(self.file_name) or not os.path.getsize(self.file_name):
+            with open(self.file_name, 'wb') as f:
+                f.write(np.array((MAGIC, RECORD.itemsize), dtype=HEADER).tobytes())
+        self.__check_header()
+        self.__repair()
+
+        # The latest absolute values of players appended to {player_id: encoded values}, for delta encoding.
+        # Only decoded from the log for the players being appended, the first time they are
+        self.latest = {}
+        # The number of records since each player's last keyframe {player_id: int}
+        self.since_keyframe = {}
+        # The number of records in the log when self.latest was last in sync with it
+        self.synced = len(self)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} (file: {self.file_name}, records: {len(self)})"
+
+    def __len__(self):
+        return (os.path.getsize(self.file_name) - HEADER.itemsize) // RECORD.itemsize
+
+    def __check_header(self):
+        header = np.fromfile(self.file_name, dtype=HEADER, count=1)[0]
+        if header['magic'] != MAGIC or header['record_size'] != RECORD.itemsize:
+            raise Exception(f"{self.file_name} is not a player history log (or was written by another version)")
+
+    def __repair(self):
+        """ Drops a torn record from the end of the log (e.g. if a write was interrupted), so that appends stay aligned. """
+        size = os.path.getsize(self.file_name)
+        if (torn := (size - HEADER.itemsize) % RECORD.itemsize):
+            os.truncate(self.file_name, size - torn)
+
+    # --- Reading ---
+
+    def records(self):
+        """ Returns the raw (delta encoded) records, memory mapped. r-type: np.memmap (of RECORD) """
+        if not len(self):
+            return np.zeros(0, dtype=RECORD)
+        return np.memmap(self.file_name, dtype=RECORD, mode='r', offset=HEADER.itemsize, shape=(len(self),))
+
+    def read(self, player_ids=None):
+        """
+        Returns the records (default: every record) of the given players with absolute values, ordered by player then time.
+        r-type: structured array, with the same fields as RECORD except flags (skill and value as floats)
+        """
+        records = self.records()
+        if player_ids is not None:
+            # Selected on the memory map, so only these players' records are read and decoded
+            records = records[np.isin(records['player_id'], as_ids(player_ids))]
+        return decode(records)
+
+    def query(self, player_ids=None, since=None, seasons=None):
+        """
+        Returns the records (with absolute values) of the given players, ordered by player then time.
+        Parameters:
+            player_ids (iterable) - default: every player
+            since (float) - only records from this unix time
+            seasons (iterable) - only records from these seasons
+        """
+        rows = self.read(player_ids)
+        mask = np.ones(len(rows), dtype=np.bool_)
+        if since is not None:
+            mask &= rows['time'] >= since
+        if seasons is not None:
+            mask &= np.isin(rows['season'], np.fromiter(seasons, dtype=np.int64))
+        return rows[mask]
+
+    def __load_latest(self, player_ids):
+        """ Decodes the latest values of the given players (those not already known) from the log. """
+        if not (missing := [i for i in player_ids if i not in self.latest]):
+            return
+        records = self.records()
+        records = records[np.isin(records['player_id'], as_ids(missing))]
+        if not len(records):
+            return
+        rows = decode(records)
+        # In the same order as the decoded rows
+        keyframes = records['flags'][np.argsort(records['player_id'], kind='stable')] & KEYFRAME != 0
+
+        # Rows are ordered by player then time, so the last of each player is their latest
+        ends = np.flatnonzero(np.r_[rows['player_id'][1:] != rows['player_id'][:-1], True])
+        for start, end in zip(np.r_[0, ends[:-1] + 1], ends):
+            row = rows[end]
+            player_id = int(row['player_id'])
+            self.latest[player_id] = {
+                'skill': np.rint(row['skill'] * SCALE['skill']).astype(np.int64),
+                'value': int(round(row['value'] * SCALE['value'])),
+                **{name: int(row[name]) for name in ('energy', 'morale', 'exp')}
+            }
+            # A player's first record counts as a keyframe, even if it isn't flagged as one
+            last_keyframe = start + np.flatnonzero(np.r_[True, keyframes[start + 1:end + 1]])[-1]
+            self.since_keyframe[player_id] = int(end - last_keyframe)
+
+    # --- Writing ---
+
+    def append(self, snapshots, season=0, now=None):
+        """
+        Appends a record for each snapshot whose tracked values have changed.
+        r-type: int - the number of records appended
+        """
+        now = int(now if now is not None else time.time())
+        snapshots = list(snapshots)
+        with self.lock:
+            self.__repair()
+            if len(self) != self.synced:
+                # Appended to by another writer, so the latest values must be decoded again
+                self.latest, self.since_keyframe = {}, {}
+            self.__load_latest({int(i.player_id) for i in snapshots})
+
+            # (player_id, flags, values to store)
+            entries = []
+            for snapshot in snapshots:
+                player_id = int(snapshot.player_id)
+                values = encode(snapshot)
+                previous = self.latest.get(player_id)
+                if previous is not None:
+                    changes = {name: values[name] - previous[name] for name in TRACKED}
+                    if not any(np.any(i) for i in changes.values()):
+                        # Nothing has changed
+                        continue
+                if previous is None or self.since_keyframe[player_id] + 1 >= KEYFRAME_INTERVAL:
+                    entries.append((player_id, KEYFRAME, values))
+                    self.since_keyframe[player_id] = 0
+                else:
+                    entries.append((player_id, 0, changes))
+                    self.since_keyframe[player_id] += 1
+                self.latest[player_id] = values
+
+            if entries:
+                records = np.zeros(len(entries), dtype=RECORD)
+                records['time'] = now
+                records['season'] = season
+                for i, (player_id, flags, values) in enumerate(entries):
+                    records[i]['player_id'] = player_id
+                    records[i]['flags'] = flags
+                    for name in TRACKED:
+                        records[i][name] = values[name]
+
+                with open(self.file_name, 'ab') as f:
+                    f.write(records.tobytes())
+            self.synced = len(self)
+        return len(entries)
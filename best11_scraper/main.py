@@ -5,6 +5,7 @@ from morale import MoraleBoost
 from training import Training, ExtraTraining
 from config import UserSettings
 from util import print_divider as print_d
+from metrics import METRICS
 import sys
 
 APP_NAME = "Best11Scraper"
@@ -12,9 +13,21 @@ __author__ = "callumEvans (github: punkgazer)"
 __version__ = 0.202
 
 USER_SETTINGS = UserSettings()
+
+# Where the request metrics of the last run are dumped
+fn_metrics = "session_files/metrics.json"
  
 
 def main():
+    try:
+        run_daily()
+    finally:
+        print_d("> Requests <")
+        print(METRICS.report())
+        METRICS.dump(fn_metrics)
+
+
+def run_daily():
     auto = Auto()
     
     if USER_SETTINGS.get('daily_bonus', 'on'):
@@ -1,8 +1,10 @@
 
 import re
+from functools import cached_property
 
 from spider import Best11
-from session import make_soup
+from session import make_tree
+import schemas
 import util
 
 class Match(Best11):
@@ -11,21 +13,20 @@ class Match(Best11):
 
     suburl_match = 'meci.php?'
 
-    def __init__(self, match_id):
-        super().__init__()
+    def __init__(self, match_id, context=None):
+        super().__init__(context)
         self.match_id = match_id
-        self.soup_dict = self.__get_matchpage_soup()
+        self.fields = self.__get_matchpage_fields()
 
     @property
     def params(self):
         """ Commonly used parameters for making requests. """
         return {'id': self.match_id}
 
-    def __get_matchpage_soup(self):
+    def __get_matchpage_fields(self):
         """ 
-        Gets the soup
+        Gets every field of the match's page, in a single pass
         Called by __init__ to avoid repeat calling
-        Divides soup up into commonly used sections
         r-type: dict
         """
 
@@ -35,24 +36,13 @@ class Match(Best11):
             suburl=self.suburl_match,
             params=self.params
         )
-        soup = make_soup(response)
+        fields = schemas.MATCH(make_tree(response))
 
         # -- Check that match has been played --
-        match_played = bool((table:= soup.find('table')).find('tr').find_all('td')[1].text == "Final Score")
-        if not match_played:
+        if not fields['played']:
             raise Exception("Match has not been played yet")
 
-        # -- Create soup dict for commonly used soup --
-        soup_dict = {
-            'table': table,
-            'game_events_table': soup.find_all('table')[2],
-        }
-        soup_dict['rows'] = soup_dict['table'].find_all('tr')[1:4]
-        soup_dict['attweath'] = soup_dict['game_events_table'].find_all('tr')[-2].text
-        soup_dict['sub_table'] = soup_dict['rows'][1].find('table')
-        soup_dict['home_stats'] = soup_dict['rows'][1].find('td')
-        soup_dict['away_stats'] = soup_dict['rows'][1].find_all('td')[-1]
-        return soup_dict
+        return fields
 
     @property
     def clubs(self):
@@ -61,11 +51,7 @@ class Match(Best11):
         r-type: tuple
         r-format: ('Solent City', 'LOUFC')
         """
-        row = self.soup_dict['rows'][0]
-        return tuple([
-            row.find_all('td')[0].text,
-            row.find_all('td')[-1].text
-        ])
+        return tuple(self.fields['clubs'])
 
     @staticmethod
     def __get_team_id_from_team_search(soup, club):
@@ -81,11 +67,11 @@ class Match(Best11):
                 return util.get_id_from_href(href)
             index += 1
 
-    @property
+    @cached_property
     def club_ids(self):
         """ 
         Returns the club ids for the two clubs.
-        Using the club_id_from_club method from the parent Best11 class
+        Using the club_id_from_club method from the parent Best11 class (looked up once per match)
         r-type: tuple
         r-format: (300, 416)
         """
@@ -98,9 +84,7 @@ class Match(Best11):
         r-type: tuple
         r-format: (1,2) -> a 1-2 loss for the home side
         """
-        row = self.soup_dict['rows'][0]
-        match_tds = row.find_all('td')[2:4]
-        scores = tuple(i.find('img').get('src') for i in match_tds)
+        scores = self.fields['score_imgs']
         return tuple(int(re.findall(r'\d{1,2}', i)[0]) for i in scores)
 
     @property
@@ -110,21 +94,21 @@ class Match(Best11):
         r-type: tuple containing two lists: one for home; one for away
         r-format: (['Pearce Reading', 'Roy Banks',...], ['Arthur Flitcroft,...])
         """
-        home_roster = [a.text.replace("\ufeff", "") for a in self.soup_dict['game_events_table'].find_all('tr')[-4].find_all('a')]
-        away_roster = [a.text.replace("\ufeff", "") for a in self.soup_dict['game_events_table'].find_all('tr')[-5].find_all('a')]
+        home_roster = [a.replace("\ufeff", "") for a in self.fields['home_teamsheet']]
+        away_roster = [a.replace("\ufeff", "") for a in self.fields['away_teamsheet']]
         return tuple([home_roster, away_roster])
 
     @property
     def attendance(self):
         """ Returns the match attendance. r-type: int """
         attendance_pattern = r"(\d{3,6}) spectators"
-        return int(re.findall(attendance_pattern, self.soup_dict['attweath'])[0])
+        return int(re.findall(attendance_pattern, self.fields['attweath'])[0])
 
     @property
     def weather(self):
         """ Returns the weather. r-type: str """
         weather_pattern = r"in this ([a-z\s]+) day"
-        return re.findall(weather_pattern, self.soup_dict['attweath'])[0]
+        return re.findall(weather_pattern, self.fields['attweath'])[0]
 
     @property
     def formations(self):
@@ -132,7 +116,7 @@ class Match(Best11):
         Returns the formations of each team. 
         r-format: ('5-4-1', '5-3-2')
         """
-        formations = tuple(re.findall(r"(\d-\d-\d)", str(self.soup_dict['game_events_table'])))
+        formations = tuple(re.findall(r"(\d-\d-\d)", self.fields['events']))
         return tuple(reversed(formations))
 
     @property
@@ -141,10 +125,7 @@ class Match(Best11):
         Returns the possession of each team. 
         r-format: (49, 51)
         """
-        row = self.soup_dict['rows'][1]
-        string = row.find_all('td')[1].text
-        possession_pattern = r"Possession:(\d{0,3})% - (\d{0,3})"
-        return tuple(int(i) for i in re.findall(possession_pattern, string)[0])
+        return self.fields['possession']
 
     @property
     def avg_age(self):
@@ -153,7 +134,7 @@ class Match(Best11):
         This is only recorded to nearest int. Hence ints are used, whereas mood and energy use floats
         r-format: (21.9, 26.6) 
         """
-        return tuple(float(i.text) for i in self.soup_dict['sub_table'].find_all('tr')[1].find_all('td')[1:])
+        return self.fields['avg_age']
 
     @property
     def avg_mood(self):
@@ -161,7 +142,7 @@ class Match(Best11):
         Returns the average mood of each team
         r-format: (89.5, 80.7)
         """
-        return tuple(float(i.text) for i in self.soup_dict['sub_table'].find_all('tr')[2].find_all('td')[1:])
+        return self.fields['avg_mood']
 
     @property
     def avg_energy(self):
@@ -169,7 +150,7 @@ class Match(Best11):
         Returns the average energy for each team
         r-format: (96.9, 100)
         """
-        return tuple(float(i.text) for i in self.soup_dict['sub_table'].find_all('tr')[3].find_all('td')[1:])
+        return self.fields['avg_energy']
     
 
     @property
@@ -189,8 +170,7 @@ class Match(Best11):
             results = {}
 
             indivstat_pattern = r"popup\('(.*)<br>\[<b>(\d{1,3}\.\d{2})"
-            for link in data:
-                tmp = link.get('onmouseover')
+            for tmp in data:
                 try:
                     player, performance = re.findall(indivstat_pattern, tmp)[0]
                     results[player] = round(float(performance),2)
@@ -201,7 +181,7 @@ class Match(Best11):
             return results
 
         # Call function above for both teams in the game. Return the result
-        return tuple(get_individual_stats(i.find_all('a')) for i in (self.soup_dict['home_stats'], self.soup_dict['away_stats']))
+        return tuple(get_individual_stats(i) for i in (self.fields['home_popups'], self.fields['away_popups']))
 
     @property 
     def collective_stats(self):
@@ -214,24 +194,25 @@ class Match(Best11):
 
         def get_collective_stats(data):
             """ 
-            Returns the collective stats given fonts
+            Returns the collective stats given the texts of fonts
             r-type: list of len 3
             """
             collective_stats_pattern = r"(\d{1,2})/20"
-            tmp = str(data.find_all('font'))
+            tmp = str(data)
             result = [int(i) for i in re.findall(collective_stats_pattern, tmp)]
             if len(result) != 3: 
                 raise Exception(f"Invalid collective stats: {result}")
             return result
 
         # Call function above for both teams in the game. Return the result
-        return tuple(get_collective_stats(i) for i in (self.soup_dict['home_stats'], self.soup_dict['away_stats']))
+        return tuple(get_collective_stats(i) for i in (self.fields['home_ratings'], self.fields['away_ratings']))
 
     @staticmethod
     def __get_scoresheet(home_or_away):
-        """ Returns a scoresheet given some td data """ 
-        players = [j.text.replace("'", "") for j in home_or_away.find_all('a')]
-        when_scored = [int(j.text[1:]) for j in home_or_away.find_all('b')]
+        """ Returns a scoresheet given the (scorers, minutes) of a td """ 
+        scorers, minutes = home_or_away
+        players = [j.replace("'", "") for j in scorers]
+        when_scored = [int(j[1:]) for j in minutes]
         results = {}
         for i in range(len(players)):
             if players[i] in results.keys():
@@ -243,7 +224,7 @@ class Match(Best11):
     @property
     def scoresheet(self):
         """ Returns the match's scoresheet. """
-        tds = self.soup_dict['table'].find_all('tr')[7].find_all('td')
+        tds = self.fields['scoresheet']
         home = self.__get_scoresheet(tds[0])
         away = self.__get_scoresheet(tds[-1]) if len(tds) == 2 else False
         return tuple([home, away])
@@ -0,0 +1,175 @@
+"""
+    Per-request metrics.
+
+    Session.request (and AsyncSession.request) record each request's page, method,
+    status, size, time waiting on the rate limiter and time on the network;
+    make_soup records the time spent parsing each response.
+    These are collected per page in the global METRICS registry, with a histogram
+    of network times, which can be printed as a report or dumped as JSON.
+"""
+
+import bisect
+import json
+import threading
+import time
+
+
+def page_of(suburl):
+    """ Returns the page of a suburl, e.g. 'profil.php?id=1' -> 'profil.php' """
+    return suburl.split('?')[0] if suburl else ''
+
+
+class PageStats():
+    """ Totals and a histogram of network times for the requests to a single page (and method). """
+
+    # Upper bounds (seconds) of the histogram's buckets. The last bucket has no upper bound.
+    buckets = (0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+    def __init__(self, page, method):
+        self.page = page
+        self.method = method
+
+        self.requests = 0       # Made over the network (or replayed)
+        self.cached = 0         # Served from the response cache
+        self.errors = 0
+        self.statuses = {}
+        self.bytes = 0
+        self.network_time = 0
+        self.wait_time = 0
+        self.parses = 0
+        self.parse_time = 0
+        self.histogram = [0] * (len(self.buckets) + 1)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} ({self.method} {self.page}, requests: {self.requests})"
+
+    def add_request(self, status, size, network_time, wait_time):
+        self.requests += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not status or status >= 400:
+            self.errors += 1
+        self.bytes += size
+        self.network_time += network_time
+        self.wait_time += wait_time
+        self.histogram[bisect.bisect_left(self.buckets, network_time)] += 1
+
+    def add_parse(self, parse_time):
+        self.parses += 1
+        self.parse_time += parse_time
+
+    def percentile(self, q):
+        """ Returns the upper bound of the bucket containing the q-th percentile network time (None if unbounded). """
+        if not self.requests:
+            return 0
+        target = q * self.requests
+        count = 0
+        for i, n in enumerate(self.histogram):
+            count += n
+            if count >= target:
+                return self.buckets[i] if i < len(self.buckets) else None
+        return None
+
+    def to_dict(self):
+        return {
+            'page': self.page,
+            'method': self.method,
+            'requests': self.requests,
+            'cached': self.cached,
+            'errors': self.errors,
+            'statuses': {str(k): v for k, v in self.statuses.items()},
+            'bytes': self.bytes,
+            'network_time': round(self.network_time, 4),
+            'wait_time': round(self.wait_time, 4),
+            'parses': self.parses,
+            'parse_time': round(self.parse_time, 4),
+            'histogram': dict(zip([str(i) for i in self.buckets] + ['inf'], self.histogram))
+        }
+
+
+class Metrics():
+    """ In-process registry of PageStats, keyed by (method, page). """
+
+    def __init__(self):
+        self.pages = {}
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} (pages: {len(self.pages)}, requests: {self.total('requests')})"
+
+    def __stats(self, method, suburl):
+        """ Returns the PageStats for a request (creating it if needed). Lock must be held. """
+        key = (method.upper(), page_of(suburl))
+        if not (stats := self.pages.get(key)):
+            stats = self.pages[key] = PageStats(key[1], key[0])
+        return stats
+
+    def record_request(self, method, suburl, status, size, network_time, wait_time=0):
+        """ Records a request which went over the network (or was replayed from a cassette). """
+        with self.lock:
+            self.__stats(method, suburl).add_request(status, size, network_time, wait_time)
+
+    def record_cached(self, method, suburl):
+        """ Records a request which was served from the response cache. """
+        with self.lock:
+            self.__stats(method, suburl).cached += 1
+
+    def record_parse(self, method, suburl, parse_time):
+        """ Records the time taken to parse a response. """
+        with self.lock:
+            self.__stats(method, suburl).add_parse(parse_time)
+
+    def total(self, attr):
+        """ Returns the total of an attribute across every page. """
+        return sum(getattr(i, attr) for i in self.pages.values())
+
+    def reset(self):
+        with self.lock:
+            self.pages = {}
+            self.started = time.perf_counter()
+
+    def to_dict(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            'elapsed': round(elapsed, 4),
+            'requests': self.total('requests'),
+            'cached': self.total('cached'),
+            'errors': self.total('errors'),
+            'bytes': self.total('bytes'),
+            'network_time': round(self.total('network_time'), 4),
+            'wait_time': round(self.total('wait_time'), 4),
+            'parse_time': round(self.total('parse_time'), 4),
+            'pages': [i.to_dict() for i in sorted(self.pages.values(), key=lambda x: -x.requests)]
+        }
+
+    def dump(self, file_name):
+        """ Writes the metrics to file as JSON. """
+        with open(file_name, 'w') as jf:
+            json.dump(self.to_dict(), jf, indent=2)
+
+    def report(self):
+        """ Returns a summary table of the metrics, busiest pages first. r-type: str """
+        rows = sorted(self.pages.values(), key=lambda x: (-x.requests, -x.cached))
+        total_requests = self.total('requests') or 1
+
+        lines = [
+            f"{'Page':<28}{'Method':<8}{'Reqs':>6}{'%':>6}{'Cached':>8}{'Errs':>6}{'KB':>9}{'Net (s)':>9}{'p95 (s)':>9}{'Wait (s)':>10}{'Parse (s)':>11}",
+        ]
+        for s in rows:
+            p95 = s.percentile(0.95)
+            lines.append(
+                f"{s.page:<28}{s.method:<8}{s.requests:>6}{100 * s.requests / total_requests:>6.1f}{s.cached:>8}{s.errors:>6}"
+                f"{s.bytes / 1024:>9.1f}{s.network_time:>9.2f}{'>5' if p95 is None else p95:>9}{s.wait_time:>10.2f}{s.parse_time:>11.2f}"
+            )
+        summary = self.to_dict()
+        lines.append(
+            f"\n{summary['requests']} requests ({summary['cached']} cached, {summary['errors']} errors), "
+            f"{summary['bytes'] / 1024:.1f} KB, network {summary['network_time']:.2f}s, "
+            f"rate limiter {summary['wait_time']:.2f}s, parsing {summary['parse_time']:.2f}s, "
+            f"run {summary['elapsed']:.2f}s"
+        )
+        return '\n'.join(lines)
+
+
+# The registry shared by every session
+METRICS = Metrics()
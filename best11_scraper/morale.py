@@ -4,13 +4,14 @@ import re
 
 from session import make_soup
 from spider import Best11
-from player import UserPlayer
-from club import UserClub
 import util
 
 class MoraleBoost(Best11):
     """ Automate the process of raising your players' happiness. """
 
+    # The fields read when choosing who to talk to
+    fields = ('player_name', 'morale', 'morale_precise')
+
     # Each chat has its own id
     # chat_dict{} is called to get id from chat str
     chat_dict = {
@@ -28,8 +29,8 @@ class MoraleBoost(Best11):
             "It's time to leave!": 12
         }
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, context=None):
+        super().__init__(context)
         self.get_players()
 
     def __apply_happiness(self, player_id, chat):
@@ -70,7 +71,10 @@ class MoraleBoost(Best11):
                 return False
             
             chat = self.chat_dict[chat_line]
-            if (change := self.__apply_happiness(player.player_id, chat)) is False:
+            change = self.__apply_happiness(player.player_id, chat)
+            # The chat changes the player's morale on their profile
+            player.invalidate_profile()
+            if change is False:
                 print(f"You already spoke to {name} today!")
                 # Can't boost morale twice
                 return False
@@ -103,7 +107,7 @@ class MoraleBoost(Best11):
 
     def get_players(self):
         """ Updates the instance with a list of the user's players as player objects. """
-        self.players = UserClub().player_objs
+        self.players = self.context.user_club.get_player_objs(self.fields)
     
     @property
     def avg_morale(self):
@@ -6,12 +6,14 @@
 
 import re
 import json
-from statistics import mean
+
+import numpy as np
+from lxml import etree
 
 # Local imports
-from session import make_soup
+from session import make_soup, make_tree
 from spider import Best11
-from session import make_soup
+import schemas
 import util
 
 # Bug fixing
@@ -23,6 +25,12 @@ class Search(Best11):
     suburl_search_menu = 'cauta_jucatori.php'
     suburl_search_result = 'lista_jucatori.php'
 
+    # Each result takes up two rows of the results table. The first holds the club (in bold), age and skills
+    find_result_rows = etree.XPath("descendant::tr[position() mod 2 = 0]")
+    find_cells = etree.XPath("descendant::td")
+    find_club = etree.XPath("string(descendant::b[1])")
+    find_player_links = etree.XPath("descendant::a/@href")
+
     def __init__(
         self,
         position, # Goalkeeper, Defender, Midfielder, Striker
@@ -30,9 +38,10 @@ class Search(Best11):
         age_category=0,
         skills=(10,10,10),
         exp=0,
-        fixed=(1,1,1,5,5)
+        fixed=(1,1,1,5,5),
+        context=None
     ):
-        super().__init__()
+        super().__init__(context)
 
         # -- Data validation --
         assert isinstance(age_category, int) and age_category in range(0,5)
@@ -50,7 +59,8 @@ class Search(Best11):
         self.fixed = fixed
         self.exp = exp
 
-        self.results_table = self.__get_results_table()
+        # The results are parsed once, into one array per column
+        self.results = self.__parse_results(self.__get_results_table())
 
     def __get_results_table(self):
 
@@ -71,59 +81,89 @@ class Search(Best11):
         }
 
         # Conduct the search
+        # Unfiltered searches return huge pages, so they're parsed as they stream in
         search_result = self.session.request(
             'POST',
             suburl=self.suburl_search_result,
-            data=data
+            data=data,
+            tree=True
         )
 
-        soup = make_soup(search_result)
+        tree = make_tree(search_result)
 
         try:
-            results_table = soup.find_all('table')[1]
-        except:
-            if soup.find('font', attrs={'color': 'red'}).text.startswith("No player was found"):
+            results_table = tree.xpath('(//table)[2]')[0]
+        except IndexError:
+            if tree.xpath('//font[@color="red"]')[0].text_content().startswith("No player was found"):
                 # No players were found
-                return []
+                return None
             else:
                 raise
 
         return results_table
 
+    def __parse_results(self, results_table):
+        """
+        Parses the results table in a single pass.
+        r-type: dict of arrays {'age', 'club', 'skill_total'} (one row per player) and the list of 'player_ids'
+        """
+        ages, clubs, skill_totals = [], [], []
+        player_ids = []
+        if results_table is not None:
+            for row in self.find_result_rows(results_table):
+                cells = self.find_cells(row)
+                clubs.append(self.find_club(cells[0]))
+                ages.append(int(cells[1].text_content()))
+                skill_totals.append(sum([float(i.text_content()) for i in cells[2:5]]))
+
+            player_id_pattern = re.compile(r"vizualizare_jucator.php\?id=(\d+)$")
+            player_ids = [match.group(1) for link in self.find_player_links(results_table) if (match := player_id_pattern.search(link))]
+
+        return {
+            'age': np.array(ages, dtype=np.int64),
+            'club': np.array(clubs, dtype=object),
+            'skill_total': np.array(skill_totals, dtype=np.float64),
+            'player_ids': player_ids
+        }
+
+    def __mask(self, active_teams_only):
+        """ Returns the rows to consider: all of them, or only those of players owned by active teams. """
+        if not active_teams_only:
+            return np.ones(len(self.results['age']), dtype=np.bool_)
+        active_clubs = self.active_clubs
+        return np.fromiter((i in active_clubs for i in self.results['club']), dtype=np.bool_, count=len(self.results['club']))
+
     def get_avg_stats(self, specific_age=None, active_teams_only=True):
         """
-        # TODO computes the average stats for players owned by active teams.
+        Computes the average stats for players (owned by active teams).
+        Returns False if there are no such players.
         """
-        # -- Get data from search --
-        results_table = self.results_table
-        if not results_table:
-            return False
-        top_row_data = [i.find_all('td') for i in results_table.find_all('tr')[1::2]]
+        mask = self.__mask(active_teams_only)
 
         # -- Refine by specfic age
-        def equals_specific_age(entry):
-            return int(entry[1].text) == specific_age
         if specific_age:
-            top_row_data = [i for i in top_row_data if equals_specific_age(i)]
+            mask &= self.results['age'] == specific_age
 
-        # -- Refine by active teams
-        def has_active_team(entry):
-            return entry[0].find('b').text in active_clubs
+        if not mask.any():
+            return False
+        return round(float(self.results['skill_total'][mask].mean()))
 
-        if active_teams_only:
-            active_clubs = [i['club'] for i in self.active_managers]
-            top_row_data = [i for i in top_row_data if has_active_team(i)]
+    def get_avg_stats_by_age(self, ages=range(17,36), active_teams_only=True):
+        """
+        Computes the average stats for players (owned by active teams) of every age at once, by a single group by.
+        Ages with no such players get False.
+        r-type: dict {age: average}
+        """
+        mask = self.__mask(active_teams_only)
+        player_ages = self.results['age'][mask]
+        length = max(max(ages), player_ages.max(initial=0)) + 1
 
-        avg_stats = [sum([float(j.text) for j in i[2:5]]) for i in top_row_data]
-        return round(mean(avg_stats))
+        counts = np.bincount(player_ages, minlength=length)
+        totals = np.bincount(player_ages, weights=self.results['skill_total'][mask], minlength=length)
+        return {age: round(float(totals[age] / counts[age])) if counts[age] else False for age in ages}
 
     def __call__(self):
-        results_table = self.results_table
-
-        player_id_pattern = r"vizualizare_jucator.php\?id=(\d+)$"
-        player_links = [i.get('href') for i in results_table.find_all('a', attrs={'href': re.compile(player_id_pattern)})]
-        player_ids = [re.findall(player_id_pattern, link)[0] for link in player_links]
-        return player_ids
+        return self.results['player_ids']
 
     """
     ** __init__ related methods **
@@ -170,6 +210,68 @@ class Search(Best11):
         self.nationality = nationality
 
 
+class PlayerSnapshot():
+    """
+    Every field of a player's page, in typed form (e.g. age -> int, skill -> tuple of float).
+    Taken once, when the page is parsed, and immutable thereafter.
+    """
+
+    __slots__ = ('player_id', 'listed', 'injured', *schemas.PLAYER.fields)
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields[name])
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} ([ID: {self.player_id}] {self.player_name})"
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, PlayerSnapshot):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return (_snapshot_from_dict, (self.to_dict(),))
+
+    def to_dict(self):
+        """ r-type: dict """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_tree(cls, player_id, tree):
+        """
+        Extracts every field from the lxml tree of a player's page, in a single pass.
+        Returns None if the player does not exist.
+        r-type: PlayerSnapshot
+        """
+        checks = schemas.PLAYER_CHECKS(tree)
+        if checks['tables'] == 1:
+            return None
+
+        # Listed players' tables are moved down the page to make way for transfer info
+        page = schemas.PLAYER if not checks['listed'] else schemas.LISTED_PLAYER
+        fields = page(tree)
+
+        # Injured players have the injury (e.g. -10%) after each skill
+        # TODO verify that attributes all still work for injured players
+        if checks['injured']:
+            fields['skill'] = fields['skill'][::2]
+
+        return cls(player_id=player_id, listed=checks['listed'], injured=checks['injured'], **fields)
+
+def _snapshot_from_dict(fields):
+    """ Rebuilds a pickled PlayerSnapshot. """
+    return PlayerSnapshot(**fields)
+
+
 class Player(Best11):
     """ Contains all info pertaining to an individual player (e.g. Leyers Carletto [ID: 302424]),
     given their id. """
@@ -177,27 +279,21 @@ class Player(Best11):
     # Files
     fn_peer_averages = "session_files/peer_averages.json"
 
-    class Decorators():
-        """ Subclass containing decorators relating to the player class. """
+    # Salary per skill point for each talent (1 to 5 stars). See talent
+    talent_bands = (0.04, 0.048, 0.056, 0.064, 0.08)
 
-        @classmethod
-        def get_table_index(self, func):
-            """ Gets the table index in a soup for an element, given its respective function name. 
-            NOTE: this is especially useful because, for example, transferred 
-            players have a slightly different layout that pushes multiple elements
-            slightly further down the page by the same amount. """
-            def inner(self):
-                func_name = str(func.__name__)
-                table_index = self.index_dict[func_name]
-                result = func(self, table_index)
-                return result
-            return inner
-
-    def __init__(self, player_id):
-        super().__init__()
+    def __init__(self, player_id, context=None, response=None, snapshot=None):
+        """
+        Parameters:
+            player_id (int)
+            response - the player's profile page, if it has already been fetched
+            snapshot (PlayerSnapshot) - the player's page, if it has already been parsed
+                (e.g. concurrently by PlayerRepository.load_many)
+        """
+        super().__init__(context)
 
-        # Update peer averages file
-        util.apply_update_timeago(self.fn_peer_averages, self.__get_peer_averages, weeks=1)
+        # Update peer averages file (only checked once per run by the context)
+        self.context.ensure_updated(self.fn_peer_averages, self.__get_peer_averages, weeks=1)
 
         self.player_id = player_id
 
@@ -205,55 +301,40 @@ class Player(Best11):
         # That I just made it an instance var
         self.params = {'id': player_id}
 
-        # -- Generate table soup ---
-        request = self.session.request("GET", "vizualizare_jucator.php?", params=self.params)
-        self.tables = make_soup(request).find_all('table')
-
-        # -- If player does not exist, do not bother executing remaining code --
-        if not self.__check_player_exists():
-            raise Exception("Invalid player")
-
-        # -- Set up Index Dict. ---
-        """ The dict tonctains all the indexes of player information. 
-        It utilises the get_table_index decorator to distribute these
-        indexes across the class's methods. """
-        # NOTE: these names MUST correspond with the names of the methods
-        index_dict = {
-            'player_name': 2, 
-            'club': 2,
-            'club_id': 2,
-            'picture': 4,
-            'position': 5,
-            'age': 6, 
-            'salary': 7, 
-            'value': 8, 
-            'exp': 9,     
-            'nat': 11, 
-            'boots': 12,
-            'goals': 14, 
-            'mom': 14,
-            'nat_stats': 14,
-            'skill': 16,
-            'energy': 19, 
-            'morale': 20, 
-            'fixed': 23
-        }
+        # -- Parse the page ---
+        if snapshot is None:
+            if response is None:
+                response = self.session.request("GET", "vizualizare_jucator.php?", params=self.params)
+            snapshot = self.take_snapshot(player_id, response)
+        self.snapshot = snapshot
 
         # -- Get Transfer listed attribute --
-        self.listed = self.__is_listed()
-
-        if not self.listed:
-            # If player is not listed, index dict as above is correct
-            self.index_dict = index_dict
-        else:
-            # Increment some values by three because tables are moved # down the page to make way for transfer info
-            self.index_dict = { k:(v if k in ('player_name', 'club') else v+3) for k, v in index_dict.items() }
+        self.listed = self.snapshot.listed
 
     def __str__(self):
         return f"[ID: {self.player_id}] {'-'.join([str(i) for i in self.skill])} {self.player_name}"
 
     # -- Executed during __init__() --
 
+    @staticmethod
+    def take_snapshot(player_id, response):
+        """
+        Parses a player's page. Every field is extracted in a single pass.
+        The tree isn't kept, so it's freed straight away.
+        Raises an exception if the player does not exist.
+        r-type: PlayerSnapshot
+        """
+        try:
+            snapshot = PlayerSnapshot.from_tree(player_id, make_tree(response))
+        except Exception as e:
+            raise Exception(f"Failed to parse the page of player [ID: {player_id}]\n{e}")
+
+        # -- If player does not exist, do not bother executing remaining code --
+        if snapshot is None:
+            # Could not get player profile. Assumed that player does not exist.
+            raise Exception(f"Invalid player [ID: {player_id}]")
+        return snapshot
+
     def __get_peer_averages(self):
         """ 
         Calculates the peer averages for each position and age of player 
@@ -264,12 +345,12 @@ class Player(Best11):
         r-type: nested dict
         """
         print("Conducting searches for peer averages")
-        search_results = {position: Search(position) for position in tqdm(self.player_positions)}
+        search_results = {position: Search(position, context=self.context) for position in tqdm(self.player_positions)}
 
-        print("Extracting data from the searches")
+        # Each search's results are grouped by age in one go
         peer_averages = {
-            position: {age: search_result.get_avg_stats(specific_age=age, active_teams_only=True) for age in range(17,36)} 
-            for position, search_result in tqdm(search_results.items())
+            position: search_result.get_avg_stats_by_age(ages=range(17,36), active_teams_only=True)
+            for position, search_result in search_results.items()
         }
         return peer_averages
 
@@ -283,76 +364,46 @@ class Player(Best11):
         if self.age not in range(17,36):
             raise Exception(f"Invalid age for Search: {self.age}\nCannot determine peer advantage")
 
-        # Open the peer averages file and get the content
-        with open(self.fn_peer_averages) as jf:
-            content = json.load(jf)
+        # Get the content of the peer averages file (decoded once per run)
+        content = self.context.load_dataset(self.fn_peer_averages)
         
         # Grab the appropriate value from the dictionary and return it
         return content[self.position][str(self.age)]
 
-    def __check_player_exists(self):
-        """ Verify that player does in fact exists. Returns True/False. """
-        if len(self.tables) == 1:
-            self.exist = False
-            """Could not get player profile for player [ID: {self.player_id}].
-            Assumed that player does not exist."""
-            return False
-        return True
-
-    def __is_listed(self):
-        """ Returns True if player is listed, else False """
-        try:
-            return True if "Current offer" in self.tables[5].find('tr').find('td').text else False
-        except:
-            string = f"Failed to execute {self.__is_listed.__name__} for {self.player_id}"
-            raise Exception(string)
-
     # -- Player Properties --
+    # Each is read from the snapshot taken when the page was parsed
 
     @property
-    @Decorators.get_table_index
-    def player_name(self, table_index=''):
+    def player_name(self):
         """ Get NAME from player profile instance """
-        player_string = self.tables[table_index].find_all('td')[1].text # String: player name [ID: 235425]
-        formatted_string = player_string.split('[')[0].strip() # String: player name
-        return formatted_string
+        return self.snapshot.player_name
 
     @property
-    @Decorators.get_table_index
-    def club_id(self, table_index=''):
+    def club_id(self):
         """ Get CLUB_ID from player profile instance """
-        href = self.tables[table_index].find_all('td')[2].find('a').get('href')
-        return util.get_id_from_href(href)
+        return self.snapshot.club_id
 
     @property
-    @Decorators.get_table_index
-    def club(self, table_index=''):
+    def club(self):
         """ Get CLUB from player profile instance """
-        club = self.tables[table_index].find_all('td')[2].find('a').text
-        """ It's possible that a player does not have a club if they club sold them to
-        the bank, or they turned 36, and have not yet been deleted from the database.
-        Hence return False if not club for clarity. """ 
-        return club if club else False
+        return self.snapshot.club
 
     @property
-    @Decorators.get_table_index
-    def picture(self, table_index=''):
+    def picture(self):
         """ Get PICTURE (avatar) from player profile instance.
         The player picture is comprised of multiple parts, each referencing an image
         at a different URL. This property returns a tuple of all these links.  """
-        return tuple([i.get('src') for i in self.tables[table_index].find_all('img')])
+        return self.snapshot.picture
 
     @property
-    @Decorators.get_table_index
-    def position(self, table_index=''):
+    def position(self):
         """ Get POSITION from player profile instance """
-        return self.tables[table_index].find('b').text
+        return self.snapshot.position
 
     @property
-    @Decorators.get_table_index
-    def age(self, table_index=''):
+    def age(self):
         """ Get AGE from player profile instance. """
-        return int(self.tables[table_index].find('b').text)
+        return self.snapshot.age
 
     @property
     def birth_year(self):
@@ -361,34 +412,25 @@ class Player(Best11):
         return self.current_season - self.age
 
     @property
-    @Decorators.get_table_index
-    def salary(self, table_index=''):
+    def salary(self):
         """ Get SALARY from player profile instance. """
-        string = self.tables[table_index].find_all('tr')[1].find('td').text
-        return self.get_value_from_string(string)
+        return self.snapshot.salary
 
     @property
-    @Decorators.get_table_index
-    def value(self, table_index=''):
+    def value(self):
         """ Get VALUE from player profile instance. """
-        raw_value = self.tables[table_index].find_all('tr')[1].find('td').text.strip()
-        return self.get_value_from_string(raw_value)
+        return self.snapshot.value
 
     @property
     def is_injured(self):
         """ Returns True if player is injured, else False. 
         Does so by searching for a pattern within red text elements on the page. """
-        # TODO verify that attributes all still work for injured players
-        red_text = [i.text for i in self.tables[16].find_all('font', attrs={'style': 'color:red; font-size: 9px;'})]
-        pattern = r"-\d{1,2}%"
-        return any([re.match(pattern, i) for i in red_text])
+        return self.snapshot.injured
 
     @property
-    @Decorators.get_table_index
-    def exp(self, table_index=''):
+    def exp(self):
         """ Get EXPERIENCE from player profile instance. """
-        exp = self.tables[table_index].find_all('tr')[1].find('td').text.strip()[0:3]
-        return int(exp.split('/')[0])
+        return self.snapshot.exp
 
     @property
     def games_until_full_exp(self):
@@ -405,53 +447,30 @@ class Player(Best11):
         return num_games
 
     @property
-    @Decorators.get_table_index
-    def nat(self, table_index=''):
+    def nat(self):
         """ Get NATIONALITY from player profile instance. """
-        string = str(self.tables[table_index].find_all('tr')[1].find('td').find('a').find('img').get('src'))
-        pattern = r"([A-Z]{3,}).[a-z]+"
-        return re.findall(pattern, string)[0]
+        return self.snapshot.nat
 
     @property
-    @Decorators.get_table_index
-    def boots(self, table_index=''):
+    def boots(self):
         """ Get BOOTS from player profile instance.
         A value is always returned since the default boots are 'black'. """
-        string = self.tables[table_index].find_all('tr')[1].find('td').find('a').find('img').get('src')
-        pattern = r"([A-Z]{3,}).[a-z]+" # TODO explain how this works
-        return re.findall(pattern, string)[0].title()
+        return self.snapshot.boots
 
     @property
-    @Decorators.get_table_index
-    def goals(self, table_index=''):
+    def goals(self):
         """ Get GOALS from player profile instance. """
-        tag = self.tables[table_index].find_all('tr')[1].find('td').find_all('b')
-        pattern = r"<b>(\d+)</b>" # TODO explain how this works
-        gls = [re.findall(pattern, str(i))[0] for i in tag]
-        return tuple(int(i) for i in gls)
+        return self.snapshot.goals
 
     @property
-    @Decorators.get_table_index
-    def mom(self, table_index=''):
+    def mom(self):
         """ Get MOM from player profile instance. """
-        tag = self.tables[table_index].find_all('tr')[1].find_all('td')[1].find_all('b')
-        pattern = r"<b>(\d+)</b>" # TODO explain how this works
-        moms = [re.findall(pattern, str(i))[0] for i in tag]
-        return tuple(int(i) for i in moms)
+        return self.snapshot.mom
 
     @property
-    @Decorators.get_table_index
-    def skill(self, table_index=''):
+    def skill(self):
         """ Get SKILLS from player profile instance. """
-        # NOTE explain how this works
-        string = str([self.tables[i].find_all('tr')[1].find('td').text for i in range(table_index, table_index+3)])
-        pattern = r"([\d\.]+)"
-        if self.is_injured:
-            player_skills = re.findall(pattern, string)[::2]
-        else:        
-            player_skills = re.findall(pattern, string)
-        # Convert skills to floats
-        return tuple([float(i) for i in player_skills])
+        return self.snapshot.skill
 
     @property
     def skill_total(self):
@@ -459,33 +478,24 @@ class Player(Best11):
         return sum(self.skill)
 
     @property
-    @Decorators.get_table_index
-    def energy(self, table_index=''):
+    def energy(self):
         """ Get ENERGY from player profile instance. """
-        return int(self.tables[table_index].find_all('tr')[1].find('td').text.strip()[:-1])
+        return self.snapshot.energy
 
     @property
-    @Decorators.get_table_index
-    def morale(self, table_index=''):
+    def morale(self):
         """ Get MORALE from player profile instance. """
-        # NOTE explain how this works
-        string = str(self.tables[table_index].find_all('tr')[1].find('td').find('img').get('src'))
-        pattern = r"_(\d).gif"
-        return int(re.findall(pattern, string)[0])
+        return self.snapshot.morale
 
     @property
-    @Decorators.get_table_index
-    def fixed(self, table_index=''):
+    def fixed(self):
         """ Get GOALS from player profile instance. """
-        # NOTE explain how this works
-        imgs = [self.tables[i].find_all('tr')[1].find('td').find('img').get('src') for i in range(table_index, table_index+5)]
-        pattern = r"_(\d).gif"
-        return tuple([int(re.findall(pattern, i)[0]) for i in imgs])
+        return self.snapshot.fixed
 
     @property
     def talent(self, stars=False):
         """ Uses a rough formula to determine the talent of a player. """
-        talent_list = [0.04, 0.048, 0.056, 0.064, 0.08]
+        talent_list = self.talent_bands
         talent_determiner = self.salary / sum(self.skill)
         i = min(talent_list, key=lambda x: abs(x - talent_determiner))
         talent = talent_list.index(i) + 1
@@ -612,34 +622,60 @@ class Player(Best11):
 
 class UserPlayer(Player):
 
-    def __init__(self, player_id):
+    def __init__(self, player_id, context=None, response=None, snapshot=None, profile=None):
+        """
+        Parameters:
+            profile (dict) - the fields of the player's profile page, if it has already been parsed
+                (see parse_profile)
+        """
         # Get the default information for the player
-        super().__init__(player_id)
+        super().__init__(player_id, context, response, snapshot)
+
+        # The fields of the player's profile page, fetched on first use (see _profile)
+        self.__profile = profile
+        # Set once the profile has been invalidated, so that a cached copy of the page isn't used again
+        self.__profile_changed = False
 
     def __str__(self):
         return f"[ID: {self.player_id}] {'-'.join([str(i) for i in self.skill])} ({'-'.join([str(i) for i in self.potential])}) {self.player_name}"
 
     @property
     def _profile(self):
-        """ Returns the soup of the player's profile page. """
-        response = self.session.request("GET", 'profil.php?', params=self.params)
-        profile = make_soup(response)
-        return profile     
+        """
+        Returns the fields of the player's profile page. r-type: dict
+        The page is only requested once per player, until invalidate_profile() is called.
+        """
+        if self.__profile is None:
+            response = self.session.request("GET", 'profil.php?', params=self.params, cache=not self.__profile_changed)
+            self.__profile = self.parse_profile(response, self.listed)
+            self.__profile_changed = False
+        return self.__profile
+
+    @staticmethod
+    def parse_profile(response, listed):
+        """ Returns the fields of a player's profile page. r-type: dict """
+        profile = schemas.PROFILE if not listed else schemas.LISTED_PROFILE
+        return profile(make_tree(response))
+
+    def invalidate_profile(self):
+        """
+        Discards the fields of the player's profile page, so that it is requested again on next use.
+        Must be called after any action which changes it (training, renaming, a chat).
+        The player is forgotten by the player store too.
+        """
+        self.__profile = None
+        self.__profile_changed = True
+        self.context.player_store.invalidate(self.player_id)
 
     @property
     def potential(self):
         """ Returns the player's potentials. r-type: int. """
-        # Potentials text has these attributes. So use this to get a list of potentials
-        green_text = [i.text for i in self._profile.find_all('font', attrs={"color": "#547B22"})[-3:]]
-        # Grab the float of every element in this list of it matches the \d\d pattern
-        return tuple([float(i) for i in green_text if re.match(r'\d{2}', i)])
+        return self._profile['potential']
 
     @property
     def morale_precise(self):
         """ Returns the precise morale of a player (out of 100, rather than 5). r-type: int """
-        index = 20 if not self.listed else 23
-        onmouseover = str(self._profile.find_all('table')[index].find_all('tr')[1].find('a'))
-        return int(re.findall(r"(\d{1,3})%'", onmouseover)[0])
+        return self._profile['morale_precise']
 
     @property
     def is_trainable(self):
@@ -676,28 +712,24 @@ class UserPlayer(Player):
             suburl='profil.php?',
             params={'id': self.player_id, 'antrenament': f'A{str(first_positive)}'}
         )
-        soup = make_soup(response)
-
-        if soup.find_all('font', text=re.compile("already been trained today")):
-            return True
-        return False
+        return schemas.PROFILE.get(make_tree(response), 'trained_today')
 
     @property
     def extra_trained_thisweek(self):
         if self.exp >= 500: raise Exception("Player is maxed out already")
-        trainable = bool(self._profile.find('a', attrs={'href': re.compile(r"extra_practice\.php\?id=\d+$")}))
-        return not trainable
+        return not self._profile['extra_trainable']
 
     def change_name(self):
         """ 
         Change the player's name. r-type: None
         NOTE: this can only be done once!
         """
-        if not self._profile.find('a', attrs={'href': re.compile(r"schimba_nume\.php\?id=\d+$")}):
+        if not self._profile['renamable']:
             # Name has already been changed
             return False
         # Confirm change of name
         self.session.request("GET", suburl='schimba_nume.php?', params={'id': self.player_id, 'pag': 'confirma'})
+        self.invalidate_profile()
 
 
 if __name__ == "__main__":
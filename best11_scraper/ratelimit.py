@@ -0,0 +1,149 @@
+"""
+    Rate limiting for requests to Best11.
+    Every request (sync or async) goes through the same RateLimiter,
+    which keeps a token bucket per host so that best11.org isn't hammered.
+
+    Requests have a priority class:
+        bidding > daily (actions) > analytics (crawls/searches)
+    Lower priorities must leave some tokens in the bucket (headroom) for higher ones,
+    so a long crawl can't hold up a bid. A request only takes a token once one is free for its priority;
+    until then it waits and asks again, so queued requests never hold tokens that a bid could use.
+
+    When the server says it's being sent too much (a 429), the sessions penalise the host:
+    its bucket is emptied and held for as long as the server asked (Retry-After), whatever the priority.
+"""
+
+import asyncio
+import random
+import re
+import threading
+import time
+
+
+class TokenBucket():
+    """ A token bucket which refills at <rate> tokens per second, up to <burst> tokens. """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        # No tokens are given out until then (see hold)
+        self.held_until = 0
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} (tokens: {self.tokens:.2f}/{self.burst}, rate: {self.rate}/s)"
+
+    def reserve(self, headroom=0):
+        """
+        Takes a token if at least <headroom> other tokens would be left.
+        Otherwise takes nothing, so that waiting requests don't push back higher priorities.
+        r-type: float - 0 if the token was taken, else seconds to wait before asking again
+        """
+        now = time.monotonic()
+        if now < self.held_until:
+            return self.held_until - now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        # The bucket never holds more than <burst> tokens
+        needed = min(1 + headroom, self.burst)
+        if self.tokens < needed:
+            return (needed - self.tokens) / self.rate
+        self.tokens -= 1
+        return 0
+
+    def hold(self, seconds):
+        """ Empties the bucket and gives out no tokens for <seconds>, after which it refills from empty. """
+        now = time.monotonic()
+        self.held_until = max(self.held_until, now + seconds)
+        self.tokens = 0
+        self.updated = self.held_until
+
+
+class RateLimiter():
+    """ Keeps a token bucket per host and works out how long each request should wait. """
+
+    # Sustained requests per second, and how many can be made in a burst (per host)
+    rate = 2.0
+    burst = 5
+
+    # Max random seconds added to a wait, so that requests don't come in a fixed rhythm
+    jitter = 0.5
+
+    # Number of tokens each priority must leave in the bucket for higher priorities
+    priorities = {
+        'bidding': 0,
+        'daily': 1,
+        'analytics': 3
+    }
+    default_priority = 'daily'
+
+    # Priority for suburls when one isn't given with the request
+    priority_patterns = (
+        (re.compile(r"^licitatie\.php"), 'bidding'),
+        (re.compile(r"^(lista_jucatori|cauta_jucatori|useri|wealth|istoric_club|transferuri_club|forma)\.php"), 'analytics')
+    )
+
+    def __init__(self, rate=None, burst=None, jitter=None):
+        if rate is not None:
+            self.rate = rate
+        if burst is not None:
+            self.burst = burst
+        if jitter is not None:
+            self.jitter = jitter
+
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} (rate: {self.rate}/s, burst: {self.burst}, hosts: {list(self.buckets)})"
+
+    def __bucket(self, host):
+        """ Returns the token bucket of a host (call with the lock held). r-type: TokenBucket """
+        if not (bucket := self.buckets.get(host)):
+            bucket = self.buckets[host] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def priority_for(self, suburl):
+        """ Returns the priority class of a suburl. r-type: str """
+        for pattern, priority in self.priority_patterns:
+            if pattern.match(suburl):
+                return priority
+        return self.default_priority
+
+    def reserve(self, host, priority=None, suburl=''):
+        """
+        Tries to take a slot for a request to a host.
+        r-type: float - 0 if the slot was taken, else seconds to wait before trying again
+        """
+        if priority is None:
+            priority = self.priority_for(suburl)
+        elif priority not in self.priorities:
+            raise ValueError(f"Unknown priority: {priority}\nMust be in {tuple(self.priorities)}")
+
+        with self.lock:
+            delay = self.__bucket(host).reserve(self.priorities[priority])
+
+        if delay:
+            delay += random.uniform(0, self.jitter)
+        return delay
+
+    def penalise(self, host, seconds):
+        """ Holds back every request to a host for <seconds> (e.g. after a 429 with Retry-After). """
+        with self.lock:
+            self.__bucket(host).hold(seconds)
+
+    def wait(self, host, priority=None, suburl=''):
+        """ Blocks until a request to the host may be made. """
+        while (delay := self.reserve(host, priority, suburl)):
+            time.sleep(delay)
+
+    async def wait_async(self, host, priority=None, suburl=''):
+        """ Async equivalent of wait(). """
+        while (delay := self.reserve(host, priority, suburl)):
+            await asyncio.sleep(delay)
+
+
+# The rate limiter shared by every session
+RATE_LIMITER = RateLimiter()
@@ -0,0 +1,90 @@
+"""
+    In-memory reference datasets (active managers, wealth 100, peer averages, club index).
+
+    Each dataset is a JSON file which is decoded once, and only decoded again if the file's
+    modification time changes (e.g. when it is refreshed). Views derived from a dataset,
+    such as the frozenset of active club ids, or the reverse lookup of club -> wealth rank,
+    are built once per load too, so that membership tests and lookups in hot loops are O(1).
+
+    e.g.
+        dataset = ReferenceData("session_files/wealth_100.json")
+        dataset.view(WealthRanks).ranks -> {club_id: rank}
+"""
+
+import json
+import os
+import threading
+
+
+class ReferenceData():
+    """ A JSON dataset, kept in memory while its file is unchanged. """
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.lock = threading.Lock()
+
+        self.mtime = None
+        self.__content = None
+        # Views derived from the content {build: view}
+        self.views = {}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} ({self.file_name}, views: {[i.__name__ for i in self.views]})"
+
+    @property
+    def content(self):
+        """ The decoded content of the file. Decoded again only if the file has been modified. """
+        mtime = os.stat(self.file_name).st_mtime_ns
+        if mtime != self.mtime:
+            with self.lock:
+                if mtime != self.mtime:
+                    with open(self.file_name) as jf:
+                        self.__content = json.load(jf)
+                    self.views = {}
+                    self.mtime = mtime
+        return self.__content
+
+    def view(self, build):
+        """ Returns a view of the content, built by build(content) once per load. """
+        content = self.content
+        if (view := self.views.get(build)) is None:
+            view = self.views[build] = build(content)
+        return view
+
+
+# --- Views ---
+
+class ActiveManagers():
+    """ The active managers, with frozensets for membership tests. """
+
+    __slots__ = ('managers', 'club_ids', 'clubs', 'by_club_id')
+
+    def __init__(self, managers):
+        """
+        Parameters:
+            managers (list) - [{club_id: 200, club: 'Solent City', manager: 'callumEvans'}, ...]
+        """
+        self.managers = managers
+        self.club_ids = frozenset(i['club_id'] for i in managers)
+        self.clubs = frozenset(i['club'] for i in managers)
+        self.by_club_id = {i['club_id']: i for i in managers}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} (managers: {len(self.managers)})"
+
+
+class WealthRanks():
+    """ The wealthiest 100 clubs, by rank and by club. """
+
+    __slots__ = ('by_rank', 'ranks')
+
+    def __init__(self, wealth_100):
+        """
+        Parameters:
+            wealth_100 (dict) - {wealth_rank: club_id}. The ranks are strings, since they're JSON keys.
+        """
+        self.by_rank = {int(rank): club_id for rank, club_id in wealth_100.items()}
+        self.ranks = {club_id: rank for rank, club_id in self.by_rank.items()}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} (clubs: {len(self.ranks)})"
@@ -0,0 +1,191 @@
+"""
+    Loading many players at once.
+
+    PlayerRepository.load_many fetches the pages of a batch of players concurrently,
+    through an AsyncSession (so under the same rate limiter, cache and metrics as every other request).
+    The pages are then parsed in parallel in a thread pool (lxml releases the GIL while parsing),
+    and the players are returned in the same order as their ids.
+    A player whose page can't be fetched or parsed doesn't abort the batch:
+    the error is collected against their id instead.
+
+    Players are kept in the context's PlayerStore between runs, so only the pages
+    whose needed fields have gone stale are requested (see store.py).
+    Every player requested is also recorded in the context's PlayerHistory (see history.py).
+
+    e.g.
+        batch = PlayerRepository(context).load_many([234841, 302424], user=True)
+        batch.players -> [UserPlayer, UserPlayer]
+        batch.errors -> {}
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# Local imports
+from aio import AsyncSession
+from context import CONTEXT
+from player import Player, UserPlayer
+from spider import Best11
+import transport
+
+
+class Batch():
+    """ The players loaded by PlayerRepository.load_many, and the errors of those which couldn't be. """
+
+    def __init__(self, player_ids, players, errors):
+        """
+        Parameters:
+            player_ids (list) - every id requested, in order
+            players (list) - the players which were loaded, in the same order as their ids
+            errors (dict) - {player_id: exception} for the players which couldn't be
+        """
+        self.player_ids = player_ids
+        self.players = players
+        self.errors = errors
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} (players: {len(self.players)}, errors: {len(self.errors)})"
+
+    def __iter__(self):
+        return iter(self.players)
+
+    def __len__(self):
+        return len(self.players)
+
+    @property
+    def snapshots(self):
+        """ r-type: list of PlayerSnapshot """
+        return [i.snapshot for i in self.players]
+
+    def report_errors(self):
+        """ Prints the players which couldn't be loaded. """
+        for player_id, error in self.errors.items():
+            print(f"Could not load player [ID: {player_id}]: {error}")
+
+
+class PlayerRepository():
+    """ Loads players in batches. """
+
+    # Threads parsing pages at once
+    max_workers = transport.MAX_CONCURRENCY
+
+    def __init__(self, context=None, max_concurrency=None, store=None):
+        """
+        Parameters:
+            max_concurrency (int) - requests in flight at once (default: AsyncSession.max_concurrency)
+            store (PlayerStore) - where players are kept between runs (default: the context's)
+        """
+        self.context = context if context else CONTEXT
+        self.max_concurrency = max_concurrency
+        self.store = store if store is not None else self.context.player_store
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} (max_concurrency: {self.max_concurrency or AsyncSession.max_concurrency})"
+
+    def load_many(self, player_ids, user=False, fields=None, refresh=False):
+        """
+        Loads every player.
+        With user=True, the players are the user's own (UserPlayer), and their profile pages are loaded too.
+
+        Parameters:
+            fields (iterable) - the fields which will be used (default: every field).
+                Players whose stored fields are still fresh aren't requested again.
+            refresh (bool) - request every player, however fresh
+        r-type: Batch
+        """
+        return asyncio.run(self.load_many_async(player_ids, user, fields, refresh))
+
+    async def load_many_async(self, player_ids, user=False, fields=None, refresh=False):
+        """ Async variant of load_many. r-type: Batch """
+        player_ids = list(player_ids)
+        player_cls = UserPlayer if user else Player
+
+        # Only the pages whose needed fields are stale are requested
+        stored = {} if refresh else self.store.get_many(player_ids, fields, profile=user)
+        stored = {i: stored.get(int(i), (None, None)) for i in player_ids}
+        page_ids = [i for i in player_ids if stored[i][0] is None]
+        profile_ids = [i for i in player_ids if user and stored[i][1] is None]
+
+        pages, profiles = await self.__fetch(page_ids, profile_ids)
+
+        loop = asyncio.get_running_loop()
+        fetched_ids = list(dict.fromkeys(page_ids + profile_ids))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            parsed = await asyncio.gather(*[
+                loop.run_in_executor(pool, self.__parse, player_id, pages.get(player_id), profiles.get(player_id), stored[player_id][0])
+                for player_id in fetched_ids
+            ])
+        fetched = dict(zip(fetched_ids, parsed))
+        self.__record(
+            [fetched[i][:2] for i in page_ids if fetched[i][2] is None],
+            {i: fetched[i][1] for i in profile_ids if i not in pages and fetched[i][2] is None}
+        )
+
+        # The players themselves are built here rather than in the threads,
+        # since building the first one may update the files shared by the context
+        players, errors = [], {}
+        for player_id in player_ids:
+            if player_id in fetched:
+                snapshot, profile, error = fetched[player_id]
+                # Only the player's page may have been fetched
+                profile = profile if profile is not None else stored[player_id][1]
+            else:
+                (snapshot, profile), error = stored[player_id], None
+            if error is not None:
+                errors[player_id] = error
+                continue
+            if user:
+                players.append(player_cls(player_id, self.context, snapshot=snapshot, profile=profile))
+            else:
+                players.append(player_cls(player_id, self.context, snapshot=snapshot))
+        return Batch(player_ids, players, errors)
+
+    def __record(self, entries, profiles):
+        """
+        Keeps freshly fetched pages in the store, and the snapshots in the history.
+        Parameters:
+            entries (list) - (snapshot, profile fields or None) of the players whose page was fetched
+            profiles (dict) - {player_id: profile fields} of the players whose profile page alone was fetched
+        """
+        if profiles:
+            self.store.put_profiles(profiles)
+        if not entries:
+            return
+        self.store.put_many(entries)
+        self.context.player_history.append([snapshot for snapshot, _ in entries], season=Best11(self.context).current_season)
+
+    async def __fetch(self, page_ids, profile_ids):
+        """
+        Requests the pages and profile pages of the given players concurrently.
+        Failed requests are returned as their exception.
+        r-type: tuple ({player_id: page}, {player_id: profile page})
+        """
+        if not page_ids and not profile_ids:
+            return {}, {}
+        async with AsyncSession(self.context.session, self.max_concurrency) as session:
+            pages, profiles = await asyncio.gather(
+                session.gather("GET", "vizualizare_jucator.php?", [{'id': i} for i in page_ids], return_exceptions=True),
+                session.gather("GET", "profil.php?", [{'id': i} for i in profile_ids], return_exceptions=True)
+            )
+        return dict(zip(page_ids, pages)), dict(zip(profile_ids, profiles))
+
+    @staticmethod
+    def __parse(player_id, page, profile, snapshot=None):
+        """
+        Parses a player's page and/or profile page. Runs in the thread pool.
+        Parameters:
+            page, profile - the responses fetched (None if not)
+            snapshot (PlayerSnapshot) - the stored snapshot, if the page wasn't fetched
+        r-type: tuple (snapshot, profile fields, exception)
+        """
+        try:
+            for response in (page, profile):
+                if isinstance(response, Exception):
+                    raise response
+            if page is not None:
+                snapshot = Player.take_snapshot(player_id, page)
+            if profile is not None:
+                profile = UserPlayer.parse_profile(profile, snapshot.listed)
+            return snapshot, profile, None
+        except Exception as e:
+            return None, None, e
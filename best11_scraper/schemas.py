@@ -0,0 +1,196 @@
+"""
+    Declarative schemas for every page type this project scrapes.
+
+    Each page type is a Schema: a set of named fields, each located relative to one of the
+    page's tables (table indices are the same as soup.find_all('table')[i]).
+    Schemas are compiled once, when this module is imported, and pull every field
+    out of a page in a single pass. They are kept in the SCHEMAS registry by name.
+
+    e.g.
+        schemas.PLAYER(make_tree(response)) -> {'player_name': 'Meg Myers', 'age': 21, ...}
+"""
+
+import re
+
+from lxml import etree
+
+# Local imports
+from extract import Schema, Field, strip, integer, decimal, regex, each, optional
+from spider import Best11
+import util
+
+
+# The schemas, by name
+SCHEMAS = {}
+
+def register(schema):
+    """ Adds a schema to the registry. r-type: Schema """
+    SCHEMAS[schema.name] = schema
+    return schema
+
+def schema_for(name):
+    """ Returns the schema of a page type. """
+    try:
+        return SCHEMAS[name]
+    except KeyError:
+        raise ValueError(f"Unknown page type: {name}\nMust be in {tuple(SCHEMAS)}")
+
+
+# --- Converters ---
+# Converters return None (or False) when what they look for isn't there, as with a club-less player,
+# so that one odd field doesn't stop the rest of the page being extracted
+
+money = Best11.get_value_from_string
+gif_number = regex(r"_(\d).gif", int)
+flag = regex(r"([A-Z]{3,}).[a-z]+")
+texts = each(strip)
+raw_texts = each(lambda node: node.text_content())
+
+def has_link(pattern):
+    """ Returns a converter of hrefs which is True if any of them match the regex. r-type: bool """
+    compiled = re.compile(pattern)
+    return lambda hrefs: any(compiled.search(i) for i in hrefs)
+
+# Paths commonly used relative to a table
+SECOND_ROW_CELL = "descendant::tr[2]/descendant::td[1]"
+SECOND_ROW_IMG = f"{SECOND_ROW_CELL}/descendant::img[1]/@src"
+
+
+# --- Players ---
+
+# A player's page (vizualizare_jucator.php)
+PLAYER = register(Schema('player',
+    player_name=Field("string(descendant::td[2])", lambda s: s.split('[')[0].strip(), table=2), # player name [ID: 235425]
+    # A player has no club if sold to the bank, or they turned 36 and haven't been deleted yet
+    club=Field("string(descendant::td[3]/descendant::a[1])", lambda s: s if s else False, table=2),
+    club_id=Field("descendant::td[3]/descendant::a[1]/@href", lambda href: util.get_id_from_href(href) if href else False, table=2),
+    picture=Field("descendant::img/@src", tuple, many=True, table=4),
+    position=Field("string(descendant::b[1])", None, table=5),
+    age=Field("string(descendant::b[1])", integer, table=6),
+    salary=Field(f"string({SECOND_ROW_CELL})", money, table=7),
+    value=Field(f"string({SECOND_ROW_CELL})", lambda s: money(s.strip()), table=8),
+    exp=Field(f"string({SECOND_ROW_CELL})", lambda s: int(s.strip()[0:3].split('/')[0]), table=9),
+    nat=Field(f"{SECOND_ROW_CELL}/descendant::a[1]/descendant::img[1]/@src", flag, table=11),
+    boots=Field(f"{SECOND_ROW_CELL}/descendant::a[1]/descendant::img[1]/@src", lambda src: (flag(src) or '').title() or None, table=12),
+    goals=Field(f"{SECOND_ROW_CELL}/descendant::b/text()", each(int), many=True, table=14),
+    mom=Field("descendant::tr[2]/descendant::td[2]/descendant::b/text()", each(int), many=True, table=14),
+    # Every number in the skill cells (injured players have their injury after each skill)
+    skill=Field(SECOND_ROW_CELL, lambda cells: tuple(float(i) for c in cells for i in re.findall(r"[\d\.]+", c.text_content())), many=True, table=(16, 17, 18)),
+    energy=Field(f"string({SECOND_ROW_CELL})", lambda s: int(s.strip()[:-1]), table=19),
+    morale=Field(SECOND_ROW_IMG, gif_number, table=20),
+    fixed=Field(SECOND_ROW_IMG, each(gif_number), many=True, table=(23, 24, 25, 26, 27))
+))
+
+# Most of a listed player's tables are moved down the page to make way for the transfer info
+LISTED_PLAYER = register(PLAYER.shifted('listed_player', 3, keep=('player_name', 'club', 'club_id')))
+
+# Fields which don't depend on whether the player is listed
+PLAYER_CHECKS = register(Schema('player_checks',
+    tables=Field("count(//table)", int),
+    listed=Field("string(descendant::tr[1]/descendant::td[1])", lambda s: "Current offer" in s, table=5),
+    injured=Field("descendant::font[@style='color:red; font-size: 9px;']", lambda fonts: any(re.match(r"-\d{1,2}%", i.text_content()) for i in fonts), many=True, table=16)
+))
+
+# The transfer info table of a listed player's page
+TRANSFER_INFO = register(Schema('transfer_info',
+    current_offer=Field("string(descendant::td[1])", money, table=5),
+    current_bidder=Field("string(descendant::a[1])", None, table=5),
+    deadline=Field("string(descendant::td[3]/descendant::b[1])", None, table=5)
+))
+
+# A user's player's profile (profil.php)
+PROFILE = register(Schema('profile',
+    # Potentials are the last three green texts
+    potential=Field("//font[@color='#547B22']", lambda fonts: tuple(float(i) for i in texts(fonts)[-3:] if re.match(r'\d{2}', i)), many=True),
+    morale_precise=Field("descendant::tr[2]/descendant::a[1]/@onmouseover", regex(r"(\d{1,3})%'", int), table=20),
+    # The links are only available if they end with the player's id
+    extra_trainable=Field("//a[contains(@href, 'extra_practice.php?id=')]/@href", has_link(r"extra_practice\.php\?id=\d+$"), many=True),
+    # The link to change the player's name disappears once it has been changed
+    renamable=Field("//a[contains(@href, 'schimba_nume.php?id=')]/@href", has_link(r"schimba_nume\.php\?id=\d+$"), many=True),
+    trained_today=Field("boolean(//font[contains(., 'already been trained today')])", None)
+))
+LISTED_PROFILE = register(PROFILE.shifted('listed_profile', 3, keep=('potential', 'extra_trainable', 'renamable', 'trained_today')))
+
+
+# --- Clubs ---
+
+def links(nodes):
+    """ r-type: tuple of (text, href) """
+    return tuple((i.text_content(), i.get('href')) for i in nodes)
+
+# A club's page (vizualizare_club.php)
+CLUB = register(Schema('club',
+    motto=Field("string(descendant::tr[2]/descendant::i[1])", None, table=0),
+    avatar=Field("descendant::tr[3]/descendant::img[1]/@src", None, table=1),
+    # The number and order of the links depend on the status of the club (see Club.status)
+    info_links=Field("descendant::tr[2]/descendant::a", links, many=True, table=3),
+    info_fonts=Field("descendant::tr[2]/descendant::font", texts, many=True, table=3),
+    fame=Field("string(descendant::tr[2]/descendant::b[1])", None, table=3),
+    team_kit=Field("descendant::img[contains(@src, 'echipament')]/@src", tuple, many=True, table=5),
+    sponsors=Field("descendant::img[contains(@src, 'sponsori')]/@src", tuple, many=True, table=5),
+    stadium_capacity=Field("string(descendant::tr[1]/descendant::td[2]/descendant::b[1])", optional(lambda s: int(s.replace('.', ''))), table=8),
+    objective=Field(f"string({SECOND_ROW_CELL})", strip, table=12),
+    # Only on the user's own club page
+    user_msg_id=Field("//input[@name='user']/@value", lambda v: int(v) if v else None)
+))
+
+# The user's club page (club.php)
+USER_CLUB = register(Schema('user_club',
+    pitch_quality=Field("string((descendant::b)[last()])", optional(lambda s: int(s.strip()[:-1])), table=8),
+    fans=Field("string(descendant::b[1])", optional(integer), table=10),
+    fans_mood=Field("descendant::a[1]/@onmouseover", regex(r"(\d{1,3})%", int), table=10),
+    credits=Field("string(descendant::td[2])", money, table=20),
+    bonus_available=Field("boolean(descendant::img[contains(@src, '/bonus.gif')])", None, table=20),
+    tp=Field("string(descendant::td[2])", money, table=22)
+))
+
+# The user's facilities (facilitati.php)
+FACILITIES = register(Schema('facilities',
+    training_forms=Field(f"{SECOND_ROW_CELL}/descendant::form/@action", tuple, many=True, table=2),
+    techstaff_slots=Field("descendant::tr[2]/descendant::a[contains(@href, 'pag=concediaza&slot=')]/@href", each(lambda href: int(href[-1])), many=True, table=2),
+    techstaff_stats=Field("descendant::tr[2]/descendant::a[contains(@onmouseover, 'Level: ')]/@onmouseover", tuple, many=True, table=2),
+    techstaff_names=Field("descendant::tr[2]/descendant::b", texts, many=True, table=2),
+    youth_coach_hirable=Field("boolean(descendant::tr[2]/descendant::input[@value='Hire coach'])", None, table=3),
+    youth_coach_name=Field("string(descendant::tr[2]/descendant::b[1])", None, table=3),
+    youth_coach_stats=Field("descendant::tr[2]/descendant::a[@onmouseover][1]/@onmouseover", None, table=3),
+    youth_coach_stars=Field("descendant::tr[2]/descendant::img[contains(@src, 'imagini/stele/')]/@src", tuple, many=True, table=4),
+    medical_allowance=Field("descendant::option[@selected]/@value", integer, table=8),
+    psych_hirable=Field("boolean(descendant::tr[2]/descendant::input[@value='Hire psychologist'])", None, table=9),
+    psych_name=Field("string(descendant::tr[2]/descendant::b[1])", None, table=9),
+    psych_stats=Field("descendant::tr[2]/descendant::a[@onmouseover][1]/@onmouseover", None, table=9)
+))
+
+# A page of the user's finances (finante.php). The entries are in the second table of width 300
+FINANCE_TABLE = "(//table[@width='300'])[2]"
+FINANCES = register(Schema('finances',
+    # (amount, area) for each entry. The last row holds the links to other pages
+    entries=Field(f"{FINANCE_TABLE}/descendant::tr[position() < last()]", lambda rows: tuple(tuple(texts(i.xpath('descendant::td'))[:2]) for i in rows), many=True),
+    rows=Field(f"count({FINANCE_TABLE}/descendant::tr)", int),
+    page_back=Field(f"{FINANCE_TABLE}/descendant::a[contains(@href, 'finante.php?nr_pag=')]/@href", None)
+))
+
+
+# --- Matches ---
+
+# A match's page (meci.php). The stats row contains a sub table of averages
+STATS_ROW = "descendant::tr[3]"
+SUB_TABLE = f"{STATS_ROW}/descendant::table[1]"
+MATCH = register(Schema('match',
+    played=Field("string(descendant::tr[1]/descendant::td[2])", lambda s: s == "Final Score", table=0),
+    clubs=Field("descendant::tr[2]/descendant::td[1] | descendant::tr[2]/descendant::td[last()]", texts, many=True, table=0),
+    score_imgs=Field("descendant::tr[2]/descendant::td[position() = 3 or position() = 4]/descendant::img[1]/@src", tuple, many=True, table=0),
+    possession=Field(f"string({STATS_ROW}/descendant::td[2])", regex(r"Possession:(\d{0,3})% - (\d{0,3})", lambda i: tuple(int(j) for j in i)), table=0),
+    avg_age=Field(f"{SUB_TABLE}/descendant::tr[2]/descendant::td[position() > 1]", each(decimal), many=True, table=0),
+    avg_mood=Field(f"{SUB_TABLE}/descendant::tr[3]/descendant::td[position() > 1]", each(decimal), many=True, table=0),
+    avg_energy=Field(f"{SUB_TABLE}/descendant::tr[4]/descendant::td[position() > 1]", each(decimal), many=True, table=0),
+    home_popups=Field(f"{STATS_ROW}/descendant::td[1]/descendant::a/@onmouseover", tuple, many=True, table=0),
+    away_popups=Field(f"{STATS_ROW}/descendant::td[last()]/descendant::a/@onmouseover", tuple, many=True, table=0),
+    home_ratings=Field(f"{STATS_ROW}/descendant::td[1]/descendant::font", texts, many=True, table=0),
+    away_ratings=Field(f"{STATS_ROW}/descendant::td[last()]/descendant::font", texts, many=True, table=0),
+    # (scorers, minutes) for each side
+    scoresheet=Field("descendant::tr[8]/descendant::td", lambda tds: tuple((raw_texts(i.xpath('descendant::a')), raw_texts(i.xpath('descendant::b'))) for i in tds), many=True, table=0),
+    events=Field(".", lambda node: etree.tostring(node, encoding='unicode'), table=2),
+    attweath=Field("string(descendant::tr[last() - 1])", None, table=2),
+    home_teamsheet=Field("descendant::tr[last() - 3]/descendant::a", texts, many=True, table=2),
+    away_teamsheet=Field("descendant::tr[last() - 4]/descendant::a", texts, many=True, table=2)
+))
@@ -4,9 +4,10 @@
 """
 
 import json
-import pickle
+import time
 import requests
 from bs4 import BeautifulSoup as bs
+import lxml.html
 from urllib.parse import urlparse # for making cache file
 import os
 
@@ -14,11 +15,35 @@ import os
 import util
 from exceptions import LoginException
 from config import UserSettings
+from session_store import SessionStore
+from ratelimit import RATE_LIMITER
+from cache import ResponseCache
+from singleflight import SingleFlight
+from metrics import METRICS
+import transport
 
 
 def make_soup(request):
     """ Given a request object, convert into bs4 object. """
-    return bs(request.text, 'lxml')
+    start = time.perf_counter()
+    soup = bs(request.text, 'lxml')
+    # Responses from Session.request are tagged with their (method, suburl)
+    if (metric_key := getattr(request, 'metric_key', None)):
+        METRICS.record_parse(*metric_key, time.perf_counter() - start)
+    return soup
+
+def make_tree(response):
+    """
+    Given a response, returns the root of its lxml tree.
+    Responses requested with tree=True were already parsed while streaming in.
+    """
+    if (tree := getattr(response, 'tree', None)) is not None:
+        return tree
+    start = time.perf_counter()
+    tree = lxml.html.document_fromstring(response.content)
+    if (metric_key := getattr(response, 'metric_key', None)):
+        METRICS.record_parse(*metric_key, time.perf_counter() - start)
+    return tree
 
 USER_SETTINGS = UserSettings()
 
@@ -38,43 +63,50 @@ class Session(requests.Session):
     urlData = urlparse(MAIN_URL + login_suburl)
 
     # Make the filepath for the session file that can be subsequently used.
-    fn_session = f"session_files/{urlData.netloc}_session.bat"
+    fn_session = f"session_files/{urlData.netloc}_session.json"
 
-    """ 
-    This __attrs__ class attribute 
-    is called in the requests.Session class by the __getstate__() 
-    
-    In pickel, the __dict__() method is serialised UNLESS the __getstate__() method
-    is called, in which case the return object of __getstate__() will be pickled
-    as the contents of the instance.
-    In requests.Session, the __getstate__() method returns a list of 
-    getattr(x) for x in __attrs__, which is not a real dunder method, but 
-    just a list defined within the same request.Session class which contains
-    a string list of attributes of the instance.
-    When pickeling, this method is called, so that means these items alone
-    are pickled. Hence, to ensure variables created in this class are also pickled,
-    they must be added to the __attrs__ list.
-    """
-    __attrs__ = requests.Session.__attrs__
-    __attrs__ += ["username", "password", "logged_in", "logged_in_from_cache", "active_managers", "wealth_100"]
+    # Every request waits on the same (global) rate limiter
+    rate_limiter = RATE_LIMITER
+
+    # When set to a cassette.Cassette, requests are recorded to/replayed from it
+    cassette = None
+
+    # Bytes read at a time when streaming a response into the parser
+    chunk_size = 64 * 1024
+
+    @classmethod
+    def set_main_url(cls, main_url):
+        """
+        Points every session at a different server (e.g. the local stand-in, stub_server.py).
+        Sessions are saved to a separate file per server, so the real one isn't overwritten.
+        """
+        cls.MAIN_URL = main_url
+        cls.urlData = urlparse(main_url + cls.login_suburl)
+        cls.fn_session = f"session_files/{cls.urlData.netloc.replace(':', '_')}_session.json"
 
     @classmethod
     def load_session(cls, session_expire=20):
+        """
+        Returns a logged in Session.
+        If a recent session file exists, its cookies are loaded into a fresh
+        Session and checked with a single request. Otherwise logs in again.
+        """
         file_name = Session.fn_session
+        session = Session()
     
         # If the file exists and was modified less than <session_expire> minutes ago 
         if util.file_exists(file_name) and util.get_modified_ago(file_name).in_minutes() <= session_expire:
             print("Attempting to load session...")
-            with open(file_name, 'rb') as pf:
-                session = pickle.load(pf)
+            if session.store.restore() and session.has_valid_cookie():
+                session.logged_in = True
                 session.logged_in_from_cache = True
-        else:
-            print("Attempting to create session...")
-            session = Session()
+                return session
+            print("Saved session is no longer valid.")
+            session.cookies.clear()
 
-            print("Attempting to login...")
-            session() # execute __call__() function to login
-            session.logged_in_from_cache = False
+        print("Attempting to login...")
+        session() # execute __call__() function to login
+        session.logged_in_from_cache = False
 
         return session
 
@@ -87,9 +119,23 @@ class Session(requests.Session):
         with open(util.combine_path(util.SESSION_FILES, 'user_agent.json')) as jf:
             user_agent = json.load(jf)
         self.headers.update(user_agent)
+        self.headers['Accept-Encoding'] = transport.ACCEPT_ENCODING
+
+        # Pooled, kept-alive connections which retry idempotent GETs
+        transport.mount(self)
 
         # Called by __repr__
         self.logged_in = False
+        self.logged_in_at = None
+
+        # Handles writing the session to file
+        self.store = SessionStore(self, self.fn_session)
+
+        # Responses to pages which are requested multiple times in a run
+        self.cache = ResponseCache()
+
+        # Identical GETs made at the same time (or back-to-back) share one response
+        self.flights = SingleFlight()
 
         self.__get_username_password()
 
@@ -121,37 +167,143 @@ class Session(requests.Session):
 
     # --- Overloading ---
 
-    def request(self, method, suburl='', save_cache=True, **kwargs):
+    def request(self, method, suburl='', save_cache=True, priority=None, cache=True, tree=False, **kwargs):
         """ 
         ** Overloading **
         Customise request to default to main Best11 url
         And to raise error status if error occurs.
+
+        GET responses are served from the response cache where possible,
+        and identical GETs in flight at the same time share one response
+        (pass cache=False to force a fresh request).
+        Otherwise, waits for the rate limiter first. The priority class
+        (bidding, daily, analytics) is worked out from the suburl if not given.
+
+        With tree=True, the (decompressed) body is streamed into the lxml parser
+        as it is downloaded, and the tree is attached to the response (see make_tree).
+        This is worth it for the heavy listing pages.
         """
-        response = super().request(
-            method,
-            url=f"{self.MAIN_URL}{suburl}",
-            **kwargs
-        )
-        
-        if not response.ok:
-            response.raise_for_status()
+        params = kwargs.get('params')
+        shareable = cache and method.upper() == 'GET' and not kwargs.get('data')
+
+        if not shareable:
+            response = self.__send(method, suburl, priority, False, tree, **kwargs)
+        elif (cached := self.cache.get(method, suburl, params)) is not None:
+            METRICS.record_cached(method, suburl)
+            return cached
+        else:
+            key = self.cache.make_key(method, suburl, params)
+            response = self.flights.do(key, lambda: self.__send(method, suburl, priority, True, tree, **kwargs))
 
-        # TODO: this may not be necessary
+        # Only marks the session as dirty if the cookies changed.
+        # The session file itself is written at most once per flush interval.
         if save_cache:
-            self.write_session()
+            self.store.track()
             self.logged_in_from_cache = True
 
         return response
 
+    def __send(self, method, suburl, priority, shareable, tree=False, **kwargs):
+        """
+        Makes the request over the network (after waiting for the rate limiter).
+        When replaying a cassette, the recorded response is returned instead.
+        """
+        cassette = self.cassette
+        wait_time = 0
+        start = time.perf_counter()
+        if cassette and cassette.replaying:
+            response = cassette.play(method, suburl, kwargs.get('params'), kwargs.get('data'))
+        else:
+            # Idempotent GETs are retried with backoff on a 5xx or 429, action pages never are.
+            # Every attempt waits for the rate limiter, like the first (which holds them back after a 429)
+            retries = transport.RETRIES if transport.is_retryable(method, suburl) else 0
+            for attempt in range(retries + 1):
+                if attempt:
+                    if response.status_code != transport.TOO_MANY_REQUESTS:
+                        time.sleep(transport.backoff(attempt - 1))
+                    start = time.perf_counter()
+                self.rate_limiter.wait(self.urlData.netloc, priority, suburl)
+                wait_time = time.perf_counter() - start
+                try:
+                    response = super().request(
+                        method,
+                        url=f"{self.MAIN_URL}{suburl}",
+                        stream=tree,
+                        **kwargs
+                    )
+                    if tree:
+                        self.__stream_tree(response)
+                except requests.RequestException:
+                    METRICS.record_request(method, suburl, None, 0, time.perf_counter() - start - wait_time, wait_time)
+                    raise
+                if response.status_code == transport.TOO_MANY_REQUESTS:
+                    self.rate_limiter.penalise(self.urlData.netloc, transport.retry_after(response, attempt))
+                if response.status_code not in transport.RETRY_STATUSES or attempt == retries:
+                    break
+                METRICS.record_request(method, suburl, response.status_code, len(response.content), time.perf_counter() - start - wait_time, wait_time)
+            if cassette:
+                cassette.record(method, suburl, kwargs.get('params'), kwargs.get('data'), response)
+
+        METRICS.record_request(method, suburl, response.status_code, len(response.content), time.perf_counter() - start - wait_time, wait_time)
+        response.metric_key = (method, suburl)
+
+        if not response.ok:
+            response.raise_for_status()
+
+        # Forget pages that this request may have changed, then cache this one
+        self.after_response(method, suburl, kwargs.get('params'), response, shareable)
+        return response
+
+    def __stream_tree(self, response):
+        """
+        Feeds the body into the lxml parser chunk by chunk, as it is downloaded and decompressed.
+        The body is kept as well, for the response cache and cassettes.
+        """
+        parser = lxml.html.HTMLParser(encoding=response.encoding)
+        chunks = []
+        for chunk in response.iter_content(self.chunk_size):
+            chunks.append(chunk)
+            parser.feed(chunk)
+        response._content = b''.join(chunks)
+        response.tree = parser.close()
+
+    def after_response(self, method, suburl, params, response, shareable):
+        """ Updates the response cache and the in-flight requests after a response (sync or async). """
+        if self.cache.changes_state(method, suburl):
+            self.flights.forget()
+        self.cache.invalidate_for(method, suburl)
+        if shareable:
+            self.cache.put(method, suburl, params, response)
+
+    def close(self):
+        """
+        ** Overloading **
+        Flush any pending changes to the session file before closing.
+        Also called when the session is used as a context manager.
+        """
+        self.store.close()
+        super().close()
+
     # --- Saving Session ---
 
+    def has_valid_cookie(self):
+        """
+        Checks that the session's cookie still logs us in, using one cheap request.
+        A logged out user gets redirected away from the club page.
+        r-type: bool
+        """
+        try:
+            response = self.request("GET", "club.php", save_cache=False, cache=False, allow_redirects=False)
+        except requests.RequestException:
+            return False
+        return not response.is_redirect
+
     def write_session(self):
         """ 
-        Saves the instance's session to the instance's session file.
+        Saves the instance's session to the instance's session file straight away.
         This can subsequently be loaded until the session expires 
         """
-        with open(self.fn_session, 'wb') as pf:
-            pickle.dump(self, pf)
+        self.store.flush(force=True)
 
     # --- Logging In ---
 
@@ -176,7 +328,8 @@ class Session(requests.Session):
                         ask_reset = False
             else:
                 self.logged_in = True
-                self.write_session() # Save session to pickle file
+                self.logged_in_at = int(time.time())
+                self.write_session() # Save cookies to session file
                 return True
 
     def __login(self):
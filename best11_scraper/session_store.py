@@ -0,0 +1,156 @@
+"""
+    For persisting the Session to file.
+    Only the cookie jar, username and login time are saved (as JSON),
+    which is all that is needed to warm start a fresh Session.
+
+    Writes are debounced: the session is only marked dirty when its cookies
+    change, and is then written at most once per flush interval (and at exit).
+"""
+
+import atexit
+import json
+import os
+import tempfile
+import time
+
+
+class SessionStore():
+    """
+    Keeps track of changes to a session's cookies and
+    writes the session to its file when needed.
+    """
+
+    # Minimum number of seconds between two writes of the session file
+    flush_interval = 30
+
+    def __init__(self, session, file_name, flush_interval=None):
+        self.session = session
+        self.file_name = file_name
+
+        if flush_interval is not None:
+            self.flush_interval = flush_interval
+
+        # Dirty: cookies have changed since the last write
+        # Used: requests were made since the last write (session still alive)
+        self.dirty = False
+        self.used = False
+        self.last_flushed = time.monotonic()
+        self.fingerprint = self.__cookie_fingerprint()
+
+        # Do not lose pending changes when the program exits
+        atexit.register(self.close)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} (file: {self.file_name}, dirty: {self.dirty})"
+
+    def __cookie_fingerprint(self):
+        """ Returns a hashable summary of the session's cookies.
+        r-type: tuple """
+        return tuple(sorted((c.domain, c.path, c.name, c.value) for c in self.session.cookies))
+
+    def track(self):
+        """
+        Called after every request.
+        Marks the store as dirty if the cookies have changed,
+        then flushes if the flush interval has elapsed.
+        """
+        self.used = True
+
+        fingerprint = self.__cookie_fingerprint()
+        if fingerprint != self.fingerprint:
+            self.fingerprint = fingerprint
+            self.dirty = True
+
+        if self.dirty and time.monotonic() - self.last_flushed >= self.flush_interval:
+            self.flush()
+
+    def flush(self, force=False):
+        """
+        Writes the session to file if it is dirty (or if forced).
+        r-type: bool - True if the file was written
+        """
+        if not (self.dirty or force):
+            return False
+
+        self.write()
+        self.dirty = False
+        self.used = False
+        self.last_flushed = time.monotonic()
+        return True
+
+    def close(self):
+        """
+        Flushes any pending changes.
+        If the session has been used but its cookies haven't changed,
+        the file is only touched so that it doesn't appear to have expired.
+        """
+        if self.flush():
+            return
+        if self.used and os.path.exists(self.file_name):
+            os.utime(self.file_name)
+            self.used = False
+
+    # --- Reading/Writing ---
+
+    def to_dict(self):
+        """ Returns the parts of the session worth saving.
+        r-type: dict """
+        return {
+            'username': self.session.username,
+            'logged_in_at': self.session.logged_in_at,
+            'cookies': [self.__cookie_to_dict(c) for c in self.session.cookies]
+        }
+
+    @staticmethod
+    def __cookie_to_dict(cookie):
+        return {
+            'name': cookie.name,
+            'value': cookie.value,
+            'domain': cookie.domain,
+            'path': cookie.path,
+            'expires': cookie.expires,
+            'secure': cookie.secure
+        }
+
+    def read(self):
+        """ Returns the contents of the session file, or False if it can't be read.
+        r-type: dict """
+        try:
+            with open(self.file_name) as jf:
+                return json.load(jf)
+        except (OSError, ValueError):
+            return False
+
+    def restore(self):
+        """
+        Loads the saved cookies into the session.
+        The saved session is ignored if it belongs to another user.
+        r-type: bool - True if cookies were loaded
+        """
+        data = self.read()
+        if not data or data.get('username') != self.session.username or not data.get('cookies'):
+            return False
+
+        for cookie in data['cookies']:
+            self.session.cookies.set(**cookie)
+        self.session.logged_in_at = data.get('logged_in_at')
+
+        # Nothing has changed relative to the file
+        self.fingerprint = self.__cookie_fingerprint()
+        self.dirty = False
+        return True
+
+    def write(self):
+        """
+        Writes the session atomically:
+        dumps to a temp file in the same directory, then renames it over the session file.
+        """
+        directory = os.path.dirname(os.path.abspath(self.file_name))
+        fd, temp_name = tempfile.mkstemp(dir=directory, prefix='.session_', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as jf:
+                json.dump(self.to_dict(), jf)
+            os.replace(temp_name, self.file_name)
+        except:
+            os.remove(temp_name)
+            raise
@@ -0,0 +1,150 @@
+"""
+    Request coalescing ("single flight").
+    When identical GETs are made at the same time (or back-to-back, within a short window),
+    only the first one goes to the network; the others share its response object.
+    Works for both the sync Session (threads) and the AsyncSession (asyncio).
+"""
+
+import asyncio
+import threading
+import time
+
+
+class Flight():
+    """ A single call, which other callers can wait on. """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.future = None
+        self.result = None
+        self.error = None
+        self.finished = None
+        # The leader was interrupted (e.g. cancelled) before the call finished, so followers make it again
+        self.abandoned = False
+
+    def finish(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.finished = time.monotonic()
+        self.event.set()
+        if self.future is not None and not self.future.done():
+            if error is not None:
+                self.future.set_exception(error)
+            else:
+                self.future.set_result(result)
+
+    def abandon(self):
+        self.abandoned = True
+        self.finished = time.monotonic()
+        self.event.set()
+        if self.future is not None and not self.future.done():
+            self.future.set_result(None)
+
+    def outcome(self):
+        """ Returns the result of the call, or raises its error. """
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight():
+    """ Shares the result of identical calls which are in flight, or finished less than <window> seconds ago. """
+
+    # Seconds for which a finished call's result is still shared
+    window = 2.0
+
+    def __init__(self, window=None):
+        if window is not None:
+            self.window = window
+
+        # {key: Flight}
+        self.flights = {}
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} (window: {self.window}s, flights: {len(self.flights)})"
+
+    def __join(self, key):
+        """
+        Returns (flight, leader). The leader is the caller who has to make the call.
+        Finished flights older than the window are replaced.
+        """
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight and flight.finished is not None and time.monotonic() - flight.finished > self.window:
+                flight = None
+            if flight:
+                return flight, False
+            flight = self.flights[key] = Flight()
+            return flight, True
+
+    def __land(self, key, flight, result=None, error=None, abandoned=False):
+        """
+        Finishes the flight. Failed and abandoned flights are removed so that the next caller tries again.
+        Followers of an abandoned flight try again too.
+        """
+        if error is not None or abandoned:
+            with self.lock:
+                if self.flights.get(key) is flight:
+                    del self.flights[key]
+        if abandoned:
+            flight.abandon()
+        else:
+            flight.finish(result, error)
+
+    def do(self, key, func):
+        """ Calls func(), unless an identical call is in flight/recent, in which case its result is shared. """
+        while True:
+            flight, leader = self.__join(key)
+            if leader:
+                break
+            flight.event.wait()
+            if not flight.abandoned:
+                return flight.outcome()
+
+        try:
+            result = func()
+        except Exception as e:
+            self.__land(key, flight, error=e)
+            raise
+        except BaseException:
+            # e.g. KeyboardInterrupt. Not an outcome of the call, so it isn't shared
+            self.__land(key, flight, abandoned=True)
+            raise
+        self.__land(key, flight, result)
+        return result
+
+    async def do_async(self, key, coro_func):
+        """ Async equivalent of do(). coro_func is called to get the coroutine to await. """
+        while True:
+            flight, leader = self.__join(key)
+            if leader:
+                break
+            if not flight.event.is_set():
+                if flight.future is None:
+                    # Led by a sync caller in another thread
+                    await asyncio.get_running_loop().run_in_executor(None, flight.event.wait)
+                else:
+                    await asyncio.shield(flight.future)
+            if not flight.abandoned:
+                return flight.outcome()
+
+        flight.future = asyncio.get_running_loop().create_future()
+        try:
+            result = await coro_func()
+        except Exception as e:
+            self.__land(key, flight, error=e)
+            # Followers have the error. Stop asyncio complaining if nobody was waiting
+            flight.future.exception()
+            raise
+        except BaseException:
+            # e.g. the leader's task was cancelled. Not an outcome of the call, so it isn't shared
+            self.__land(key, flight, abandoned=True)
+            raise
+        self.__land(key, flight, result)
+        return result
+
+    def forget(self):
+        """ Drops every flight (e.g. after an action which may change the pages). """
+        with self.lock:
+            self.flights.clear()
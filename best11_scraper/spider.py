@@ -10,17 +10,20 @@ import re
 import json
 
 # Local imports
-from session import make_soup, Session
+from session import make_soup, make_tree
+from context import CONTEXT
 from exceptions import ArguuemntException
+from reference import ActiveManagers, WealthRanks
+from clock import GameClock
 import util
 from util import TimeZones as tz
 
 class Best11():
 
     # Files
+    fn_club_index = "session_files/club_index.json"
     fn_active_managers = "session_files/active_managers.json"
     fn_wealth_100 = "session_files/wealth_100.json"
-    fn_next_match = "session_files/next_match.json"
 
     # Names of player positions within the game
     player_positions = ('Goalkeeper', 'Defender', 'Midfielder', 'Striker')
@@ -28,13 +31,21 @@ class Best11():
     # For making requests to change tactics
     tactic_positions = ('G' 'D', 'M', 'A')
 
-    def __init__(self, session=Session.load_session()):
+    def __init__(self, context=None):
         
-        self.session = session
+        # Shared objects (session, user club...) are created lazily by the context
+        self.context = context if context else CONTEXT
         
-        # Apply updates to files
-        util.apply_update_timeago(self.fn_active_managers, self.__get_active_managers, days=1)
-        util.apply_update_timeago(self.fn_wealth_100, self.__get_wealthiest_clubs, minutes=30)      
+        # Apply updates to files (only checked once per run by the context)
+        # Active managers are taken from the club index, so it's updated first
+        self.context.ensure_updated(self.fn_club_index, self.__get_club_index, days=1)
+        self.context.ensure_updated(self.fn_active_managers, self.__get_active_managers, days=1)
+        self.__update_wealth_100()
+
+    @property
+    def session(self):
+        """ The session used to make requests. Logs in on first use. """
+        return self.context.session
 
     def welcome(self):
         local_time = tz.to_string(pendulum.now(tz=tz.local))
@@ -47,35 +58,60 @@ class Best11():
     def current_season(self):
         """ Returns the current season in best11. 
         r-type: int """
-        return self.get_season_week()[0]
+        return self.context.clock.season_week[0]
 
     @property
     def current_week(self):
         """ Returns the current week in best11.
         r-type: int """
-        return self.get_season_week()[1]
+        return self.context.clock.season_week[1]
 
     @property
     def active_managers(self):
         """ Returns the corresponding club_id for every active manager in the game
         r-type: list. """
-        with open(self.fn_active_managers) as jf:
-            active_managers = json.load(jf)
-        return active_managers
+        return self.context.load_dataset(self.fn_active_managers)
 
     @property
     def active_club_ids(self):
-        return [i['club_id'] for i in self.active_managers]
+        """ r-type: frozenset """
+        return self.context.dataset(self.fn_active_managers).view(ActiveManagers).club_ids
+
+    @property
+    def active_clubs(self):
+        """ The names of the clubs of active managers. r-type: frozenset """
+        return self.context.dataset(self.fn_active_managers).view(ActiveManagers).clubs
+
+    def __update_wealth_100(self):
+        """ Wealth changes quickly, so the file is checked again whenever it could be stale (e.g. during a long bidding loop). """
+        self.context.ensure_updated(self.fn_wealth_100, self.__get_wealthiest_clubs, minutes=30)
 
     @property
     def wealth_100(self):
-        with open(self.fn_wealth_100) as jf:
-            wealth_100 = json.load(jf)
-        return wealth_100
+        """ Returns the club_id for each of the wealthiest 100 clubs
+        r-type: dict """
+        self.__update_wealth_100()
+        return self.context.load_dataset(self.fn_wealth_100)
+
+    @property
+    def wealth_ranks(self):
+        """ The wealth rank of each of the wealthiest 100 clubs
+        r-type: dict {club_id: rank} """
+        self.__update_wealth_100()
+        return self.context.dataset(self.fn_wealth_100).view(WealthRanks).ranks
 
     def get_season_week(self):
         """ 
         Returns the current season and week of play
+        Cached by the game clock until they next change
+        r-type: tuple
+        r-format: (season, week); (int, int)
+        """
+        return self.context.clock.season_week
+
+    def fetch_season_week(self):
+        """ 
+        Fetches the current season and week of play (see get_season_week)
         r-type: tuple
         r-format: (season, week); (int, int)
         """
@@ -121,67 +157,116 @@ class Best11():
             return active_managers
         return False
 
-    def __get_active_managers(self):
+    def __get_club_index(self):
         """
-        Returns a dict containing active managers and their names
+        Returns an index of every club, built from the listing of every manager.
+        Club names and managers are lowercase in the lookups, since case doesn't matter.
         r-type: dict
-        r-format: {club_id: 200, club: 'Solent City', manager: 'callumEvans'}
-        """    
+        r-format: {
+            'club_ids': {club: club_id},
+            'manager_club_ids': {manager: club_id},
+            'club_names': {club_id: club},
+            'managers': [{club_id: 200, club: 'Solent City', manager: 'callumEvans', last_login: '2021-03-01 ...'}, ...]
+        }
+        """
 
         # Make post request via Community > Users > Search > Search by manager
+        # The listing of every manager is huge, so it's parsed as it streams in
         request = self.session.request(
             "POST",
             "useri.php?",
             params = {'pag': 'cauta'},
-            data = {'cautare': 2, 'manager': ''} # Leave manager blank - shows all
+            data = {'cautare': 2, 'manager': ''}, # Leave manager blank - shows all
+            tree = True
         )
-        soup = make_soup(request)
+        tree = make_tree(request)
 
         # Grab the table containing table rows, which each contain data for...
         # User, Action, Club, Last Login
-        table = soup.find_all('table')[2]
-        table_rows = table.find_all('tr')[1:]        
+        table = tree.xpath('(//table)[3]')[0]
+        table_rows = table.xpath('.//tr')[1:]
+
+        def get_manager(tr):
+            """
+            Get the information about a single manager based on the row.
+            Returns None for a row which can't be parsed (e.g. a deleted manager, with no club)
+            """
+            try:
+                manager = tr.xpath('.//b')[0].text_content()
+                club_link = tr.xpath('.//a[contains(@href, "vizualizare_club.php?")]')[0]
+                club_name = club_link.text_content()
+                club_id = util.get_id_from_href(club_link.get('href'))
+                last_login = tr.xpath('.//i')[-1].text_content()
+            except (IndexError, ValueError, TypeError, AttributeError):
+                return None
+
+            return {'club_id': club_id, 'club': club_name, 'manager': manager, 'last_login': last_login}
+
+        # Odd rows are skipped, rather than failing the whole index (and every club lookup with it)
+        managers = [i for i in map(get_manager, table_rows) if i is not None]
+        return {
+            'club_ids': {i['club'].lower(): i['club_id'] for i in managers},
+            'manager_club_ids': {i['manager'].lower(): i['club_id'] for i in managers},
+            # JSON keys are strings
+            'club_names': {str(i['club_id']): i['club'] for i in managers},
+            'managers': managers
+        }
+
+    @property
+    def club_index(self):
+        """ The index of every club (see __get_club_index). r-type: dict """
+        return self.context.load_dataset(self.fn_club_index)
+
+    def __get_active_managers(self):
+        """
+        Returns a dict containing active managers and their names
+        Taken from the club index, so the listing of every manager is only downloaded once
+        r-type: dict
+        r-format: {club_id: 200, club: 'Solent City', manager: 'callumEvans'}
+        """    
 
         # Manager considered inactive if last_logged_in before target_dt
         server_time = pendulum.now(tz=tz.server)
         target_dt = server_time.subtract(days=7)
 
-        def is_active(tr):
+        def is_active(manager):
             # Get last logged in
-            last_logged_in = tr.find_all('i')[-1].text
+            last_logged_in = manager['last_login']
 
             # Bypass weird Best11 error wherby the year is 0 
             # NOTE These managers are no longer active regardless.
-            year = int(last_logged_in.split('-')[0])
-            if year == 0:
+            try:
+                year = int(last_logged_in.split('-')[0])
+                if year == 0:
+                    return False
+
+                # Convert to pendulum.datetime
+                last_logged_in = pendulum.parse(last_logged_in, tz=tz.server)
+            except ValueError:
+                # Not a date, so not someone who has logged in lately
                 return False
-
-            # Convert to pendulum.datetime
-            last_logged_in = pendulum.parse(last_logged_in, tz=tz.server)
             if last_logged_in < target_dt:
                 # Manager is inactive
                 return False
             return True
 
-        def get_manager(tr):
-            """
-            Get the information about a single manager based on the row.
-            """
-            # Manager is active. Get their information.
-            manager = tr.find('b').text
-            club_link = tr.find('a', href=re.compile(r"vizualizare_club.php\?"))
-            club_name = club_link.text
-            club_id = util.get_id_from_href(club_link.get('href'))
-            
-            return {'club_id': club_id, 'club': club_name, 'manager': manager}
-
-        managers = [get_manager(i) for i in table_rows if is_active(i)]
+        managers = [{k: i[k] for k in ('club_id', 'club', 'manager')} for i in self.club_index['managers'] if is_active(i)]
         return managers
 
     def get_next_match(self, string=True):
+        """
+        Returns the date of the user's next match
+        Cached by the game clock until it kicks off
+        """
+        dt = self.context.clock.next_match
+        if string: dt = dt.format('dddd Do [of] MMMM h:mm A')
+        return dt
+
+    def fetch_next_match(self):
         """
         Goes to the schedule page
         Grabs the dat of the first match that has '-' for its result (i.e. has not yet been played)
+        r-type: pendulum.DateTime
         """
         # Make request to schedule page
         request = self.session.request("GET", "meciuri.php")
@@ -196,10 +281,8 @@ class Best11():
         # Get the date
         date = tr.find('td').text
 
-        # Convert to dt object
-        dt = pendulum.from_format(date, "YYYY-MM-DD", tz=tz.server).set(hour=17, minute=45)
-        # Set hour to match_start time
-        if string: dt = dt.format('dddd Do [of] MMMM h:mm A')
+        # Convert to dt object, at the match start time
+        dt = pendulum.from_format(date, "YYYY-MM-DD", tz=tz.server).set(**GameClock.match_slot)
         return dt
 
     # -- Getting club_id --
@@ -211,12 +294,38 @@ class Best11():
     def club_id_from_club(self, club):
         """
         Given a club name, returns the club's id
+        Looked up in the club index, or searched for if the club isn't in it (e.g. it's new since the index was built)
         r-type: int
 
         Parameters:
             - club (str) - case doesn't matter
         """
+        if (club_id := self.club_index['club_ids'].get(club.lower())) is not None:
+            return club_id
+        return self.__search_club_id_from_club(club)
+
+    def club_id_from_manager(self, manager):
+        """
+        Given a manager's name, returns their club's id
+        Looked up in the club index, or searched for if the manager isn't in it
+        r-type: int
 
+        Parameters:
+            - manager (str) - case doesn't matter
+        """
+        if (club_id := self.club_index['manager_club_ids'].get(manager.lower())) is not None:
+            return club_id
+        return self.__search_club_id_from_manager(manager)
+
+    def club_from_club_id(self, club_id):
+        """
+        Given a club's id, returns the club's name (or False if it isn't in the club index)
+        r-type: str
+        """
+        return self.club_index['club_names'].get(str(club_id), False)
+
+    def __search_club_id_from_club(self, club):
+        """ Searches for a club by name. r-type: int """
         club = club.lower() # Ensure lowercase club parameter
         request = self.session.request(
             "POST",
@@ -247,15 +356,8 @@ class Best11():
             index += 1
         return False
 
-    def club_id_from_manager(self, manager):
-        """
-        Given a manager's name, returns their club's id
-        r-type: int
-
-        Parameters:
-            - manager (str) - case doesn't matter
-        """
-
+    def __search_club_id_from_manager(self, manager):
+        """ Searches for a manager by name. r-type: int """
         manager = manager.lower() # Ensure lowercase club parameter
         request = self.session.request(
             "POST",
@@ -0,0 +1,200 @@
+"""
+    Persistent store of player snapshots (SQLite), kept between runs.
+
+    Each player's latest snapshot (and, for the user's players, profile) is kept with the time it was fetched.
+    Fields are grouped into classes which go stale at different rates:
+    e.g. a player's nationality never changes, their age and salary change once a season and their energy hourly.
+    A stored page is fresh enough if it is younger than the staleness of every field class needed from it,
+    so bulk loaders (see PlayerRepository) only request the pages (player page, profile page) whose needed fields are stale.
+    Callers should name the fields they read: every field (the default) includes energy, so is only fresh for an hour.
+
+    e.g.
+        store.stale([234841, 302424], fields=('age', 'skill')) -> [302424]
+        store.stale(squad_ids, fields=('skill', 'potential'), profile=True) -> []   # Potentials are kept for a month
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+# Local imports
+from player import PlayerSnapshot
+import schemas
+
+
+# Seconds after which each class of field is stale
+STALENESS = {
+    'static': 30*24*60*60,
+    'seasonal': 7*24*60*60,
+    'progress': 3*24*60*60,
+    'career': 24*60*60,
+    'condition': 60*60,
+}
+
+# The class of each field of a snapshot (and of a profile)
+FIELD_CLASSES = {
+    'static': ('player_id', 'player_name', 'picture', 'position', 'nat', 'boots', 'fixed', 'potential', 'renamable'),
+    # Change when a new season starts
+    'seasonal': ('age', 'salary'),
+    # Change gradually, with training and matches
+    'progress': ('skill', 'exp', 'value'),
+    'career': ('club', 'club_id', 'listed', 'goals', 'mom'),
+    'condition': ('injured', 'energy', 'morale', 'morale_precise', 'extra_trainable', 'trained_today'),
+}
+FIELD_CLASS = {field: field_class for field_class, fields in FIELD_CLASSES.items() for field in fields}
+
+# The fields which come from the profile page, rather than the player's page
+PROFILE_FIELDS = frozenset(schemas.PROFILE.fields)
+
+
+def max_age(fields=None):
+    """
+    Returns the number of seconds for which the given fields (default: every field) stay fresh.
+    If no fields are given (e.g. none are needed from a page), the page stays fresh as long as the static fields.
+    """
+    if fields is None:
+        return min(STALENESS.values())
+    if (unknown := [i for i in fields if i not in FIELD_CLASS]):
+        raise ValueError(f"Unknown fields: {unknown}\nMust be stored fields, i.e. in {tuple(FIELD_CLASS)}")
+    return min((STALENESS[FIELD_CLASS[i]] for i in fields), default=max(STALENESS.values()))
+
+def split_fields(fields=None):
+    """ Returns the fields needed from the player's page and from the profile page. r-type: tuple (list or None, list or None) """
+    if fields is None:
+        return None, None
+    return [i for i in fields if i not in PROFILE_FIELDS], [i for i in fields if i in PROFILE_FIELDS]
+
+
+def encode(fields):
+    return json.dumps(fields)
+
+def decode(text):
+    """ Decodes stored fields. JSON has no tuples, so lists are turned back into tuples. r-type: dict """
+    return {k: tuple(v) if isinstance(v, list) else v for k, v in json.loads(text).items()}
+
+
+class PlayerStore():
+    """ Player snapshots and profiles, keyed by player id, with the time they were fetched. """
+
+    # Files
+    fn_store = "session_files/players.sqlite3"
+
+    def __init__(self, file_name=None):
+        self.file_name = file_name if file_name else self.fn_store
+        self.connection = sqlite3.connect(self.file_name, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS players (
+                    player_id INTEGER PRIMARY KEY,
+                    snapshot TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    profile TEXT,
+                    profile_fetched_at REAL
+                )
+            """)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} (file: {self.file_name}, players: {len(self)})"
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM players").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+    def get_many(self, player_ids, fields=None, profile=False, now=None):
+        """
+        Returns the stored pages of each player which are fresh for the given fields:
+        the snapshot if the fields of the player's page are, and (with profile=True) the profile fields if the profile's are.
+        Players with nothing fresh are left out.
+        r-type: dict {player_id: (snapshot or None, profile fields or None)}
+        """
+        player_ids = list(player_ids)
+        if not player_ids:
+            return {}
+        now = now if now is not None else time.time()
+        page_fields, profile_fields = split_fields(fields)
+        oldest = now - max_age(page_fields)
+        oldest_profile = now - max_age(profile_fields)
+
+        query = f"SELECT player_id, snapshot, fetched_at, profile, profile_fetched_at FROM players WHERE player_id IN ({','.join('?' * len(player_ids))})"
+        with self.lock:
+            rows = self.connection.execute(query, [int(i) for i in player_ids]).fetchall()
+
+        results = {}
+        for player_id, snapshot, fetched_at, stored_profile, profile_fetched_at in rows:
+            snapshot = self.__snapshot(snapshot) if fetched_at >= oldest else None
+            if not profile or stored_profile is None or profile_fetched_at < oldest_profile:
+                stored_profile = None
+            else:
+                stored_profile = decode(stored_profile)
+            if snapshot is not None or stored_profile is not None:
+                results[player_id] = (snapshot, stored_profile)
+        return results
+
+    @staticmethod
+    def __snapshot(text):
+        try:
+            return PlayerSnapshot(**decode(text))
+        except KeyError:
+            # Stored before a field was added to the snapshot, so it must be fetched again
+            return None
+
+    def get(self, player_id, fields=None, profile=False):
+        """ Returns (snapshot or None, profile fields or None) for a player, or None if nothing is fresh. """
+        return self.get_many([player_id], fields, profile).get(int(player_id))
+
+    def stale(self, player_ids, fields=None, profile=False):
+        """ Returns the ids of the players which would need fetching again (either page). r-type: list """
+        fresh = self.get_many(player_ids, fields, profile)
+        stale_ids = []
+        for player_id in player_ids:
+            snapshot, stored_profile = fresh.get(int(player_id), (None, None))
+            if snapshot is None or (profile and stored_profile is None):
+                stale_ids.append(player_id)
+        return stale_ids
+
+    def put_many(self, entries, now=None):
+        """
+        Stores freshly fetched players.
+        Parameters:
+            entries (iterable) - (snapshot, profile fields or None). A stored profile is kept if None is given.
+        """
+        now = now if now is not None else time.time()
+        rows = [
+            (int(snapshot.player_id), encode(snapshot.to_dict()), now, encode(profile) if profile is not None else None, now if profile is not None else None)
+            for snapshot, profile in entries
+        ]
+        with self.lock, self.connection:
+            self.connection.executemany("""
+                INSERT INTO players (player_id, snapshot, fetched_at, profile, profile_fetched_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(player_id) DO UPDATE SET
+                    snapshot = excluded.snapshot,
+                    fetched_at = excluded.fetched_at,
+                    profile = COALESCE(excluded.profile, players.profile),
+                    profile_fetched_at = COALESCE(excluded.profile_fetched_at, players.profile_fetched_at)
+            """, rows)
+
+    def put(self, snapshot, profile=None):
+        self.put_many([(snapshot, profile)])
+
+    def put_profiles(self, profiles, now=None):
+        """
+        Stores freshly fetched profiles of players whose snapshot is already stored (and still fresh).
+        Parameters:
+            profiles (dict) - {player_id: profile fields}
+        """
+        now = now if now is not None else time.time()
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "UPDATE players SET profile = ?, profile_fetched_at = ? WHERE player_id = ?",
+                [(encode(profile), now, int(player_id)) for player_id, profile in profiles.items()]
+            )
+
+    def invalidate(self, player_id):
+        """ Forgets a player, e.g. after an action that changed them (training, a chat). """
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM players WHERE player_id = ?", (int(player_id),))
@@ -0,0 +1,548 @@
+"""
+    A local stand-in for best11.org, for load and integration testing.
+
+    Serves generated pages laid out the way the scraper expects them
+    (same table indices, links and text patterns) for the pages this project scrapes,
+    with deterministic player/club data, simple game state (bids, training, chats),
+    configurable latency, error injection and rate-limit (429) responses.
+    Real pages saved as <fixtures_dir>/<page>.html are served instead of generated ones.
+
+    Usage:
+        python stub_server.py --port 8011 --latency 0.05 --error-rate 0.01 --max-rps 20
+
+    Then point the session at it:
+        Session.set_main_url("http://127.0.0.1:8011/")
+"""
+
+import argparse
+import gzip
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pendulum
+
+# Local imports
+from util import TimeZones as tz
+
+
+POSITIONS = ('Goalkeeper', 'Defender', 'Midfielder', 'Striker')
+NATIONALITIES = ('ENG', 'ROM', 'ESP', 'ITA', 'GER', 'FRA', 'POR', 'BRA')
+WEATHERS = ('sunny', 'rainy', 'cloudy', 'snowy')
+
+# Players with an id above this are on the transfer list
+LISTED_FROM = 900000
+
+
+# --- HTML helpers ---
+
+def money(amount):
+    """ Formats an amount in C the way Best11 does (e.g. 1244505 -> '1.244.505 C'). """
+    return f"{int(amount):,} C".replace(',', '.')
+
+def tr(*cells):
+    return "<tr>" + "".join(f"<td>{c}</td>" for c in cells) + "</tr>"
+
+def table(*rows, attrs=''):
+    return f"<table {attrs}>" + "".join(rows) + "</table>"
+
+def filler(n=1):
+    """ Tables that are on the real page but not scraped. """
+    return "".join(table(tr("&nbsp;")) for _ in range(n))
+
+def page(*parts):
+    return "<html><head><title>Best11</title></head><body>" + "".join(parts) + "</body></html>"
+
+
+# --- Game data ---
+
+class GameData():
+    """ Deterministic data for the stand-in game, plus the state changed by actions. """
+
+    def __init__(self, clubs=200, squad_size=30, search_size=500, seed=11):
+        self.clubs = clubs
+        self.squad_size = squad_size
+        self.search_size = search_size
+        self.seed = seed
+
+        # State changed by actions
+        self.lock = threading.Lock()
+        self.bids = {}          # {player_id: (offer, bidder)}
+        self.trained = set()    # player_ids trained today
+        self.extra_trained = set()
+        self.chatted = set()
+
+    def rng(self, *key):
+        """ Returns a generator seeded by the key. Seeded with a string, since str hashes change per process """
+        return random.Random(":".join(map(str, (self.seed, *key))))
+
+    def club_name(self, club_id):
+        return f"Club {club_id}"
+
+    def manager(self, club_id):
+        return f"manager{club_id}"
+
+    def squad(self, club_id):
+        """ Returns the player_ids of a club, ordered by position. """
+        ids = [club_id * 1000 + k for k in range(1, self.squad_size + 1)]
+        return sorted(ids, key=lambda i: self.player(i)['position'])
+
+    def player(self, player_id):
+        """ Returns the data for a player. r-type: dict """
+        rng = self.rng('player', player_id)
+        skills = [round(rng.uniform(40, 95), 1) for _ in range(3)]
+        talent = rng.choice((0.04, 0.048, 0.056, 0.064, 0.08))
+        club_id = player_id // 1000 if player_id < LISTED_FROM else rng.randint(1, self.clubs)
+        return {
+            'id': player_id,
+            'name': f"Player {player_id}",
+            'club_id': club_id,
+            'club': self.club_name(club_id),
+            'position': rng.randint(0, 3),
+            'age': rng.randint(17, 35),
+            'skills': skills,
+            'potentials': [min(99, round(s + rng.choice((0, rng.uniform(0, 15))), 1)) for s in skills],
+            'salary': sum(skills) * talent * 1000,
+            'value': sum(skills) ** 2 * rng.uniform(10, 30),
+            'exp': rng.randint(0, 500),
+            'nat': rng.choice(NATIONALITIES),
+            'goals': (rng.randint(0, 10), rng.randint(10, 100)),
+            'mom': (rng.randint(0, 3), rng.randint(3, 20)),
+            'energy': rng.randint(50, 100),
+            'morale': rng.randint(60, 100),
+            'fixed': [rng.randint(1, 5) for _ in range(5)],
+            'listed': player_id >= LISTED_FROM
+        }
+
+    def last_login(self, club_id):
+        days_ago = self.rng('login', club_id).randint(0, 14)
+        return pendulum.now(tz=tz.server).subtract(days=days_ago).format('YYYY-MM-DD HH:mm:ss')
+
+
+# --- Pages ---
+
+class Pages():
+    """ Generates each page. Methods are named after the page's suburl. """
+
+    def __init__(self, data):
+        self.data = data
+
+    def player_tables(self, player):
+        """ The tables of a player's page (vizualizare_jucator.php). """
+        p = player
+        tables = [
+            filler(2),
+            table(tr("Player", f"{p['name']} [ID: {p['id']}]", f"<a href='vizualizare_club.php?id={p['club_id']}'>{p['club']}</a>")),
+            filler(),
+            table(tr("".join(f"<img src='imagini/jucatori/{i}_{p['id'] % 9}.png'>" for i in ('face', 'hair', 'eyes')))),
+        ]
+        if p['listed']:
+            offer, bidder = self.data.bids.get(p['id'], (p['value'] / 10, 'Bank'))
+            deadline = pendulum.now(tz=tz.server).add(minutes=10).format('YYYY-MM-DD HH:mm:ss')
+            tables += [
+                table(tr(f"Current offer: {money(offer)}", f"<a href='vizualizare_club.php?id=1'>{bidder}</a>", f"Deadline: <b>{deadline}</b>")),
+                filler(2)
+            ]
+        tables += [
+            table(tr(f"<b>{POSITIONS[p['position']]}</b>")),
+            table(tr(f"Age: <b>{p['age']}</b>")),
+            table(tr("Salary"), tr(money(p['salary']))),
+            table(tr("Value"), tr(money(p['value']))),
+            table(tr("Experience"), tr(f"{p['exp']}/500")),
+            filler(),
+            table(tr("Nationality"), tr(f"<a href='#'><img src='imagini/steaguri/{p['nat']}.gif'></a>")),
+            table(tr("Boots"), tr("<a href='#'><img src='imagini/ghete/BLACK.gif'></a>")),
+            filler(),
+            table(tr("Goals", "MOM"), tr(f"<b>{p['goals'][0]}</b> / <b>{p['goals'][1]}</b>", f"<b>{p['mom'][0]}</b> / <b>{p['mom'][1]}</b>")),
+            filler(),
+            *[table(tr("Skill"), tr(f"{s}")) for s in p['skills']],
+            table(tr("Energy"), tr(f"{p['energy']}%")),
+            table(tr("Morale"), tr(f"<img src='imagini/moral_{min(5, p['morale'] // 20 + 1)}.gif'>")),
+            filler(2),
+            *[table(tr("Fixed"), tr(f"<img src='imagini/fixe_{f}.gif'>")) for f in p['fixed']],
+            filler()
+        ]
+        return tables
+
+    def vizualizare_jucator(self, params, form):
+        player_id = int(params.get('id', 0))
+        if not player_id:
+            return page(table(tr("Player not found")))
+        return page(*self.player_tables(self.data.player(player_id)))
+
+    def profil(self, params, form):
+        player_id = int(params.get('id', 0))
+        p = self.data.player(player_id)
+
+        if 'antrenament' in params and player_id in self.data.trained:
+            return page(table(tr("<font color='red'>This player has already been trained today</font>")))
+
+        morale_table = table(tr("Morale"), tr(f"<a onmouseover=\"popup('{p['morale']}%','#f1f1f1')\">Morale</a>"))
+        tables = self.player_tables(p)
+        # The morale table sits at index 20 (23 for listed players), as on the real profile page
+        index = 20 if not p['listed'] else 23
+        tables = "".join(tables)
+        parts = re.split(r"(?=<table)", tables)[1:]
+        parts[index] = morale_table
+
+        potentials = "".join(f"<font color='#547B22'>{i}</font>" for i in p['potentials'])
+        links = ""
+        if player_id not in self.data.extra_trained:
+            links += f"<a href='extra_practice.php?id={player_id}'>Extra practice</a>"
+        links += f"<a href='schimba_nume.php?id={player_id}'>Change name</a>"
+        return page(*parts, potentials, links)
+
+    def vizualizare_jucatori(self, params, form):
+        """ A club's squad. Each player row contains an (empty, nested) table, as on the real page. """
+        club_id = int(params.get('id', 1))
+        squad = [self.data.player(i) for i in self.data.squad(club_id)]
+        tables = [filler()]
+        for position in range(4):
+            players = [p for p in squad if p['position'] == position]
+            rows = [tr(POSITIONS[position])] + [
+                f"<tr><td><a href='#'>*</a><a href='vizualizare_jucator.php?id={p['id']}'>{p['name']}</a></td><td><table></table></td></tr>"
+                for p in players
+            ]
+            tables += [table(*rows), filler()]
+        return page(*tables)
+
+    def vizualizare_club(self, params, form):
+        club_id = int(params.get('id', 1))
+        name, manager = self.data.club_name(club_id), self.data.manager(club_id)
+        rng = self.data.rng('club', club_id)
+
+        if club_id == 1:
+            # The user's club
+            links = f"<a href='#'>{manager}</a><a href='#'>England</a><a href='campionat.php?id=5'>League</a>"
+            user_input = "<input name='user' value='1001'>"
+        else:
+            links = (f"<a href='#'>{manager}</a><a href='mesaje.php?catre={club_id + 1000}'>Message</a>"
+                f"<a href='#'>Guestbook</a><a href='#'>England</a><a href='campionat.php?id={club_id % 20 + 1}'>League</a>")
+            user_input = ""
+
+        return page(
+            table(tr("Motto"), tr("<i>Onwards and upwards</i>")),
+            table(tr("Avatar"), tr("&nbsp;"), tr("<img src='imagini/avatar/standard.jpg'>")),
+            filler(),
+            table(tr("Club"), tr(f"<font>Club</font><font>{name}</font>{links}<b>{rng.randint(0, 500)}%</b>")),
+            filler(),
+            table(tr("<img src='imagini/echipament/home.gif'><img src='imagini/echipament/away.gif'>"
+                "<img src='imagini/sponsori/nike.gif'><img src='imagini/sponsori/adidas.gif'>")),
+            filler(2),
+            f"<table><tr><td>Stadium</td><td><b>{money(rng.choice((10000, 25000, 40000)))[:-2]}</b></td></tr></table>",
+            filler(3),
+            table(tr("Objective"), tr("Top 3")),
+            user_input
+        )
+
+    def club(self, params, form):
+        """ The user's club page (club.php). """
+        return page(
+            filler(8),
+            table(tr("Pitch <b>Grass</b> <b>90%</b>")),
+            filler(),
+            table(tr("Fans <b>5000</b> <a onmouseover=\"popup('Mood: 85%','#f1f1f1')\">Mood</a>")),
+            filler(9),
+            table(tr("Credits", money(1234567), "<img src='imagini/bonus.gif'>")),
+            filler(),
+            table(tr("Training Points", "350.000 TP")),
+            filler(2)
+        )
+
+    def useri(self, params, form):
+        """ Manager/club search results. A blank manager lists every manager. """
+        clubs = range(1, self.data.clubs + 1)
+        manager = form.get('manager', '').lower()
+        club_name = form.get('denumire_club', '').lower()
+
+        if form.get('cautare') == '2' and manager:
+            found = [c for c in clubs if self.data.manager(c) == manager]
+            # Any other manager is the user (club 1)
+            rows = [(c, self.data.manager(c)) for c in found] or [(1, form['manager'])]
+        elif form.get('cautare') == '3':
+            rows = [(c, self.data.manager(c)) for c in clubs if self.data.club_name(c).lower() == club_name]
+        else:
+            rows = [(c, self.data.manager(c)) for c in clubs]
+
+        result_rows = [tr("User", "Action", "Club", "Last Login")] + [
+            tr(f"<b>{m}</b>", "<a href='#'>Message</a>", f"<a href='vizualizare_club.php?id={c}'>{self.data.club_name(c)}</a>", f"<i>{self.data.last_login(c)}</i>")
+            for c, m in rows
+        ]
+        return page(filler(2), table(*result_rows))
+
+    def cauta_jucatori(self, params, form):
+        options = "<option value='0'>All</option>" + "".join(f"<option value='{i + 1}'>{n}</option>" for i, n in enumerate(NATIONALITIES))
+        return page(table(tr(f"<select name='tara'>{options}</select>")))
+
+    def lista_jucatori(self, params, form):
+        """ Player search results: two rows per player. """
+        position = int(form.get('pozitie', 1)) - 1
+        rng = self.data.rng('search', position)
+        rows = [tr("Club", "Age", "S1", "S2", "S3", "Player")]
+        for k in range(self.data.search_size):
+            player_id = (k % self.data.clubs + 1) * 1000 + rng.randint(1, self.data.squad_size)
+            age = rng.randint(17, 35)
+            skills = [round(rng.uniform(40, 95), 1) for _ in range(3)]
+            club_id = rng.randint(1, self.data.clubs)
+            rows.append(tr(f"<b>{self.data.club_name(club_id)}</b>", age, *skills, f"<a href='vizualizare_jucator.php?id={player_id}'>Player {player_id}</a>"))
+            rows.append(tr("&nbsp;"))
+        return page(filler(), table(*rows))
+
+    def lista_transferuri(self, params, form):
+        position = int(form.get('pozitie', 1))
+        forms = "".join(f"<form action='vizualizare_jucator.php?id={LISTED_FROM + position * 100 + k}'></form>" for k in range(10))
+        return page(table(tr(forms)))
+
+    def licitatie(self, params, form):
+        player_id = int(params.get('id', 0))
+        with self.data.lock:
+            offer, _ = self.data.bids.get(player_id, (self.data.player(player_id)['value'] / 10, 'Bank'))
+            self.data.bids[player_id] = (offer + 20000, self.data.club_name(1))
+        return page(table(tr("Your bid was placed")))
+
+    def antrenament(self, params, form):
+        self.data.trained.add(int(params.get('id', 0)))
+        return page(table(tr("Training applied")))
+
+    def extra_practice(self, params, form):
+        self.data.extra_trained.add(int(params.get('id', 0)))
+        return page(table(tr("Extra practice applied")))
+
+    def interactiune(self, params, form):
+        player_id = int(params.get('id', 0))
+        if player_id in self.data.chatted:
+            return page("You already had a chat with this player today")
+        self.data.chatted.add(player_id)
+        return page("<div></div>" * 4, "<div>Morale raised by 3%</div>")
+
+    def campionat(self, params, form):
+        return page(
+            table(tr("Season : « 30 »")),
+            table(tr("Pos", "Club", "Week"), tr(1, self.data.club_name(1), 12))
+        )
+
+    def meciuri(self, params, form):
+        today = pendulum.now(tz=tz.server).date()
+        rows = [tr("Date", "Match", "Result")]
+        for days in range(-3, 10):
+            result = "2-1" if days < 0 else "-"
+            rows.append(tr(today.add(days=days).format('YYYY-MM-DD'), "Club 1 - Club 2", result))
+        return page(filler(), table(*rows))
+
+    def wealth(self, params, form):
+        rows = [tr("Rank", "Value", "Club")] + [
+            tr(rank, money(10**8 // rank), f"<a href='vizualizare_club.php?id={rank * 2}'>{self.data.club_name(rank * 2)}</a>")
+            for rank in range(1, 101)
+        ]
+        return page(table(*rows))
+
+    def meci(self, params, form):
+        """ A played match. Row 2 contains the (nested) sub table of averages. """
+        rng = self.data.rng('match', params.get('id'))
+        home, away = self.data.club_name(1), self.data.club_name(2)
+        score = (rng.randint(0, 4), rng.randint(0, 4))
+
+        def team_stats(side):
+            links = "".join(f"<a onmouseover=\"popup('{side} {i}<br>[<b>{rng.uniform(60, 120):.2f}</b>]')\">{side} {i}</a>" for i in range(11))
+            fonts = "".join(f"<font>{rng.randint(5, 20)}/20</font>" for _ in range(3))
+            return links + fonts
+
+        sub_table = table(
+            tr("", home, away),
+            tr("Age", f"{rng.uniform(20, 30):.1f}", f"{rng.uniform(20, 30):.1f}"),
+            tr("Mood", f"{rng.uniform(60, 100):.1f}", f"{rng.uniform(60, 100):.1f}"),
+            tr("Energy", f"{rng.uniform(60, 100):.1f}", f"{rng.uniform(60, 100):.1f}")
+        )
+        main_table = (
+            "<table>"
+            + tr("", "Final Score", "")
+            + tr(home, "", f"<img src='imagini/scor/{score[0]}.gif'>", f"<img src='imagini/scor/{score[1]}.gif'>", "", away)
+            + f"<tr><td>{team_stats('Home')}</td><td>Possession:{(pos := rng.randint(30, 70))}% - {100 - pos}%{sub_table}</td><td>{team_stats('Away')}</td></tr>"
+            + tr("Goals")
+            + tr("<a>Home 9'</a> <b>'12</b>", "<a>Away 10'</a> <b>'80</b>")
+            + "</table>"
+        )
+        events = table(
+            tr("Kick off"),
+            tr("4-4-2 vs 5-4-1"),
+            tr("".join(f"<a>Away {i}</a>" for i in range(11))),
+            tr("".join(f"<a>Home {i}</a>" for i in range(11))),
+            tr("Full time"),
+            tr(f"{rng.randint(1000, 60000)} spectators watched the game in this {rng.choice(WEATHERS)} day"),
+            tr("End")
+        )
+        return page(main_table, events)
+
+    def finante(self, params, form):
+        """ Finance pages: 15 entries per page, last page (page 3) has 10. """
+        total_pages, per_page, last_page_entries = 3, 15, 10
+        page_num = min(int(params.get('nr_pag', 1)), total_pages)
+        entries = per_page if page_num != total_pages else last_page_entries
+
+        rows = [tr(money(5000 + k * 100), "Club sales.") for k in range(entries)]
+        back = f"<a href='finante.php?nr_pag={page_num - 1}'>Back</a>" if page_num > 1 else ""
+        rows.append(tr(back))
+        return page(table(tr("Finances"), attrs="width='300'"), table(*rows, attrs="width='300'"))
+
+    def login(self, params, form):
+        return page(table(tr("Login")))
+
+    def generic(self, params, form):
+        """ Any other page (e.g. actions), which just needs to respond OK. """
+        return page(table(tr("OK")))
+
+
+# --- Server ---
+
+class StubHandler(BaseHTTPRequestHandler):
+    """ Handles a request to the stand-in server. Settings are read from the server. """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self.handle_page()
+
+    def do_POST(self):
+        self.handle_page()
+
+    def handle_page(self):
+        server = self.server
+        url = urlparse(self.path)
+        suburl = url.path.lstrip('/') or 'index.php'
+        name = suburl.rsplit('.', 1)[0]
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        length = int(self.headers.get('Content-Length') or 0)
+        form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()} if length else {}
+
+        if server.latency:
+            time.sleep(server.latency * random.uniform(0.5, 1.5))
+
+        # -- Injected failures --
+        if server.over_rate_limit():
+            return self.respond(429, "Too many requests", {'Retry-After': '1'})
+        if random.random() < server.error_rate:
+            return self.respond(500, "Internal server error")
+
+        # -- Login --
+        if name == 'login' and self.command == 'POST':
+            headers = {'Location': 'club.php', 'Set-Cookie': f"PHPSESSID={uuid.uuid4().hex}; path=/"}
+            return self.respond(302, "", headers)
+        if name not in ('login', 'index') and 'PHPSESSID' not in (self.headers.get('Cookie') or ''):
+            return self.respond(302, "", {'Location': 'index.php'})
+
+        # -- Pages --
+        if (fixture := server.fixture(name)) is not None:
+            return self.respond(200, fixture)
+        generate = getattr(server.pages, name, server.pages.generic)
+        self.respond(200, generate(params, form))
+
+    def respond(self, status, body, headers=None):
+        content = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        # Compress like the real server does, if the client accepts it
+        if self.server.compress and len(content) > 1024 and 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+            content = gzip.compress(content)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(content)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class StubServer(ThreadingHTTPServer):
+    """ The stand-in best11 server. Can be run in a background thread with start()/stop(). """
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=8011, latency=0, error_rate=0, max_rps=0,
+        fixtures_dir=None, data=None, compress=True, verbose=False):
+        """
+        Parameters:
+            latency (float) - average seconds added to each response
+            error_rate (float) - fraction of requests answered with a 500
+            max_rps (int) - requests per second above which a 429 is returned (0 for no limit)
+            fixtures_dir (str) - directory of saved <page>.html files served instead of generated pages
+            compress (bool) - gzip responses for clients which accept it
+        """
+        super().__init__((host, port), StubHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.max_rps = max_rps
+        self.fixtures_dir = fixtures_dir
+        self.compress = compress
+        self.verbose = verbose
+        self.pages = Pages(data or GameData())
+
+        self.recent = deque()
+        self.rate_lock = threading.Lock()
+        self.thread = None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} ({self.url})"
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def over_rate_limit(self):
+        """ Returns True if more than max_rps requests were made in the last second. """
+        if not self.max_rps:
+            return False
+        now = time.monotonic()
+        with self.rate_lock:
+            while self.recent and now - self.recent[0] > 1:
+                self.recent.popleft()
+            self.recent.append(now)
+            return len(self.recent) > self.max_rps
+
+    def fixture(self, name):
+        """ Returns a saved page if one exists for this page name. """
+        if not self.fixtures_dir:
+            return None
+        file_name = os.path.join(self.fixtures_dir, f"{name}.html")
+        if not os.path.exists(file_name):
+            return None
+        with open(file_name, encoding='utf-8') as f:
+            return f.read()
+
+    def start(self):
+        """ Serves in a background thread. r-type: str (the server's url) """
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self.url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local stand-in for best11.org")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8011)
+    parser.add_argument('--latency', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--max-rps', type=int, default=0)
+    parser.add_argument('--fixtures-dir')
+    parser.add_argument('--no-compress', action='store_true')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    server = StubServer(args.host, args.port, args.latency, args.error_rate, args.max_rps, args.fixtures_dir,
+        compress=not args.no_compress, verbose=args.verbose)
+    print(f"Serving stand-in best11 at {server.url}")
+    server.serve_forever()
@@ -0,0 +1,85 @@
+"""
+    Fixtures for tests run against the local stand-in server (see stub_server.py).
+
+    Modules import each other by name and util moves up to the repository root when imported,
+    as when main.py is run from inside best11_scraper. The same is done here before any test imports them.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PACKAGE_DIR)
+os.chdir(PACKAGE_DIR)
+
+from stub_server import StubServer
+from session import Session
+from context import AppContext
+from config import UserSettings
+from ratelimit import RateLimiter
+from spider import Best11
+from player import Player
+from metrics import METRICS
+import session as session_module
+
+
+# Reference datasets written up front, so that they aren't built from the stand-in server
+# (the peer averages alone take hundreds of searches)
+REFERENCE_FILES = {
+    Best11.fn_club_index: {},
+    Best11.fn_active_managers: [],
+    Best11.fn_wealth_100: {},
+    Player.fn_peer_averages: {},
+}
+
+
+@pytest.fixture
+def stub_server():
+    """ The stand-in server, running in a background thread. """
+    server = StubServer(port=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def stub_context(stub_server, tmp_path, monkeypatch):
+    """
+    A context whose session is logged in to the stand-in server.
+    Session files are written to a temporary directory, and METRICS start from zero.
+    """
+    # The relative session_files/ paths point into the temporary directory
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "session_files").mkdir()
+    for file_name, content in REFERENCE_FILES.items():
+        with open(file_name, 'w') as jf:
+            json.dump(content, jf)
+
+    settings = UserSettings()
+    settings.read_dict({'user_details': {'username': 'tester', 'password': 'secret'}})
+    monkeypatch.setattr(session_module, 'USER_SETTINGS', settings)
+
+    main_url = Session.MAIN_URL
+    Session.set_main_url(stub_server.url)
+    # The stand-in server doesn't need protecting
+    monkeypatch.setattr(Session, 'rate_limiter', RateLimiter(rate=10**6, burst=10**6, jitter=0))
+
+    session = Session()
+    session()
+    METRICS.reset()
+    yield AppContext(session=session)
+
+    session.close()
+    Session.set_main_url(main_url)
+
+
+@pytest.fixture
+def requests_to():
+    """ Returns a function giving the number of requests made over the network to a page since METRICS were reset. """
+    def count(page, method='GET'):
+        stats = METRICS.pages.get((method, page))
+        return stats.requests if stats else 0
+    return count
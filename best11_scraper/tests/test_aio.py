@@ -0,0 +1,33 @@
+"""
+    AsyncSession follows Session's request contract, so the two can share the response cache and in-flight requests.
+"""
+
+import asyncio
+
+import pytest
+import requests
+
+from aio import AsyncSession
+
+
+async def async_request(context, suburl, **kwargs):
+    async with AsyncSession(context.session) as session:
+        return await session.request("GET", suburl, **kwargs)
+
+
+def test_async_response_shared_with_sync_session(stub_context, requests_to):
+    response = asyncio.run(async_request(stub_context, "vizualizare_jucator.php?", params={'id': 1}))
+    assert isinstance(response, requests.Response)
+
+    # Served from the cache which the async request filled
+    cached = stub_context.session.request("GET", "vizualizare_jucator.php?", params={'id': 1})
+    assert requests_to('vizualizare_jucator.php') == 1
+    assert isinstance(cached, requests.Response) and cached.ok
+    assert isinstance(cached.url, str)
+    assert b''.join(cached.iter_content(1024)) == response.content
+
+
+def test_async_errors_are_requests_errors(stub_context, stub_server):
+    stub_server.stop()
+    with pytest.raises(requests.ConnectionError):
+        asyncio.run(async_request(stub_context, "vizualizare_jucator.php?", params={'id': 1}))
@@ -0,0 +1,45 @@
+"""
+    The game clock is answered from game_clock.json while it's fresh, without a session, and only for the user it was cached for.
+"""
+
+import json
+
+import pendulum
+
+from clock import GameClock
+from context import AppContext
+from config import UserSettings
+import session as session_module
+
+
+def write_clock(username):
+    expires = pendulum.now().add(hours=1).isoformat()
+    state = {
+        'username': username,
+        'season_week': [31, 4], 'season_week_expires': expires,
+        'next_match': expires, 'next_match_expires': expires,
+    }
+    with open(GameClock.fn_clock, 'w') as jf:
+        json.dump(state, jf)
+
+
+def test_fresh_clock_needs_no_session(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "session_files").mkdir()
+    settings = UserSettings()
+    settings.read_dict({'user_details': {'username': 'tester', 'password': 'secret'}})
+    monkeypatch.setattr(session_module, 'USER_SETTINGS', settings)
+    write_clock('tester')
+
+    context = AppContext()
+    assert context.clock.season_week == (31, 4)
+    assert context.next_match > pendulum.now()
+    assert 'session' not in context.__dict__
+
+
+def test_clock_of_another_user_is_stale(stub_context, requests_to):
+    write_clock('someone else')
+    stub_context.clock.season_week
+    stub_context.clock.next_match
+    assert requests_to('campionat.php') == 1
+    assert requests_to('meciuri.php') == 1
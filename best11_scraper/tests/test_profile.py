@@ -0,0 +1,44 @@
+"""
+    A user player's profile page is requested once and shared by every property derived from it.
+"""
+
+from stub_server import GameData
+from player import UserPlayer
+
+
+# The data the stand-in server generates its pages from
+DATA = GameData()
+
+
+def squad_player():
+    """ Returns the id of a (non listed) player whose exp can still be trained. """
+    return next(i for i in DATA.squad(1) if DATA.player(i)['exp'] < 500)
+
+
+def read_profile_properties(player):
+    """ Reads every property derived from the profile page. """
+    player.potential
+    player.morale_precise
+    player.is_trainable
+    player.extra_trained_thisweek
+    str(player)
+
+
+def test_profile_requested_once(stub_context, requests_to):
+    player = UserPlayer(squad_player(), context=stub_context)
+    assert requests_to('profil.php') == 0
+
+    read_profile_properties(player)
+    read_profile_properties(player)
+    assert requests_to('profil.php') == 1
+
+
+def test_profile_requested_again_after_invalidation(stub_context, requests_to):
+    player = UserPlayer(squad_player(), context=stub_context)
+    read_profile_properties(player)
+
+    # As after training or a chat
+    player.invalidate_profile()
+    read_profile_properties(player)
+    read_profile_properties(player)
+    assert requests_to('profil.php') == 2
@@ -0,0 +1,44 @@
+"""
+    When the server answers 429 (too many requests), every request to it is held back for as long as it asks, then retried.
+"""
+
+import asyncio
+
+from aio import AsyncSession
+from ratelimit import RateLimiter
+from metrics import METRICS
+
+PLAYER_IDS = range(1, 13)
+
+
+def statuses(page):
+    return METRICS.pages[('GET', page)].statuses
+
+
+def test_penalised_host_holds_back_bids():
+    limiter = RateLimiter(rate=100, burst=5, jitter=0)
+    limiter.penalise('best11.org', 0.5)
+    assert 0.4 < limiter.reserve('best11.org', 'bidding') <= 0.5
+    # Other hosts aren't held back
+    assert limiter.reserve('example.org', 'analytics') == 0
+
+
+def test_too_many_requests_are_retried(stub_context, stub_server):
+    stub_server.max_rps = 5
+    responses = [stub_context.session.request("GET", "vizualizare_jucator.php?", params={'id': i}) for i in PLAYER_IDS]
+    assert all(i.ok for i in responses)
+    assert statuses('vizualizare_jucator.php')[429]
+    assert statuses('vizualizare_jucator.php')[200] == len(PLAYER_IDS)
+
+
+def test_too_many_async_requests_are_retried(stub_context, stub_server):
+    stub_server.max_rps = 5
+
+    async def load():
+        async with AsyncSession(stub_context.session) as session:
+            return await session.gather("GET", "vizualizare_jucator.php?", [{'id': i} for i in PLAYER_IDS])
+
+    responses = asyncio.run(load())
+    assert all(i.ok for i in responses)
+    assert statuses('vizualizare_jucator.php')[429]
+    assert statuses('vizualizare_jucator.php')[200] == len(PLAYER_IDS)
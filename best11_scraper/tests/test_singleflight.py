@@ -0,0 +1,66 @@
+"""
+    A call shared through SingleFlight is made again when its leader is interrupted, rather than leaving its followers waiting.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_cancelled_leader_doesnt_hang_followers():
+    flights = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    async def run():
+        leader = asyncio.create_task(flights.do_async('page', fetch))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(flights.do_async('page', fetch))
+        await asyncio.sleep(0.01)
+
+        # As when a gather of the leader's batch is cancelled
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+        # The follower makes the call itself, and a later caller shares its result
+        follower_result = await asyncio.wait_for(follower, 1)
+        later_result = await asyncio.wait_for(flights.do_async('page', fetch), 1)
+        return follower_result, later_result
+
+    assert asyncio.run(run()) == (2, 2)
+
+
+def test_interrupted_leader_doesnt_hang_followers():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def interrupted():
+        started.set()
+        release.wait()
+        raise KeyboardInterrupt
+
+    def leader():
+        with pytest.raises(KeyboardInterrupt):
+            flights.do('page', interrupted)
+
+    results = []
+    leader_thread = threading.Thread(target=leader)
+    leader_thread.start()
+    started.wait()
+    follower_thread = threading.Thread(target=lambda: results.append(flights.do('page', lambda: 'page content')))
+    follower_thread.start()
+
+    release.set()
+    leader_thread.join(1)
+    follower_thread.join(1)
+    assert results == ['page content']
+    assert flights.do('page', lambda: 'fetched again') == 'page content'
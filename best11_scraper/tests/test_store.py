@@ -0,0 +1,70 @@
+"""
+    Players are kept in the PlayerStore between runs, so only the pages whose needed fields are stale are requested again.
+"""
+
+import pytest
+
+from stub_server import GameData, LISTED_FROM
+from repository import PlayerRepository
+from bidding import TransferList
+from training import TrainingApprovedList
+from morale import MoraleBoost
+from metrics import METRICS
+import store
+
+DAY = 24*60*60
+
+# The data the stand-in server generates its pages from
+DATA = GameData()
+LISTED_IDS = list(range(LISTED_FROM + 1, LISTED_FROM + 201))
+SQUAD_IDS = DATA.squad(1)
+
+
+def daily_run(context):
+    """ The player loads of a daily run: the transfer list, then the squad for morale and for training. """
+    repository = PlayerRepository(context)
+    repository.load_many(LISTED_IDS, fields=TransferList.fields)
+    repository.load_many(SQUAD_IDS, user=True, fields=MoraleBoost.fields)
+    repository.load_many(SQUAD_IDS, user=True, fields=TrainingApprovedList.fields)
+
+
+def next_day(context):
+    """ Ages everything stored by a day, and starts a new run. """
+    with context.player_store.connection as connection:
+        connection.execute("UPDATE players SET fetched_at = fetched_at - ?, profile_fetched_at = profile_fetched_at - ?", (DAY, DAY))
+    context.session.cache.invalidate()
+    context.session.flights.forget()
+    METRICS.reset()
+
+
+def test_daily_run_only_refetches_stale_pages(stub_context, requests_to):
+    daily_run(stub_context)
+    # The squad's pages are fresh for the second load of the run
+    assert requests_to('vizualizare_jucator.php') == len(LISTED_IDS) + len(SQUAD_IDS)
+    assert requests_to('profil.php') == len(SQUAD_IDS)
+
+    next_day(stub_context)
+    daily_run(stub_context)
+    # Only the squad's energy and morale have gone stale (the transfer list only needs fields which last for days)
+    assert requests_to('vizualizare_jucator.php') == len(SQUAD_IDS)
+    assert requests_to('profil.php') == len(SQUAD_IDS)
+
+
+def test_potential_outlives_the_hourly_fields(stub_context, requests_to):
+    repository = PlayerRepository(stub_context)
+    repository.load_many(SQUAD_IDS, user=True)
+    repository.load_many(SQUAD_IDS, user=True, fields=TrainingApprovedList.fields)
+    assert requests_to('vizualizare_jucator.php') == len(SQUAD_IDS)
+
+    next_day(stub_context)
+    # Potentials are kept for a month, so only the players' pages are requested for training
+    repository.load_many(SQUAD_IDS, user=True, fields=TrainingApprovedList.fields)
+    assert requests_to('vizualizare_jucator.php') == len(SQUAD_IDS)
+    assert requests_to('profil.php') == 0
+
+
+def test_max_age_rejects_unknown_fields():
+    assert store.max_age(('age', 'skill')) == store.STALENESS['progress']
+    assert store.max_age(()) == max(store.STALENESS.values())
+    with pytest.raises(ValueError, match="talent"):
+        store.max_age(('skill', 'talent'))
@@ -2,13 +2,11 @@
 import pendulum
 
 from spider import Best11
-from club import UserClub
+from context import CONTEXT
+from frame import PlayerFrame
 from util import yn, TimeZones as tz
 from config import UserSettings
 
-USER_CLUB = UserClub()
-NEXT_MATCH = USER_CLUB.get_next_match(string=False)
-
 
 class TrainingApprovedList(set):
     """
@@ -19,10 +17,18 @@ class TrainingApprovedList(set):
     - Current skill related to peers
     - Tiredness
     """
-    def __init__(self):
-        super().__init__(USER_CLUB.player_objs)
+
+    # The fields read by the assessments and printouts (trained_today is requested separately)
+    fields = ('player_name', 'position', 'age', 'skill', 'energy', 'potential')
+
+    def __init__(self, context=None):
+        self.context = context if context else CONTEXT
+        super().__init__(self.context.user_club.get_player_objs(self.fields))
         self.original_list = self.copy()
 
+        # The players' fields, column-wise, for the assessments which can be vectorised
+        self.frame = PlayerFrame.from_players(self.original_list, self.context)
+
         self.hours_until_next_match = self.__hours_until_next_match()
         self.settings = self.get_settings()
 
@@ -63,8 +69,12 @@ class TrainingApprovedList(set):
         [print(f"- {str(i)}") for i in items]
         print()
 
+    def where(self, mask):
+        """ Returns the players still in the list for which mask (over self.frame) is True. r-type: set """
+        return set(self.frame.players_where(mask)) & self
+
     def get_maxed_out(self):
-        self.maxed_out = {i for i in self if not any (i.is_trainable)}
+        self.maxed_out = self.where(~self.frame.trainable.any(axis=1))
         self -= self.maxed_out
 
     def get_trained_already(self):
@@ -75,14 +85,14 @@ class TrainingApprovedList(set):
         if not (min_potential_setting := self.settings.get('min_potentials')):
             self.low_potentials = set()
             return
-        self.low_potentials = {i for i in self if sum(i.potential) < min_potential_setting}
+        self.low_potentials = self.where(self.frame.potential_total < min_potential_setting)
         self -= self.low_potentials
 
     def get_min_peer_advantage(self):
         if not (min_peer_advantage := self.settings.get('min_peer_advantage')):
             self.low_peer_advantage = set()
             return
-        self.low_peer_advantage = {i for i in self if i.peer_advantage < min_peer_advantage}
+        self.low_peer_advantage = self.where(self.frame.peer_advantage < min_peer_advantage)
         self -= self.low_peer_advantage
 
     def get_low_energy(self):
@@ -110,7 +120,7 @@ class TrainingApprovedList(set):
         now = pendulum.now(tz=tz.server)
 
         # Take off one because you will not regain energy in the final hour
-        hours_until = NEXT_MATCH.diff(now).in_hours()
+        hours_until = self.context.next_match.diff(now).in_hours()
         return hours_until
 
     def resulting_energy(self, player_obj):
@@ -126,12 +136,12 @@ class Training(Best11):
 
     suburl_training = "antrenament.php?"
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, context=None):
+        super().__init__(context)
         self.players = self.get_players()
 
     def get_players(self):
-        return TrainingApprovedList()
+        return TrainingApprovedList(self.context)
 
     def __call__(self):
         if not self.players:
@@ -160,6 +170,7 @@ class Training(Best11):
             self.suburl_training,
             params=params
             )
+        player_obj.invalidate_profile()
 
     def train_player(self, player_obj):
         """ Returns a func based on a player's position to train that player. """
@@ -260,8 +271,10 @@ class Training(Best11):
 
 class ExtraTrainingApprovedList(TrainingApprovedList):
 
-    def __init__(self):
-        super().__init__()
+    fields = (*TrainingApprovedList.fields, 'exp', 'extra_trainable')
+
+    def __init__(self, context=None):
+        super().__init__(context)
 
     def get_settings(self):
         return {k:v for k, v in UserSettings().get_section_items('extra_training').items() if isinstance(v, (int, float))}
@@ -293,18 +306,18 @@ class ExtraTrainingApprovedList(TrainingApprovedList):
         if not (max_exp_setting := self.settings.get('max_exp')):
             self.energy_warning = set()
             return
-        self.high_exp = {i for i in self if i.exp >= max_exp_setting}
+        self.high_exp = self.where(self.frame['exp'] >= max_exp_setting)
         self -= self.high_exp
 
 class ExtraTraining(Training):
 
     suburl_extra_training = 'extra_practice.php?'
     
-    def __init__(self):
-        super().__init__()
+    def __init__(self, context=None):
+        super().__init__(context)
 
     def get_players(self):
-        return ExtraTrainingApprovedList()
+        return ExtraTrainingApprovedList(self.context)
 
     def __call__(self):
         super().__call__()
@@ -316,6 +329,7 @@ class ExtraTraining(Training):
             suburl=self.suburl_extra_training,
             params={'id':player_obj.player_id, 'pag': 'confirmare'}
         )
+        player_obj.invalidate_profile()
 
 
 if __name__ == "__main__":
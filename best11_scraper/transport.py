@@ -0,0 +1,81 @@
+"""
+    Transport configuration for the sessions: compression, connection pools, keep-alive and retries.
+
+    Pools are sized for the number of requests in flight at once (MAX_CONCURRENCY),
+    so that connections are kept alive and reused rather than opened per request.
+    Idempotent GETs which fail with a 5xx are retried with exponential backoff by the
+    sessions themselves, so that every attempt waits for the rate limiter.
+    A 429 (too many requests) holds back every request to the host for as long as the server asks
+    (see RateLimiter.penalise), after which an idempotent GET is retried.
+    Action pages change the state of the game even with a GET (e.g. placing a bid),
+    so once sent they are never retried.
+    The adapters only retry connections which couldn't be made (so no request was sent).
+"""
+
+import importlib.util
+import time
+from email.utils import parsedate_to_datetime
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Local imports
+from metrics import page_of
+from cache import ACTION_PAGES
+
+# Brotli responses can only be decoded if the brotli package is installed
+ACCEPT_ENCODING = "gzip, deflate, br" if importlib.util.find_spec('brotli') else "gzip, deflate"
+
+# Maximum number of requests in flight at once, which is also the size of the connection pools
+MAX_CONCURRENCY = 8
+
+# Retries for idempotent requests. Waits backoff_factor * 2**attempt seconds between attempts
+RETRIES = 3
+BACKOFF_FACTOR = 0.5
+TOO_MANY_REQUESTS = 429
+RETRY_STATUSES = frozenset({TOO_MANY_REQUESTS, 500, 502, 503, 504})
+RETRY_METHODS = frozenset({'GET', 'HEAD'})
+
+
+def is_retryable(method, suburl):
+    """ Returns True if a request can safely be sent again. r-type: bool """
+    return method.upper() in RETRY_METHODS and page_of(suburl) not in ACTION_PAGES
+
+def backoff(attempt):
+    """ Returns the seconds to wait before retrying for the <attempt>th time (from 0). """
+    return BACKOFF_FACTOR * 2 ** attempt
+
+def retry_after(response, attempt):
+    """
+    Returns the seconds to hold back after a 429: as asked by the Retry-After header
+    (in seconds or as a date), else the backoff for the <attempt>th retry.
+    """
+    value = response.headers.get('Retry-After')
+    try:
+        return max(float(value), 0)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return backoff(attempt)
+
+def make_retry():
+    """
+    Returns the urllib3 retry policy.
+    Only connections which couldn't be made are retried (in which case the request was never sent).
+    Retries of sent requests are made by the sessions, through the rate limiter.
+    """
+    return Retry(total=None, connect=RETRIES, read=False, status=0, backoff_factor=BACKOFF_FACTOR)
+
+def make_adapter():
+    """ Returns an HTTPAdapter with pools sized for MAX_CONCURRENCY. """
+    return HTTPAdapter(
+        pool_connections=MAX_CONCURRENCY,
+        pool_maxsize=MAX_CONCURRENCY,
+        max_retries=make_retry()
+    )
+
+def mount(session):
+    """ Mounts the adapter on a (sync) Session. """
+    session.mount(session.MAIN_URL, make_adapter())